@@ -0,0 +1,236 @@
+"""
+Benchmark /launches and /statistics in-process on a synthetic launch history.
+
+Loads ``--launches`` synthetic launches into offline stand-ins for MongoDB and
+Redis (see stand_ins.py), drives the FastAPI app through httpx's ASGI
+transport and prints throughput, p50/p95/p99 latency and memory as JSON for
+three scenarios:
+
+- cold: caches are flushed before every request, so each one queries MongoDB
+- warm: the same request repeated with caches primed, from concurrent clients
+- filtered: a mix of filter combinations, each served cold
+
+The in-memory stand-ins scan and copy every document on each query, which
+keeps cold runs practical up to ~10k launches. For larger histories pass
+``--backend local`` to use a MongoDB and Redis you run yourself (the database
+given is overwritten), e.g.:
+
+    python benchmarks/api_bench.py --launches 200 --requests 500
+    python benchmarks/api_bench.py --launches 1000000 --backend local \
+        --mongo-uri mongodb://localhost:27017 --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from load_test import percentile
+from stand_ins import Backend, install, local_backend, memory_backend
+from synthetic import stored_launches, stored_launchpads, stored_rockets
+
+ENDPOINTS = ["/launches", "/statistics"]
+FILTERED = [
+    "/launches?rocket_name=falcon",
+    "/launches?launchpad=KSC&success=true",
+    "/launches?start_date=2015-01-01&end_date=2018-12-31",
+    "/launches?sort=desc&limit=1000",
+    "/statistics?rocket_name=Falcon 9",
+    "/statistics?start_date=2020-01-01&end_date=2022-12-31",
+    "/statistics?launchpad=vafb&success=false",
+]
+# Requests traced for allocation peaks, kept apart from the timed requests
+# since tracing slows them down several times
+MEMORY_SAMPLE = 5
+
+
+def max_rss_mb() -> float:
+    """
+    Peak resident set size of this process, in MiB.
+    """
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process, in MiB (the peak outside Linux).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except OSError:
+        return max_rss_mb()
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2),
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+    }
+
+
+def seed(backend: Backend, launches: int) -> float:
+    started = time.perf_counter()
+    backend.load("launch", stored_launches(launches))
+    backend.load("rockets", stored_rockets())
+    backend.load("launchpads", stored_launchpads(launches))
+    backend.load(
+        "sync_state",
+        [
+            {
+                "_id": "launches",
+                "last_full_sync": datetime.now(timezone.utc),
+                "schema_version": 2,
+            }
+        ],
+    )
+    return round(time.perf_counter() - started, 2)
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, backend: Backend) -> None:
+        self.client = client
+        self.backend = backend
+
+    async def flush(self) -> None:
+        from spacextracker.services.cache_service import local_cache
+
+        await self.backend.flush_redis()
+        local_cache.clear()
+
+    async def request(self, path: str) -> bool:
+        response = await self.client.get(path)
+        return response.status_code < 400
+
+    async def run(
+        self,
+        paths: List[str],
+        total: int,
+        concurrency: int = 1,
+        before: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send ``total`` requests cycling through ``paths``; ``before`` runs ahead
+        of each request and is not timed.
+        """
+        latencies: List[float] = []
+        per_path: Dict[str, List[float]] = {path: [] for path in paths}
+        errors = 0
+        sent = 0
+
+        async def worker() -> None:
+            nonlocal sent, errors
+            while sent < total:
+                path = paths[sent % len(paths)]
+                sent += 1
+                if before:
+                    await before()
+                started = time.perf_counter()
+                errors += not await self.request(path)
+                latency = time.perf_counter() - started
+                latencies.append(latency)
+                per_path[path].append(latency)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result = summarize(latencies, time.perf_counter() - started, errors)
+
+        tracemalloc.start()
+        for i in range(MEMORY_SAMPLE):
+            if before:
+                await before()
+            tracemalloc.reset_peak()
+            await self.request(paths[i % len(paths)])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result["memory_mb"] = {
+            "request_peak": round(peak / 2**20, 2),
+            "rss": rss_mb(),
+        }
+        if len(paths) > 1:
+            result["p50_ms_by_query"] = {
+                path: round(percentile(samples, 50) * 1000, 2)
+                for path, samples in per_path.items()
+                if samples
+            }
+        return result
+
+
+async def run(args: argparse.Namespace, backend: Backend) -> Dict[str, Any]:
+    from spacextracker.app import app
+
+    result: Dict[str, Any] = {
+        "backend": args.backend,
+        "launches": args.launches,
+        "load_s": seed(backend, args.launches),
+        "rss_after_load_mb": rss_mb(),
+        "scenarios": {"cold": {}, "warm": {}},
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        bench = Bench(client, backend)
+        for path in ENDPOINTS:
+            result["scenarios"]["cold"][path] = await bench.run(
+                [path], args.cold_requests, before=bench.flush
+            )
+        for path in ENDPOINTS:
+            await bench.flush()
+            await bench.request(path)
+            result["scenarios"]["warm"][path] = await bench.run(
+                [path], args.requests, args.concurrency
+            )
+        result["scenarios"]["filtered"] = await bench.run(
+            FILTERED, args.cold_requests, before=bench.flush
+        )
+    result["max_rss_mb"] = max_rss_mb()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--launches", type=int, default=205)
+    parser.add_argument("--requests", type=int, default=2000, help="warm requests")
+    parser.add_argument("--cold-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--backend", choices=["memory", "local"], default="memory")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="spacex_bench")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = parser.parse_args()
+
+    # Request logging would dominate the timings
+    logging.disable(logging.INFO)
+    if args.backend == "memory":
+        backend = memory_backend()
+    else:
+        backend = local_backend(args.mongo_uri, args.db_name, args.redis_url)
+    install(backend)
+
+    print(json.dumps(asyncio.run(run(args, backend)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
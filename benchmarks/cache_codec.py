@@ -0,0 +1,71 @@
+"""
+Compare cache payload codecs on a synthetic full launch history.
+
+Encodes and decodes the same list of launches, shaped like the documents
+``get_launches`` returns, with the previous JSON path and with each
+configured codec, and prints timings and stored sizes as JSON, e.g.:
+
+    python benchmarks/cache_codec.py --launches 205 --repeat 200
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from spacextracker.services.cache_codec import (
+    CompressedCodec,
+    JsonCodec,
+    MsgpackCodec,
+)
+
+from synthetic import served_launches
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Best-of-three average time per call, in microseconds.
+    """
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return round(best * 1_000_000, 1)
+
+
+def run(launches: int, repeat: int) -> Dict[str, Any]:
+    value = list(served_launches(launches))
+    codecs = {
+        "json (previous)": JsonCodec(),
+        "json+zlib": CompressedCodec(JsonCodec(), min_size=1),
+        "msgpack": MsgpackCodec(),
+        "msgpack+zlib": CompressedCodec(MsgpackCodec(), min_size=1),
+    }
+    results = {}
+    for name, codec in codecs.items():
+        payload = codec.dumps(value)
+        results[name] = {
+            "bytes": len(payload),
+            "encode_us": timed(lambda: codec.dumps(value), repeat),
+            "decode_us": timed(lambda: codec.loads(payload), repeat),
+            "datetimes_preserved": isinstance(
+                codec.loads(payload)[0]["date"], datetime
+            ),
+        }
+    return {"launches": launches, "repeat": repeat, "codecs": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--launches", type=int, default=205)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.launches, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare cache hit rates of raw and canonical cache keys on a query mix.
+
+Replays request paths (one per line, as in an access log) through the same
+parameter parsing as the API and counts how many requests would find the
+entry cached by an earlier identical key, assuming nothing expires, e.g.:
+
+    python benchmarks/cache_keys.py --log benchmarks/data/query_mix.txt
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from spacextracker.models import LaunchListParams, LaunchQueryParams
+from spacextracker.services.cache_service import redis_cache
+from spacextracker.services.data_access import get_all_statistics, get_launches
+
+DEFAULT_LOG = os.path.join(os.path.dirname(__file__), "data", "query_mix.txt")
+
+ENDPOINTS: Dict[str, Tuple[Any, Any]] = {
+    "/launches": (LaunchListParams, get_launches),
+    "/statistics": (LaunchQueryParams, get_all_statistics),
+}
+
+
+def read_calls(path: str) -> List[Tuple[Any, Dict[str, Any]]]:
+    calls = []
+    with open(path) as log:
+        for line in log:
+            url = urlsplit(line.strip())
+            if url.path not in ENDPOINTS:
+                continue
+            model, cached = ENDPOINTS[url.path]
+            params = model(**dict(parse_qsl(url.query)))
+            calls.append((cached, params.model_dump(exclude_none=True)))
+    return calls
+
+
+def hit_rate(
+    calls: List[Tuple[Any, Dict[str, Any]]], key_of: Callable[..., str]
+) -> Dict[str, Any]:
+    seen = set()
+    hits = 0
+    for cached, kwargs in calls:
+        key = key_of(cached, kwargs)
+        hits += key in seen
+        seen.add(key)
+    return {
+        "requests": len(calls),
+        "distinct_keys": len(seen),
+        "hit_rate": round(hits / len(calls), 3) if calls else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", default=DEFAULT_LOG)
+    args = parser.parse_args()
+
+    calls = read_calls(args.log)
+    raw_keys = {
+        cached: redis_cache()(cached.__wrapped__).cache_key
+        for _, cached in ENDPOINTS.values()
+    }
+    result = {
+        "log": args.log,
+        "raw": hit_rate(calls, lambda cached, kw: raw_keys[cached](**kw)),
+        "canonical": hit_rate(calls, lambda cached, kw: cached.cache_key(**kw)),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
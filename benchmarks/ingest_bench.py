@@ -0,0 +1,233 @@
+"""
+Benchmark update_launches_in_db against a local replay of the SpaceX API.
+
+Starts replay_server.py in-process with a synthetic (or recorded) history,
+points API_BASE_URL at it and runs the ingest into the MongoDB and Redis
+stand-ins of stand_ins.py four times: a full sync into an empty store, a
+full sync of unchanged data, a due full reconcile the server answers with 304
+Not Modified, and an incremental sync with ETags turned off. Each run is split into stages,
+printed as JSON:
+
+- transform: building stored documents (``transform_launch``)
+- hash: content hashes used to skip unchanged documents
+- mongo: reading stored hashes back and bulk writes
+- api: the rest, i.e. waiting for and decoding SpaceX API responses
+
+Stages run interleaved as launches stream through, so they are measured as
+time spent in each step on the ingest thread, and add up to the total.
+
+With ``--workers`` it also runs the fanned-out ingest of tasks.py once per
+worker count, running the page tasks on that many threads in place of Celery
+workers, and reports wall time and launches per second. Page fetches overlap
+across threads as they would across workers; transform and write time does
+not, since threads share the GIL, so real workers scale further. E.g.:
+
+    python benchmarks/ingest_bench.py --launches 20000 --latency 0.05
+    python benchmarks/ingest_bench.py --launches 20000 --latency 0.2 --workers 1 2 4 8
+    python benchmarks/ingest_bench.py --launches 1000000 --backend local
+"""
+
+import argparse
+import functools
+import json
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from replay_server import Payloads, add_behavior_arguments, behavior_from, start
+from stand_ins import install, local_backend, memory_backend
+
+T = TypeVar("T")
+
+
+class TimedCollection:
+    """
+    Collection proxy adding the time spent in MongoDB calls to a counter.
+    """
+
+    def __init__(self, collection: Any, timings: Dict[str, float]) -> None:
+        self._collection = collection
+        self._timings = timings
+
+    def find(self, *args: Any, **kwargs: Any) -> list:
+        started = time.perf_counter()
+        docs = list(self._collection.find(*args, **kwargs))
+        self._timings["mongo"] += time.perf_counter() - started
+        return docs
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._collection, name)
+        if not callable(attribute):
+            return attribute
+        return timed(attribute, self._timings, "mongo")
+
+
+def timed(func: Callable[..., T], timings: Dict[str, float], stage: str):
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[stage] += time.perf_counter() - started
+
+    return wrapper
+
+
+def instrument(timings: Dict[str, float]) -> None:
+    """
+    Wrap the ingest steps so they record their time in ``timings``.
+    """
+    from spacextracker.services import spacex_data, store_to_db
+
+    spacex_data.transform_launch = timed(
+        spacex_data.transform_launch, timings, "transform"
+    )
+    store_to_db.compute_content_hash = timed(
+        store_to_db.compute_content_hash, timings, "hash"
+    )
+    for name in ("launches_collection", "rockets_collection", "launchpads_collection"):
+        setattr(store_to_db, name, TimedCollection(getattr(store_to_db, name), timings))
+
+
+def run_sync(full: bool, timings: Dict[str, float]) -> Dict[str, Any]:
+    from spacextracker.services.store_to_db import update_launches_in_db
+
+    timings.clear()
+    started = time.perf_counter()
+    totals = update_launches_in_db(full=full)
+    total = time.perf_counter() - started
+    stages = {
+        stage: round(timings[stage], 3) for stage in ("transform", "hash", "mongo")
+    }
+    stages["api"] = round(total - sum(timings.values()), 3)
+    return {
+        "total_s": round(total, 3),
+        "stages_s": stages,
+        "launches_per_s": round(totals["processed"] / total, 1),
+        **totals,
+    }
+
+
+def run_fan_out(workers: int, page_size: int) -> Dict[str, Any]:
+    """
+    Run the steps of the fanned-out full ingest with ``workers`` page threads.
+    """
+    from spacextracker.services.spacex_data import count_query_pages, launches_query
+    from spacextracker.services.store_to_db import (
+        finish_launch_pages,
+        store_dimensions,
+        store_launch_page,
+    )
+
+    started = time.perf_counter()
+    dimensions, rockets, launchpads = store_dimensions()
+    query = launches_query()
+    pages = count_query_pages("launches", query, page_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                lambda page: store_launch_page(
+                    query, page, rockets, launchpads, page_size
+                ),
+                range(1, pages + 1),
+            )
+        )
+    totals = finish_launch_pages(results, dimensions, True, {})
+    total = time.perf_counter() - started
+    return {
+        "total_s": round(total, 3),
+        "pages": pages,
+        "launches_per_s": round(totals["processed"] / total, 1),
+        **totals,
+    }
+
+
+def not_modified(timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Run a full reconcile that is due, so the launch list is requested
+    conditionally on the ETag of the last full sync.
+    """
+    from spacextracker.services import store_to_db
+
+    full_sync_hours = store_to_db.FULL_SYNC_HOURS
+    store_to_db.FULL_SYNC_HOURS = 0
+    try:
+        return run_sync(False, timings)
+    finally:
+        store_to_db.FULL_SYNC_HOURS = full_sync_hours
+
+
+def incremental(server: Any, timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Run an incremental sync with the server sending no ETags, so rockets and
+    launchpads are not answered with 304 either.
+    """
+    etag = server.behavior.etag
+    server.behavior.etag = "none"
+    try:
+        return run_sync(False, timings)
+    finally:
+        server.behavior.etag = etag
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--launches", type=int, default=205)
+    parser.add_argument("--recorded", help="directory written by replay_server.py")
+    parser.add_argument("--backend", choices=["memory", "local"], default="memory")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="spacex_bench")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--workers", type=int, nargs="*", default=[])
+    parser.add_argument("--page-size", type=int, default=200)
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.recorded:
+        payloads = Payloads.recorded(args.recorded, args.launches)
+    else:
+        payloads = Payloads.synthetic(args.launches)
+    server = start(payloads, behavior_from(args))
+
+    from spacextracker.services import spacex_data
+
+    spacex_data.API_BASE_URL = server.base_url
+    if args.backend == "memory":
+        backend = memory_backend()
+    else:
+        backend = local_backend(args.mongo_uri, args.db_name, args.redis_url)
+    for name in ("launch", "rockets", "launchpads", "sync_state"):
+        backend.db[name].delete_many({})
+    install(backend)
+    timings: Dict[str, float] = defaultdict(float)
+    instrument(timings)
+
+    try:
+        result = {
+            "backend": args.backend,
+            "launches": len(payloads.launches),
+            "upstream": vars(behavior_from(args)),
+            "runs": {
+                "full_empty": run_sync(True, timings),
+                "full_unchanged": run_sync(True, timings),
+                "not_modified": not_modified(timings),
+                "incremental": incremental(server, timings),
+            },
+            "fan_out": {
+                f"{workers}_workers": run_fan_out(workers, args.page_size)
+                for workers in args.workers
+            },
+            "upstream_requests": dict(server.stats),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Measure the logging cost a cached /launches request pays on the event loop.
+
+Replays the INFO records one request served from the cache logs (request
+received, cache hit, response cache hit, launches returned) at full speed into
+a log file with three pipelines:
+
+- sync_eager: f-strings and a file handler on the calling thread, as before
+- queued_lazy: %-style arguments and a background listener (``queued``)
+- queued_sampled: the same, keeping ``--sample-rate`` of the hot loggers
+
+and prints, as JSON, the microseconds per request spent in the logging calls,
+the requests per second that leaves room for, and how long the listener took
+to drain its queue afterwards, e.g.:
+
+    python benchmarks/logging_overhead.py --requests 50000 --sample-rate 0.01
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Union
+
+from spacextracker.logger import (
+    DeferredQueueHandler,
+    SampledLogger,
+    TEXT_FORMAT,
+    _listeners,
+    queued,
+)
+from spacextracker.models import LaunchListParams
+
+KEY = "cache:v42:5f0c1d0e9a7b4c2d8e6f1a3b5c7d9e0f"
+PARAMS = LaunchListParams(rocket_name="Falcon 9", limit=50)
+
+
+Logger = Union[logging.Logger, SampledLogger]
+
+
+def eager_request(request: Logger, cache: Logger) -> None:
+    request.info(f"Fetching launches with params: {PARAMS}")
+    cache.info(f"Cache hit for get_launches with key {KEY}")
+    cache.info(f"Response cache hit for response:{KEY} (br)")
+    request.info(f"Fetched {50} launches successfully")
+
+
+def lazy_request(request: Logger, cache: Logger) -> None:
+    request.info("Fetching launches with params: %s", PARAMS)
+    cache.info("Cache hit for %s with key %s", "get_launches", KEY)
+    cache.info("Response cache hit for %s (%s)", f"response:{KEY}", "br")
+    request.info("Fetched %d launches successfully", 50)
+
+
+def pipeline(
+    name: str, path: str, queue: bool, sample_rate: float
+) -> Dict[str, Logger]:
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handler = queued(file_handler) if queue else file_handler
+    loggers: Dict[str, Logger] = {}
+    for kind in ("request", "cache"):
+        log = logging.getLogger(f"bench.{name}.{kind}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        log.addHandler(handler)
+        loggers[kind] = SampledLogger(log, sample_rate) if sample_rate < 1 else log
+    return loggers
+
+
+def run_case(
+    name: str,
+    request_func: Callable[[Logger, Logger], None],
+    requests: int,
+    queue: bool,
+    sample_rate: float,
+    directory: str,
+) -> Dict[str, Any]:
+    path = os.path.join(directory, f"{name}.log")
+    loggers = pipeline(name, path, queue, sample_rate)
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_func(loggers["request"], loggers["cache"])
+    elapsed = time.perf_counter() - started
+
+    handler = logging.getLogger(f"bench.{name}.request").handlers[0]
+    drain_started = time.perf_counter()
+    if isinstance(handler, DeferredQueueHandler):
+        _listeners.pop(handler).stop()
+    handler.close()
+    drain = time.perf_counter() - drain_started
+    with open(path) as log_file:
+        lines = sum(1 for _ in log_file)
+    return {
+        "us_per_request": round(elapsed / requests * 1e6, 2),
+        "requests_per_s": round(requests / elapsed),
+        "drain_s": round(drain, 3),
+        "lines_written": lines,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cases = {
+            "sync_eager": (eager_request, False, 1.0),
+            "queued_lazy": (lazy_request, True, 1.0),
+            "queued_sampled": (lazy_request, True, args.sample_rate),
+        }
+        result = {
+            "requests": args.requests,
+            "records_per_request": 4,
+            "cases": {
+                name: run_case(name, func, args.requests, queue, rate, directory)
+                for name, (func, queue, rate) in cases.items()
+            },
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
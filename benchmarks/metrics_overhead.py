@@ -0,0 +1,55 @@
+"""
+Measure the cost of recording one metrics event.
+
+Times each metric update used on the request path, with label values bound
+once (as the cache decorator and data_access do) and passed per call (as the
+HTTP middleware does), minus the cost of an empty call, and prints
+nanoseconds per event as JSON, e.g.:
+
+    python benchmarks/metrics_overhead.py --events 1000000
+"""
+
+import argparse
+import json
+import timeit
+from typing import Callable, Dict
+
+from spacextracker.metrics import Counter, Gauge, Histogram
+
+
+def per_event_ns(func: Callable[[], None], events: int) -> float:
+    return min(timeit.repeat(func, number=events, repeat=5)) / events * 1e9
+
+
+def run(events: int) -> Dict[str, float]:
+    counter = Counter("bench_total", "Bench.", ("function", "tier"))
+    gauge = Gauge("bench_in_flight", "Bench.", ("route",))
+    histogram = Histogram("bench_seconds", "Bench.", ("operation",))
+    bound_counter = counter.labels("get_launches", "l1")
+    bound_histogram = histogram.labels("find_launches")
+
+    cases = {
+        "counter.labels().inc": bound_counter.inc,
+        "counter.inc(labels)": lambda: counter.inc("get_launches", "l1"),
+        "gauge.inc(labels)": lambda: gauge.inc("/launches"),
+        "histogram.labels().observe": lambda: bound_histogram.observe(0.0123),
+        "histogram.observe(labels)": lambda: histogram.observe(0.0123, "/launches"),
+    }
+    baseline = per_event_ns(lambda: None, events)
+    return {
+        name: round(max(per_event_ns(func, events) - baseline, 0.0), 1)
+        for name, func in cases.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    result = {"events": args.events, "ns_per_event": run(args.events)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Serve recorded or synthetic SpaceX API payloads locally for ingest runs.
+
+Answers the endpoints the ingest uses (``/v4/launches``, ``/v4/rockets``,
+``/v4/launchpads`` and ``/v4/launches/query``) from a recording made with
+``--record`` or from a synthetic history of ``--launches`` launches. Latency,
+errors and ETag handling are configurable, so ingest can be measured and
+exercised without the live API. Point the app at it with API_BASE_URL, e.g.:
+
+    python benchmarks/replay_server.py --launches 100000 --latency 0.05 \
+        --error-rate 0.01 --port 8765
+    API_BASE_URL=http://127.0.0.1:8765/v4/ make start-celery
+
+Record the live API once to replay real payloads later:
+
+    python benchmarks/replay_server.py --record benchmarks/data/recorded
+    python benchmarks/replay_server.py --recorded benchmarks/data/recorded
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from synthetic import api_launches, api_launchpads, api_rockets
+
+ENDPOINTS = ("launches", "rockets", "launchpads")
+LIVE_API = "https://api.spacexdata.com/v4/"
+
+
+@dataclass
+class Behavior:
+    """
+    How the server misbehaves.
+
+    ``etag`` is 'strong' to send ETags and answer matching If-None-Match with
+    304, 'ignore' to send ETags but always answer 200, or 'none'.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    retry_after: int = 1
+    etag: str = "strong"
+    seed: int = 0
+
+
+class Payloads:
+    """
+    Upstream data, with list bodies encoded once up front.
+    """
+
+    def __init__(
+        self,
+        launches: List[Dict[str, Any]],
+        rockets: List[Dict[str, Any]],
+        launchpads: List[Dict[str, Any]],
+    ) -> None:
+        self.launches = launches
+        self.bodies: Dict[str, Tuple[bytes, str]] = {}
+        for name, data in zip(ENDPOINTS, (launches, rockets, launchpads)):
+            body = json.dumps(data).encode()
+            self.bodies[f"/v4/{name}"] = (body, f'"{sha1(body).hexdigest()}"')
+
+    @classmethod
+    def synthetic(cls, launches: int, seed: int = 42) -> "Payloads":
+        return cls(
+            list(api_launches(launches, seed)), api_rockets(), api_launchpads(launches)
+        )
+
+    @classmethod
+    def recorded(cls, directory: str, launches: Optional[int] = None) -> "Payloads":
+        data = {}
+        for name in ENDPOINTS:
+            with open(os.path.join(directory, f"{name}.json")) as recording:
+                data[name] = json.load(recording)
+        return cls(data["launches"][:launches], data["rockets"], data["launchpads"])
+
+
+def record(directory: str, base_url: str = LIVE_API) -> None:
+    """
+    Save the current upstream payloads of every endpoint to ``directory``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name in ENDPOINTS:
+        response = requests.get(f"{base_url}{name}", timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(directory, f"{name}.json"), "wb") as recording:
+            recording.write(response.content)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    """
+    Evaluate the subset of MongoDB query syntax the ingest sends.
+    """
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif field == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            for op, operand in condition.items():
+                if value is None:
+                    return False
+                if op == "$gte" and not value >= operand:
+                    return False
+                if op == "$lte" and not value <= operand:
+                    return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+def query_page(
+    launches: List[Dict[str, Any]], query: Dict[str, Any], options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Answer a ``/launches/query`` request the way mongoose-paginate does.
+    """
+    docs = [doc for doc in launches if matches(doc, query)]
+    # Last key first, relying on stable sorts; _id is served as id
+    for field, order in reversed(list(options.get("sort", {}).items())):
+        field = "id" if field == "_id" else field
+        docs.sort(
+            key=lambda doc: doc.get(field) or "",
+            reverse=order in ("desc", "descending", -1),
+        )
+    limit = int(options.get("limit", 10))
+    page = int(options.get("page", 1))
+    total_pages = max(1, -(-len(docs) // limit))
+    return {
+        "docs": docs[(page - 1) * limit : page * limit],
+        "totalDocs": len(docs),
+        "limit": limit,
+        "page": page,
+        "totalPages": total_pages,
+        "hasPrevPage": page > 1,
+        "hasNextPage": page < total_pages,
+        "prevPage": page - 1 if page > 1 else None,
+        "nextPage": page + 1 if page < total_pages else None,
+    }
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address: Tuple[str, int], payloads: Payloads, behavior: Behavior
+    ) -> None:
+        super().__init__(address, ReplayHandler)
+        self.payloads = payloads
+        self.behavior = behavior
+        self.stats: Counter = Counter()
+        self._rng = random.Random(behavior.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v4/"
+
+    def roll(self) -> Tuple[float, bool]:
+        """
+        Draw the delay and whether to fail for one request.
+        """
+        behavior = self.behavior
+        with self._lock:
+            delay = behavior.latency + self._rng.uniform(0, behavior.jitter)
+            fail = self._rng.random() < behavior.error_rate
+        return delay, fail
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status: int, body: bytes = b"", **headers: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats[f"{self.command} {self.path} {status}"] += 1
+
+    def _misbehave(self) -> bool:
+        delay, fail = self.server.roll()
+        time.sleep(delay)
+        if fail:
+            behavior = self.server.behavior
+            body = json.dumps({"error": "injected failure"}).encode()
+            self._send(
+                behavior.error_status, body, Retry_After=str(behavior.retry_after)
+            )
+        return fail
+
+    def do_GET(self) -> None:
+        stored = self.server.payloads.bodies.get(self.path)
+        if stored is None:
+            self._send(404, b'{"error": "not found"}')
+            return
+        if self._misbehave():
+            return
+        body, etag = stored
+        mode = self.server.behavior.etag
+        if mode == "none":
+            self._send(200, body)
+            return
+        if mode == "strong" and self.headers.get("If-None-Match") == etag:
+            self._send(304, ETag=etag)
+            return
+        self._send(200, body, ETag=etag)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/v4/launches/query":
+            self._send(404, b'{"error": "not found"}')
+            return
+        if self._misbehave():
+            return
+        page = query_page(
+            self.server.payloads.launches,
+            request.get("query", {}),
+            request.get("options", {}),
+        )
+        self._send(200, json.dumps(page).encode())
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start(
+    payloads: Payloads,
+    behavior: Optional[Behavior] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> ReplayServer:
+    """
+    Serve in a background thread; stop with ``shutdown()``.
+    """
+    server = ReplayServer((host, port), payloads, behavior or Behavior())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--etag", choices=["strong", "ignore", "none"], default="strong"
+    )
+
+
+def behavior_from(args: argparse.Namespace) -> Behavior:
+    return Behavior(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        etag=args.etag,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--launches", type=int, default=None)
+    parser.add_argument("--recorded", help="directory written by --record")
+    parser.add_argument("--record", help="save the live API to this directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+        return
+    if args.recorded:
+        payloads = Payloads.recorded(args.recorded, args.launches)
+    else:
+        payloads = Payloads.synthetic(args.launches or 205)
+
+    server = ReplayServer((args.host, args.port), payloads, behavior_from(args))
+    print(
+        json.dumps({"base_url": server.base_url, "launches": len(payloads.launches)}),
+        flush=True,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
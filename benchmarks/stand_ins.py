@@ -0,0 +1,191 @@
+"""
+Offline stand-ins for MongoDB and Redis, and helpers to point the app at them.
+
+``memory_backend`` builds in-process stores (mongomock and fakeredis) behind
+the same client interfaces the app uses, so benchmarks run without any
+service. ``local_backend`` uses real servers for runs too large to keep in
+memory. ``install`` swaps either into every module that imported a client
+from ``spacextracker.db``.
+"""
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+import fakeredis
+import fakeredis.aioredis
+import mongomock
+import redis
+import redis.asyncio as aioredis
+from pymongo import AsyncMongoClient, MongoClient
+
+COLLECTIONS = ("launch", "rockets", "launchpads", "sync_state")
+# Keys written by the app; a local Redis is only flushed of these
+KEY_PATTERNS = ("cache:*", "response:*", "lock:*")
+
+
+class Collection:
+    """
+    mongomock collection whose bulk_write accepts current pymongo operations.
+    """
+
+    def __init__(self, collection: mongomock.Collection) -> None:
+        self._collection = collection
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+
+    def bulk_write(self, operations: List[Any], ordered: bool = True) -> Any:
+        # Only the UpdateOne upserts of store_to_db.bulk_upsert are needed
+        upserted = matched = 0
+        for operation in operations:
+            result = self._collection.update_one(
+                operation._filter, operation._doc, upsert=operation._upsert
+            )
+            matched += result.matched_count
+            upserted += result.upserted_id is not None
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched)
+
+
+class AsyncCursor:
+    """
+    Awaitable facade over a mongomock cursor, like pymongo's AsyncCursor.
+    """
+
+    def __init__(self, cursor: Any) -> None:
+        self._cursor = cursor
+
+    def sort(self, *args: Any, **kwargs: Any) -> "AsyncCursor":
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, limit: int) -> "AsyncCursor":
+        self._cursor = self._cursor.limit(limit)
+        return self
+
+    def batch_size(self, size: int) -> "AsyncCursor":
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self._cursor)
+
+
+class AsyncCollection:
+    """
+    The subset of pymongo's AsyncCollection the request path uses.
+    """
+
+    def __init__(self, collection: mongomock.Collection) -> None:
+        self._collection = collection
+
+    def find(self, *args: Any, **kwargs: Any) -> AsyncCursor:
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def find_one(self, *args: Any, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        return self._collection.find_one(*args, **kwargs)
+
+    async def count_documents(self, *args: Any, **kwargs: Any) -> int:
+        return self._collection.count_documents(*args, **kwargs)
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> AsyncCursor:
+        return AsyncCursor(self._collection.aggregate(pipeline))
+
+
+@dataclass
+class Backend:
+    db: Dict[str, Any]
+    async_db: Dict[str, Any]
+    redis_client: Any
+    async_redis_client: Any
+
+    def load(self, name: str, docs: Iterable[Dict[str, Any]], batch: int = 10_000):
+        """
+        Replace a collection's documents, inserting in batches.
+        """
+        collection = self.db[name]
+        collection.delete_many({})
+        chunk: List[Dict[str, Any]] = []
+        for doc in docs:
+            chunk.append(doc)
+            if len(chunk) >= batch:
+                collection.insert_many(chunk)
+                chunk = []
+        if chunk:
+            collection.insert_many(chunk)
+
+    async def flush_redis(self) -> None:
+        """
+        Drop every key the app wrote, as after a restart of Redis.
+        """
+        for pattern in KEY_PATTERNS:
+            keys = [key async for key in self.async_redis_client.scan_iter(pattern)]
+            if keys:
+                await self.async_redis_client.delete(*keys)
+
+
+def memory_backend() -> Backend:
+    db = mongomock.MongoClient()["spacex_bench"]
+    server = fakeredis.FakeServer()
+    return Backend(
+        db={name: Collection(db[name]) for name in COLLECTIONS},
+        async_db={name: AsyncCollection(db[name]) for name in COLLECTIONS},
+        redis_client=fakeredis.FakeRedis(server=server, decode_responses=True),
+        async_redis_client=fakeredis.aioredis.FakeRedis(server=server),
+    )
+
+
+def local_backend(mongo_uri: str, db_name: str, redis_url: str) -> Backend:
+    db = MongoClient(mongo_uri)[db_name]
+    async_db = AsyncMongoClient(mongo_uri)[db_name]
+    return Backend(
+        db={name: db[name] for name in COLLECTIONS},
+        async_db={name: async_db[name] for name in COLLECTIONS},
+        redis_client=redis.Redis.from_url(redis_url, decode_responses=True),
+        async_redis_client=aioredis.Redis.from_url(redis_url),
+    )
+
+
+def install(backend: Backend) -> None:
+    """
+    Point the app's modules at the backend's clients.
+    """
+    from spacextracker import app
+    from spacextracker.services import (
+        cache_service,
+        data_access,
+        indexes,
+        response_cache,
+        seeding,
+        store_to_db,
+        sync_state,
+    )
+
+    db, async_db = backend.db, backend.async_db
+    patches = {
+        data_access: {
+            "launches_collection": db["launch"],
+            "async_launches_collection": async_db["launch"],
+            "async_rockets_collection": async_db["rockets"],
+            "async_launchpads_collection": async_db["launchpads"],
+        },
+        store_to_db: {
+            "launches_collection": db["launch"],
+            "rockets_collection": db["rockets"],
+            "launchpads_collection": db["launchpads"],
+        },
+        indexes: {"launches_collection": db["launch"]},
+        sync_state: {
+            "sync_state_collection": db["sync_state"],
+            "async_sync_state_collection": async_db["sync_state"],
+        },
+        cache_service: {
+            "redis_client": backend.redis_client,
+            "async_redis_client": backend.async_redis_client,
+        },
+        response_cache: {"async_redis_client": backend.async_redis_client},
+        seeding: {"redis_client": backend.redis_client},
+        app: {"async_redis_client": backend.async_redis_client},
+    }
+    for module, attributes in patches.items():
+        for name, value in attributes.items():
+            setattr(module, name, value)
@@ -0,0 +1,176 @@
+"""
+Synthetic SpaceX launch history for benchmarks.
+
+Generates deterministic data in the shape of the SpaceX API (``api_*``) and
+in the shape stored in MongoDB (``stored_*``), so the same history can be
+served upstream or loaded into the store directly. Launches are produced
+lazily and spread over the real 2006 to 2026 range whatever their number,
+from the ~200 real launches up to millions.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from spacextracker.services.spacex_data import transform_launch
+
+FIRST_LAUNCH = datetime(2006, 3, 24, 22, 30)
+LAST_LAUNCH = datetime(2026, 1, 1)
+
+ROCKETS = [
+    ("5e9d0d95eda69955f709d1eb", "Falcon 1", 40),
+    ("5e9d0d95eda69973a809d1ec", "Falcon 9", 98),
+    ("5e9d0d95eda69974db09d1ed", "Falcon Heavy", 100),
+    ("5e9d0d96eda699382d09d1ee", "Starship", 0),
+]
+LAUNCHPADS = [
+    (
+        "5e9e4501f5090910d4566f83",
+        "VAFB SLC 3W",
+        "Vandenberg Space Force Base Space Launch Complex 3W",
+    ),
+    (
+        "5e9e4501f509094ba4566f84",
+        "CCSFS SLC 40",
+        "Cape Canaveral Space Force Station Space Launch Complex 40",
+    ),
+    ("5e9e4502f5090995de566f86", "Kwajalein Atoll", "Kwajalein Atoll Omelek Island"),
+    (
+        "5e9e4502f509092b78566f87",
+        "VAFB SLC 4E",
+        "Vandenberg Space Force Base Space Launch Complex 4E",
+    ),
+    (
+        "5e9e4502f509094188566f88",
+        "KSC LC 39A",
+        "Kennedy Space Center Historic Launch Complex 39A",
+    ),
+    ("5e9e4502f509094188566f89", "STLS", "SpaceX South Texas Launch Site"),
+]
+WORDS = ["orbit", "payload", "booster", "landing", "stage", "fairing", "droneship"]
+
+
+def api_rockets() -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": rocket_id,
+            "name": name,
+            "type": "rocket",
+            "description": f"{name} synthetic rocket",
+            "active": success_rate > 0,
+            "cost_per_launch": 50_000_000,
+            "success_rate_pct": success_rate,
+            "first_flight": "2006-03-24",
+            "country": "United States",
+            "company": "SpaceX",
+            "wikipedia": f"https://en.wikipedia.org/wiki/{name.replace(' ', '_')}",
+        }
+        for rocket_id, name, success_rate in ROCKETS
+    ]
+
+
+def api_launchpads(launches: int = 0) -> List[Dict[str, Any]]:
+    per_pad = launches // len(LAUNCHPADS)
+    return [
+        {
+            "id": launchpad_id,
+            "name": name,
+            "full_name": full_name,
+            "locality": "Earth",
+            "region": "Synthetic",
+            "status": "active",
+            "launch_attempts": per_pad,
+            "launch_successes": per_pad * 95 // 100,
+            "details": f"{full_name}.",
+            "images": {"large": []},
+            "rockets": [rocket_id for rocket_id, _, _ in ROCKETS],
+            "launches": [],
+        }
+        for launchpad_id, name, full_name in LAUNCHPADS
+    ]
+
+
+def api_launches(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``count`` raw launches in date order, as ``/v4/launches`` returns them.
+    """
+    rng = random.Random(seed)
+    step = (LAST_LAUNCH - FIRST_LAUNCH) / max(count, 1)
+    for i in range(count):
+        launch_id = f"{i:08x}{rng.getrandbits(64):016x}"
+        date = FIRST_LAUNCH + step * i + timedelta(seconds=rng.randrange(60))
+        upcoming = date > datetime(2025, 11, 1)
+        yield {
+            "id": launch_id,
+            "name": f"Mission {i}",
+            "date_utc": date.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "success": None if upcoming else rng.random() > 0.05,
+            "upcoming": upcoming,
+            "details": " ".join(
+                rng.choice(WORDS) for _ in range(rng.randrange(10, 60))
+            ),
+            "links": {
+                "patch": {"small": f"https://images2.imgbox.com/{launch_id[:8]}.png"},
+                "webcast": f"https://www.youtube.com/watch?v={launch_id[:11]}",
+                "article": f"https://spaceflightnow.com/{launch_id}/",
+                "wikipedia": f"https://en.wikipedia.org/wiki/Mission_{i}",
+            },
+            "rocket": ROCKETS[rng.randrange(len(ROCKETS))][0],
+            "launchpad": LAUNCHPADS[rng.randrange(len(LAUNCHPADS))][0],
+        }
+
+
+def stored_launches(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``count`` launches as they are stored in MongoDB after ingest.
+
+    Dates are naive UTC, as pymongo reads them back.
+    """
+    rockets = {
+        rocket_id: {
+            "id": rocket_id,
+            "name": name,
+            "name_lower": name.lower(),
+            "success_rate_pct": success_rate,
+        }
+        for rocket_id, name, success_rate in ROCKETS
+    }
+    launchpads = {
+        lp["id"]: {
+            "id": lp["id"],
+            "name": lp["name"],
+            "name_lower": lp["name"].lower(),
+            "full_name": lp["full_name"],
+            "launch_attempts": lp["launch_attempts"],
+            "launch_successes": lp["launch_successes"],
+        }
+        for lp in api_launchpads(count)
+    }
+    for launch in api_launches(count, seed):
+        doc = transform_launch(launch, rockets, launchpads)
+        doc["_id"] = doc["id"]
+        doc["date"] = doc["date"].replace(tzinfo=None)
+        yield doc
+
+
+def stored_rockets() -> List[Dict[str, Any]]:
+    return [{**rocket, "_id": rocket["id"]} for rocket in api_rockets()]
+
+
+def stored_launchpads(launches: int) -> List[Dict[str, Any]]:
+    return [
+        {**lp, "_id": lp["id"], "images": lp["images"]["large"]}
+        for lp in api_launchpads(launches)
+    ]
+
+
+def served_launches(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``count`` launches as ``get_launches`` returns them, without the
+    internal fields it projects out.
+    """
+    for doc in stored_launches(count, seed):
+        del doc["_id"]
+        for field in ("rocket", "launchpad"):
+            doc[field] = {k: v for k, v in doc[field].items() if k != "name_lower"}
+        yield doc
@@ -1,27 +1,112 @@
+import asyncio
 import os
-from typing import Any, Dict, List, Union
-from fastapi import FastAPI, Depends, HTTPException, Request
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Literal, Union
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 
-from spacextracker.logger import logger
-from spacextracker.models import LaunchQueryParams
-from spacextracker.services.data_access import get_launches, get_all_statistics
+from spacextracker.db import async_client, async_redis_client
+from spacextracker.logger import logger, request_logger
+from spacextracker.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    TASK_METRICS_KEY,
+    MetricsMiddleware,
+    render,
+    task_metrics,
+)
+from spacextracker.models import LaunchListParams, LaunchQueryParams
+from spacextracker.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from spacextracker.services.cache_service import get_cache_stats
+from spacextracker.services.data_access import (
+    get_launches,
+    get_all_statistics,
+    iter_launches,
+)
+from spacextracker.services.export import EXPORT_MEDIA_TYPES, stream_launches
+from spacextracker.services.http_cache import (
+    conditional_headers,
+    is_not_modified,
+    not_modified_headers,
+)
+from spacextracker.services.indexes import ensure_indexes
+from spacextracker.services.response_cache import (
+    RESPONSE_CACHE_ENABLED,
+    cached_response,
+)
+from spacextracker.services.seeding import SEED_ON_STARTUP, warm_up
+from spacextracker.services.utils import encode_cursor
 
-app = FastAPI(title="SpaceX Tracker API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except Exception:
+        logger.warning("Starting without ensured launch indexes")
+    # Seed an empty launch store without holding up startup
+    warmup = asyncio.create_task(warm_up()) if SEED_ON_STARTUP else None
+    yield
+    if warmup:
+        warmup.cancel()
+    await async_redis_client.aclose()
+    await async_client.close()
+
+
+app = FastAPI(title="SpaceX Tracker API", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 BASE_DIR = os.path.dirname(__file__)
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 
 
+def _next_cursor_header(launches: List[Dict[str, Any]], limit: int) -> Dict[str, str]:
+    if len(launches) < limit:
+        return {}
+    last = launches[-1]
+    return {"X-Next-Cursor": encode_cursor(last["date"], last["id"])}
+
+
+async def _validators(cached: Any, kwargs: Dict[str, Any]) -> Dict[str, str]:
+    try:
+        return await conditional_headers(cached, kwargs)
+    except Exception as e:
+        logger.warning(f"Serving without ETag/Last-Modified: {e}")
+        return {}
+
+
 @app.get("/launches")
-def fetch_launches(
-    params: LaunchQueryParams = Depends(),
+async def fetch_launches(
+    request: Request,
+    response: Response,
+    params: LaunchListParams = Depends(),
 ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
-    logger.info(f"Fetching launches with params: {params}")
+    request_logger.info("Fetching launches with params: %s", params)
     try:
-        launches = get_launches(**params.model_dump(exclude_none=True))
-        logger.info(f"Fetched {len(launches)} launches successfully")
+        kwargs = params.model_dump(exclude_none=True)
+        validators = await _validators(get_launches, kwargs)
+        if is_not_modified(request.headers, validators):
+            return Response(
+                status_code=304,
+                headers=not_modified_headers(request.headers, validators),
+            )
+        if RESPONSE_CACHE_ENABLED:
+            return await cached_response(
+                get_launches,
+                kwargs,
+                request.headers.get("accept-encoding", ""),
+                headers=validators,
+                headers_for=partial(_next_cursor_header, limit=params.limit),
+            )
+        response.headers.update(validators)
+
+        launches = await get_launches(**kwargs)
+        request_logger.info("Fetched %d launches successfully", len(launches))
+        response.headers.update(_next_cursor_header(launches, params.limit))
         return launches
     except HTTPException as e:
         logger.warning(f"HTTPException while fetching launches: {e.detail}")
@@ -32,11 +117,31 @@ def fetch_launches(
 
 
 @app.get("/statistics")
-def fetch_statistics() -> Dict[str, Any]:
-    logger.info("Fetching launch statistics")
+async def fetch_statistics(
+    request: Request,
+    response: Response,
+    params: LaunchQueryParams = Depends(),
+) -> Dict[str, Any]:
+    request_logger.info("Fetching launch statistics with params: %s", params)
     try:
-        stats = get_all_statistics()
-        logger.info("Fetched statistics successfully")
+        kwargs = params.model_dump(exclude_none=True)
+        validators = await _validators(get_all_statistics, kwargs)
+        if is_not_modified(request.headers, validators):
+            return Response(
+                status_code=304,
+                headers=not_modified_headers(request.headers, validators),
+            )
+        if RESPONSE_CACHE_ENABLED:
+            return await cached_response(
+                get_all_statistics,
+                kwargs,
+                request.headers.get("accept-encoding", ""),
+                headers=validators,
+            )
+        response.headers.update(validators)
+
+        stats = await get_all_statistics(**kwargs)
+        request_logger.info("Fetched statistics successfully")
         return stats
     except HTTPException as e:
         logger.warning(f"HTTPException while fetching statistics: {e.detail}")
@@ -47,15 +152,19 @@ def fetch_statistics() -> Dict[str, Any]:
 
 
 @app.get("/launches/download")
-def download_launches(params: LaunchQueryParams = Depends()) -> JSONResponse:
-    logger.info(f"Downloading launches with params: {params}")
+def download_launches(
+    params: LaunchQueryParams = Depends(),
+    export_format: Literal["json", "ndjson", "csv"] = Query("json", alias="format"),
+) -> StreamingResponse:
+    logger.info(f"Downloading launches as {export_format} with params: {params}")
     try:
-        launches = get_launches(**params.dict(exclude_none=True))
-        logger.info(f"Downloaded {len(launches)} launches successfully")
-        return JSONResponse(
-            content=launches,
-            media_type="application/json",
-            headers={"Content-Disposition": "attachment; filename=launches.json"},
+        launches = iter_launches(**params.model_dump(exclude_none=True))
+        return StreamingResponse(
+            stream_launches(launches, export_format),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={
+                "Content-Disposition": f"attachment; filename=launches.{export_format}"
+            },
         )
     except Exception as e:
         logger.error(f"Error downloading launches: {e}", exc_info=True)
@@ -63,10 +172,10 @@ def download_launches(params: LaunchQueryParams = Depends()) -> JSONResponse:
 
 
 @app.get("/statistics/download")
-def download_statistics() -> JSONResponse:
-    logger.info("Downloading launch statistics")
+async def download_statistics(params: LaunchQueryParams = Depends()) -> JSONResponse:
+    logger.info(f"Downloading launch statistics with params: {params}")
     try:
-        stats = get_all_statistics()
+        stats = await get_all_statistics(**params.model_dump(exclude_none=True))
         logger.info("Downloaded statistics successfully")
         return JSONResponse(
             content=stats,
@@ -78,6 +187,25 @@ def download_statistics() -> JSONResponse:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    logger.info("Fetching cache stats")
+    return get_cache_stats()
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    metrics = list(REGISTRY)
+    try:
+        fields = await async_redis_client.hgetall(TASK_METRICS_KEY)
+        metrics.extend(
+            task_metrics({field.decode(): float(v) for field, v in fields.items()})
+        )
+    except Exception as e:
+        logger.warning(f"Serving metrics without Celery task totals: {e}")
+    return Response(render(metrics), media_type=CONTENT_TYPE)
+
+
 @app.get("/ui", response_class=HTMLResponse)
 def index(request: Request) -> Response:
     logger.info("Rendering UI page")
@@ -6,12 +6,13 @@ from celery import Celery
 from dotenv import load_dotenv
 from celery.schedules import timedelta
 
+from spacextracker.logger import make_formatter, queued
+
 load_dotenv()
 
-log_formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+log_formatter = make_formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
+os.makedirs("logs", exist_ok=True)
 file_handler = RotatingFileHandler(
     "logs/celery.log", maxBytes=5*1024*1024, backupCount=5
 )
@@ -21,7 +22,8 @@ file_handler.setLevel(logging.INFO)
 # Get Celery logger
 celery_logger = logging.getLogger("celery")
 celery_logger.setLevel(logging.INFO)
-celery_logger.addHandler(file_handler)
+# Rotation and writes happen on the listener thread, not in the task
+celery_logger.addHandler(queued(file_handler))
 
 
 REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
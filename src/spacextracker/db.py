@@ -1,7 +1,8 @@
 import os
 import redis
+import redis.asyncio as aioredis
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 
 load_dotenv()
 
@@ -15,6 +16,17 @@ db = client[DB_NAME]
 launches_collection = db["launch"]
 rockets_collection = db["rockets"]
 launchpads_collection = db["launchpads"]
+sync_state_collection = db["sync_state"]
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", 500))
+
+# Async clients used by the FastAPI request path
+async_client = AsyncMongoClient(MONGO_URI)
+async_db = async_client[DB_NAME]
+
+async_launches_collection = async_db["launch"]
+async_rockets_collection = async_db["rockets"]
+async_launchpads_collection = async_db["launchpads"]
+async_sync_state_collection = async_db["sync_state"]
 
 
 # Redis setup
@@ -24,4 +36,20 @@ REDIS_DB = int(os.getenv("REDIS_DB", 0))
 redis_client = redis.Redis(
     host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True
 )
+# Returns bytes, cached payloads are stored in a binary format
+async_redis_client = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
 CACHE_TTL = int(os.getenv("CACHE_TTL", 3600))
+# Per-process L1 cache in front of Redis; set L1_CACHE_MAX_ENTRIES=0 to disable
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", 256))
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+L1_CACHE_TTL = int(os.getenv("L1_CACHE_TTL", 30))
+# How long a process trusts its last read of the data version from Redis
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", 1))
+# Only one worker recomputes an expired key; others wait up to the wait time
+CACHE_LOCK_SECONDS = int(os.getenv("CACHE_LOCK_SECONDS", 30))
+CACHE_LOCK_WAIT_SECONDS = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", 5))
+# Cached results older than this are served while refreshed in the background
+CACHE_SOFT_TTL = int(os.getenv("CACHE_SOFT_TTL", 300))
+# Format of cached payloads ('msgpack' or 'json'), compressed above the size
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 16 * 1024))
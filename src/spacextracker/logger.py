@@ -1,11 +1,171 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Tuple
 
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,  # or DEBUG
-    format="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _parse_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+# 'text', or 'json' for one JSON object per line
+LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+# Write records from a background thread instead of the logging thread
+LOG_QUEUE: bool = os.getenv("LOG_QUEUE", "true").lower() == "true"
+# Fraction of INFO and DEBUG records kept per sampled logger (see
+# sampled_logger), e.g. "spacextracker.cache=0.01,spacextracker.requests=0.1"
+LOG_SAMPLE_RATES: Dict[str, float] = _parse_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+TEXT_FORMAT = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    [*logging.makeLogRecord({}).__dict__, "message", "asctime", "taskName"]
 )
 
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, including ``extra`` fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def make_formatter(fmt: str = TEXT_FORMAT) -> logging.Formatter:
+    return JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(fmt)
+
+
+class SampledLogger(logging.LoggerAdapter):
+    """
+    Logger keeping a fraction of its INFO and DEBUG records.
+
+    Records are dropped before they are created, so a dropped call costs
+    about as much as a disabled level. Warnings and errors are always kept.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float = 1.0) -> None:
+        super().__init__(logger, {})
+        self.rate = rate
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level < logging.WARNING and random.random() >= self.rate:
+            return False
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg: Any, kwargs: Any) -> Tuple[Any, Any]:
+        return msg, kwargs
+
+
+def sampled_logger(name: str) -> SampledLogger:
+    """
+    Get a logger for high-frequency events, sampled at LOG_SAMPLE_RATES[name].
+    """
+    return SampledLogger(logging.getLogger(name), LOG_SAMPLE_RATES.get(name, 1.0))
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue records unformatted, so the listener thread formats them.
+
+    Arguments are formatted after the call returns, so only pass values that
+    are not modified afterwards.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_pipelines: List[Tuple[DeferredQueueHandler, logging.Handler]] = []
+_listeners: Dict[DeferredQueueHandler, QueueListener] = {}
+
+
+def _listen(handler: DeferredQueueHandler, target: logging.Handler) -> None:
+    listener = QueueListener(handler.queue, target, respect_handler_level=True)
+    listener.start()
+    _listeners[handler] = listener
+
+
+def queued(target: logging.Handler) -> logging.Handler:
+    """
+    Wrap a handler so its I/O happens on a background listener thread.
+
+    Returns the handler itself when LOG_QUEUE is disabled.
+    """
+    if not LOG_QUEUE:
+        return target
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.setLevel(target.level)
+    _listen(handler, target)
+    _pipelines.append((handler, target))
+    return handler
+
+
+def _stop_listeners() -> None:
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
+def _restart_listeners() -> None:
+    # Threads do not survive fork (Celery prefork workers), so each child
+    # needs its own queues and listeners
+    _listeners.clear()
+    for handler, target in _pipelines:
+        handler.queue = queue.SimpleQueue()
+        _listen(handler, target)
+
+
+atexit.register(_stop_listeners)
+os.register_at_fork(after_in_child=_restart_listeners)
+
+
+def configure_logging() -> None:
+    """
+    Send root logger records through a queue to stderr, unless the root
+    logger already has handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    stream = logging.StreamHandler()
+    stream.setFormatter(make_formatter())
+    root.addHandler(queued(stream))
+    root.setLevel(LOG_LEVEL)
+
+
+configure_logging()
+
 # Use the root logger or get a named one
 logger = logging.getLogger("spacextracker")
-logger.setLevel(logging.INFO)
+logger.setLevel(LOG_LEVEL)
+# High-frequency events, logged separately so they can be sampled
+cache_logger = sampled_logger("spacextracker.cache")
+request_logger = sampled_logger("spacextracker.requests")
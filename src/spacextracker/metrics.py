@@ -0,0 +1,343 @@
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Metrics are kept in plain lists keyed by label values and updated without
+# locks. Hot paths bind label values once with ``labels()``, so recording an
+# event is a single addition (see benchmarks/metrics_overhead.py). Concurrent
+# updates from several threads can occasionally lose an increment, which is
+# acceptable for monitoring.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Celery task totals are shared with the API processes through this Redis hash
+TASK_METRICS_KEY = "metrics:celery"
+
+# Methods labeled as themselves, the others share the 'other' label
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE")
+)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, str, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base of the metric types, rendered in the Prometheus text format.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        registry: Optional[List["Metric"]] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        if registry is not None:
+            registry.append(self)
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(
+            f"{name}{labels} {value!r}" for name, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+REGISTRY: List[Metric] = []
+
+
+class Child:
+    """
+    A counter or gauge bound to fixed label values, for the hot path.
+    """
+
+    __slots__ = ("_cell",)
+
+    def __init__(self, cell: List[float]) -> None:
+        self._cell = cell
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._cell[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._cell[0] -= amount
+
+    def set(self, value: float) -> None:
+        self._cell[0] = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def _cell(self, labels: LabelValues) -> List[float]:
+        cell = self._values.get(labels)
+        if cell is None:
+            cell = self._values[labels] = [0.0]
+        return cell
+
+    def labels(self, *labels: str) -> Child:
+        return Child(self._cell(labels))
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._cell(labels)[0] += amount
+
+    def samples(self) -> Iterator[Sample]:
+        for values, cell in list(self._values.items()):
+            yield self.name, _labels(self.labelnames, values), float(cell[0])
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._cell(labels)[0] -= amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._cell(labels)[0] = value
+
+
+class HistogramChild:
+    """
+    A histogram bound to fixed label values, for the hot path.
+    """
+
+    __slots__ = ("_buckets", "_series")
+
+    def __init__(self, buckets: Tuple[float, ...], series: List[float]) -> None:
+        self._buckets = buckets
+        self._series = series
+
+    def observe(self, value: float) -> None:
+        series = self._series
+        series[bisect_left(self._buckets, value)] += 1
+        series[-1] += value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, *args: Any, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: a count per bucket, then +Inf, then the sum
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def _get(self, labels: LabelValues) -> List[float]:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        return series
+
+    def labels(self, *labels: str) -> HistogramChild:
+        return HistogramChild(self.buckets, self._get(labels))
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._get(labels)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterator[Sample]:
+        for values, series in list(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                labels = _labels(self.labelnames, values, f'le="{bound}"')
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _labels(self.labelnames, values)
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+def render(metrics: List[Metric]) -> str:
+    """
+    Render metrics in the Prometheus text exposition format.
+    """
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "spacextracker_http_requests_total",
+    "HTTP requests by route and status.",
+    ("method", "route", "status"),
+    registry=REGISTRY,
+)
+HTTP_DURATION = Histogram(
+    "spacextracker_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route"),
+    registry=REGISTRY,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "spacextracker_http_requests_in_flight",
+    "HTTP requests being served by route.",
+    ("route",),
+    registry=REGISTRY,
+)
+CACHE_HITS = Counter(
+    "spacextracker_cache_hits_total",
+    "redis_cache hits by function and tier (l1 or redis).",
+    ("function", "tier"),
+    registry=REGISTRY,
+)
+CACHE_MISSES = Counter(
+    "spacextracker_cache_misses_total",
+    "redis_cache misses by function.",
+    ("function",),
+    registry=REGISTRY,
+)
+CACHE_ERRORS = Counter(
+    "spacextracker_cache_errors_total",
+    "Redis errors in redis_cache by function.",
+    ("function",),
+    registry=REGISTRY,
+)
+MONGO_DURATION = Histogram(
+    "spacextracker_mongo_query_duration_seconds",
+    "MongoDB query duration on the request path by operation.",
+    ("operation",),
+    registry=REGISTRY,
+)
+
+
+def _task_metrics() -> Tuple[Histogram, Counter, Counter]:
+    return (
+        Histogram(
+            "spacextracker_celery_task_duration_seconds",
+            "Celery task run time.",
+            ("task",),
+            buckets=TASK_BUCKETS,
+        ),
+        Counter(
+            "spacextracker_celery_task_processed_total",
+            "Launches processed by Celery tasks.",
+            ("task",),
+        ),
+        Counter(
+            "spacextracker_celery_task_failures_total",
+            "Failed Celery task runs.",
+            ("task",),
+        ),
+    )
+
+
+def record_task(
+    redis_client: Any, task: str, duration: float, processed: int, failed: bool
+) -> None:
+    """
+    Add a Celery task run to the totals kept in Redis.
+
+    Workers run in their own processes, so they add their events to a Redis
+    hash that every API process exports on /metrics.
+
+    Args:
+        redis_client (Any): Synchronous Redis client of the worker.
+        task (str): Task name.
+        duration (float): Run time in seconds.
+        processed (int): Launches processed by the run.
+        failed (bool): Whether the run raised.
+    """
+    bucket = bisect_left(TASK_BUCKETS, duration)
+    with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hincrbyfloat(TASK_METRICS_KEY, f"duration:{task}:{bucket}", 1)
+        pipe.hincrbyfloat(TASK_METRICS_KEY, f"duration_sum:{task}", duration)
+        pipe.hincrbyfloat(TASK_METRICS_KEY, f"processed:{task}", processed)
+        pipe.hincrbyfloat(TASK_METRICS_KEY, f"failures:{task}", int(failed))
+        pipe.execute()
+
+
+def task_metrics(fields: Dict[str, float]) -> List[Metric]:
+    """
+    Rebuild the Celery task metrics from the totals written by ``record_task``.
+    """
+    duration, processed, failures = _task_metrics()
+    for field, value in fields.items():
+        kind, task, *bucket = field.split(":")
+        if kind == "duration":
+            duration._get((task,))[int(bucket[0])] = value
+        elif kind == "duration_sum":
+            duration._get((task,))[-1] = value
+        elif kind == "processed":
+            processed.inc(task, amount=value)
+        elif kind == "failures":
+            failures.inc(task, amount=value)
+    return [duration, processed, failures]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight requests by route.
+
+    Routes are labeled by their path, and unknown paths and methods share the
+    'other' label so clients cannot create new series.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]) -> None:
+        self.app = app
+        self._routes: Optional[frozenset] = None
+        self._bound: Dict[Tuple[str, str], Tuple[Child, HistogramChild]] = {}
+
+    def _metrics_for(self, method: str, route: str) -> Tuple[Child, HistogramChild]:
+        bound = self._bound.get((method, route))
+        if bound is None:
+            bound = self._bound[(method, route)] = (
+                HTTP_IN_FLIGHT.labels(route),
+                HTTP_DURATION.labels(method, route),
+            )
+        return bound
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._routes is None:
+            self._routes = frozenset(route.path for route in scope["app"].routes)
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+        route = scope["path"] if scope["path"] in self._routes else "other"
+        in_flight, duration = self._metrics_for(method, route)
+        status = 500
+
+        async def send_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            duration.observe(time.perf_counter() - started)
+            HTTP_REQUESTS.inc(method, route, str(status))
+            in_flight.dec()
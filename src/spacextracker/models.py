@@ -1,6 +1,6 @@
 from datetime import datetime, date
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any
 from fastapi import HTTPException
 
 
@@ -48,3 +48,15 @@ class LaunchQueryParams(BaseModel):
                 status_code=422, detail="start_date must be before or equal to end_date"
             )
         return self
+
+
+class LaunchListParams(LaunchQueryParams):
+    """
+    Query parameters for filtering and paging through launches.
+    """
+
+    limit: int = Field(100, ge=1, le=1000, description="Maximum launches per page")
+    sort: Literal["asc", "desc"] = Field("asc", description="Sort order by date")
+    cursor: Optional[str] = Field(
+        None, description="Opaque cursor from the X-Next-Cursor header of a page"
+    )
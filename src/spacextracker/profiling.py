@@ -0,0 +1,217 @@
+import cProfile
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Union
+from uuid import uuid4
+
+from spacextracker.logger import logger
+
+# Requests sending this token in the X-Profile header are profiled
+PROFILE_TOKEN: str = os.getenv("PROFILE_TOKEN", "")
+# Fraction of requests and Celery task runs profiled without asking
+PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+# 'collapsed' stacks for flamegraph tools, or 'pstats' from cProfile
+PROFILE_FORMAT: str = os.getenv("PROFILE_FORMAT", "collapsed")
+PROFILE_INTERVAL: float = float(os.getenv("PROFILE_INTERVAL", 0.001))
+PROFILE_PATHS = frozenset(
+    os.getenv("PROFILE_PATHS", "/launches,/statistics").split(",")
+)
+PROFILING_ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+PROFILE_HEADER = b"x-profile"
+
+# Only one profile is captured at a time per process; profilers cannot be
+# stacked, and requests selected meanwhile are served unprofiled
+_capturing = threading.Lock()
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread at a fixed interval.
+
+    Output is in the collapsed format read by flamegraph.pl, speedscope and
+    similar tools: one ``frame;frame;...;leaf count`` line per distinct stack.
+    Code running on the thread is not slowed down beyond the GIL handoffs.
+    """
+
+    suffix = "collapsed"
+
+    def __init__(self, interval: float = PROFILE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+class CallProfiler:
+    """
+    Deterministic cProfile capture of one thread, written as pstats.
+    """
+
+    suffix = "prof"
+
+    def __init__(self) -> None:
+        self.profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profiler.enable()
+
+    def stop(self) -> None:
+        self.profiler.disable()
+
+    def write(self, path: str) -> None:
+        self.profiler.dump_stats(path)
+
+
+Capture = Union[StackSampler, CallProfiler]
+
+
+def sampled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def start_capture(fmt: str = PROFILE_FORMAT) -> Optional[Capture]:
+    """
+    Start profiling the current thread, or return None if a profile is
+    already being captured.
+    """
+    if not _capturing.acquire(blocking=False):
+        return None
+    try:
+        capture: Capture = CallProfiler() if fmt == "pstats" else StackSampler()
+        capture.start()
+    except Exception:
+        _capturing.release()
+        raise
+    return capture
+
+
+def profile_path(name: str, capture: Capture) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    slug = name.strip("/").replace("/", "_") or "root"
+    return os.path.join(
+        PROFILE_DIR, f"{stamp}-{slug}-{uuid4().hex[:8]}.{capture.suffix}"
+    )
+
+
+def finish_capture(capture: Capture, path: str) -> None:
+    """
+    Stop a capture started by ``start_capture`` and write it to ``path``.
+    """
+    try:
+        capture.stop()
+    finally:
+        _capturing.release()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    capture.write(path)
+    logger.info(f"Wrote profile {path}")
+
+
+@contextmanager
+def profile_run(name: str, force: bool = False) -> Iterator[Optional[str]]:
+    """
+    Profile a block of blocking code, such as a Celery task run.
+
+    Args:
+        name (str): Name used in the profile file name.
+        force (bool): Profile regardless of PROFILE_SAMPLE_RATE.
+
+    Yields:
+        Optional[str]: Path the profile is written to, None if not profiling.
+    """
+    capture = start_capture() if force or sampled() else None
+    if capture is None:
+        yield None
+        return
+    path = profile_path(name, capture)
+    started = time.perf_counter()
+    try:
+        yield path
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Profiled {name} for {elapsed_ms:.0f} ms")
+        finish_capture(capture, path)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests to PROFILE_PATHS.
+
+    A request is selected when its X-Profile header carries PROFILE_TOKEN, or
+    at random with PROFILE_SAMPLE_RATE. The profile file name is returned in
+    an X-Profile-File response header. Only add it when PROFILING_ENABLED, so
+    it costs nothing by default.
+
+    The event loop thread is profiled, so work of concurrent requests shows up
+    in the profile as well.
+    """
+
+    def __init__(
+        self, app: Callable[..., Awaitable[None]], token: str = PROFILE_TOKEN
+    ) -> None:
+        self.app = app
+        self.token = token.encode()
+
+    def _selected(self, scope: Dict[str, Any]) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return sampled()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] not in PROFILE_PATHS
+            or not self._selected(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+        capture = start_capture()
+        if capture is None:
+            await self.app(scope, receive, send)
+            return
+        path = profile_path(scope["path"], capture)
+
+        async def send_with_header(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                header = (b"x-profile-file", os.path.basename(path).encode())
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            finish_capture(capture, path)
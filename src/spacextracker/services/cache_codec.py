@@ -0,0 +1,106 @@
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict
+
+import msgpack
+
+from spacextracker.db import CACHE_CODEC, CACHE_COMPRESS_MIN_BYTES
+
+# msgpack extension type for datetimes, stored as ISO 8601 text. Unlike the
+# built-in Timestamp type this keeps naive datetimes (what MongoDB returns)
+# naive and is cheaper to decode.
+DATETIME_EXT = 1
+
+# First byte of every stored payload
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+class JsonCodec:
+    """
+    The original text format. Datetimes come back as strings.
+    """
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(DATETIME_EXT, value.isoformat().encode())
+    return str(value)
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == DATETIME_EXT:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec:
+    """
+    Compact binary format that round-trips naive and aware datetimes and
+    non-string map keys, such as the years of the launch frequency.
+    """
+
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_msgpack_default)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, strict_map_key=False)
+
+
+class CompressedCodec:
+    """
+    Wrap a codec to zlib-compress payloads of at least ``min_size`` bytes.
+
+    Every payload starts with a one-byte header telling whether it is
+    compressed, so the threshold can change without invalidating entries.
+    """
+
+    def __init__(self, codec: Any, min_size: int = CACHE_COMPRESS_MIN_BYTES) -> None:
+        self.codec = codec
+        self.min_size = min_size
+        self.name = codec.name
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.codec.dumps(value)
+        if self.min_size and len(data) >= self.min_size:
+            return _ZLIB + zlib.compress(data, 1)
+        return _RAW + data
+
+    def loads(self, data: bytes) -> Any:
+        header, body = data[:1], data[1:]
+        if header == _ZLIB:
+            return self.codec.loads(zlib.decompress(body))
+        if header == _RAW:
+            return self.codec.loads(body)
+        raise ValueError("Unknown cache payload header")
+
+
+CODECS: Dict[str, Any] = {"json": JsonCodec(), "msgpack": MsgpackCodec()}
+
+
+def get_codec(name: str = CACHE_CODEC) -> CompressedCodec:
+    """
+    Build the codec used for cached payloads.
+
+    Args:
+        name (str): One of 'msgpack' or 'json'.
+
+    Returns:
+        CompressedCodec: The named codec with compression above
+        CACHE_COMPRESS_MIN_BYTES.
+    """
+    try:
+        return CompressedCodec(CODECS[name])
+    except KeyError:
+        raise ValueError(f"Unknown cache codec {name!r}") from None
@@ -1,59 +1,583 @@
+import asyncio
+import inspect
 import json
 import functools
-from hashlib import sha256
-from typing import Callable, TypeVar, ParamSpec
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from hashlib import blake2b
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+    TypeVar,
+    ParamSpec,
+)
+from uuid import uuid4
 
-from spacextracker.db import redis_client, CACHE_TTL
-from spacextracker.logger import logger  # import your logger
+from spacextracker.db import (
+    async_redis_client,
+    redis_client,
+    CACHE_LOCK_SECONDS,
+    CACHE_LOCK_WAIT_SECONDS,
+    CACHE_TTL,
+    DATA_VERSION_CHECK_SECONDS,
+    L1_CACHE_MAX_BYTES,
+    L1_CACHE_MAX_ENTRIES,
+    L1_CACHE_TTL,
+)
+from spacextracker.logger import cache_logger, logger  # import your logger
+from spacextracker.metrics import CACHE_ERRORS, CACHE_HITS, CACHE_MISSES
+from spacextracker.services.cache_codec import CompressedCodec, get_codec
 
 P = ParamSpec("P")
 R = TypeVar("R")
 
+# Maps (func, args, kwargs) to a JSON-serializable description of the call
+KeyNormalizer = Callable[[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]], Any]
 
-def redis_cache(ttl: int = CACHE_TTL) -> Callable[[Callable[P, R]], Callable[P, R]]:
+DATA_VERSION_KEY = "cache:data_version"
+DATA_UPDATED_AT_KEY = "cache:data_updated_at"
+
+CACHE_LOCK_POLL_SECONDS = 0.05
+
+_MISSING = object()
+
+# Deletes the recompute lock only if it is still held by the caller's token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LocalCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Entries are evicted least recently used first once either the entry count
+    or the total size exceeds its limit. Sizes are the length of the cached
+    payload as stored in Redis, which is a good enough proxy for memory use.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl > 0
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        """
+        Return the cached value for ``key``, or ``default``.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        """
+        Store ``value`` under ``key``, evicting old entries to stay in bounds.
+        """
+        if not self.enabled or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+
+
+cache_codec = get_codec()
+local_cache = LocalCache(L1_CACHE_MAX_ENTRIES, L1_CACHE_MAX_BYTES, L1_CACHE_TTL)
+redis_stats = {
+    "hits": 0,
+    "misses": 0,
+    "errors": 0,
+    "coalesced": 0,
+    "lock_waits": 0,
+    "stale": 0,
+    "refreshes": 0,
+}
+# Misses currently being computed and stale entries being refreshed in this
+# process, by cache key
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+_refreshing: Dict[str, "asyncio.Future[None]"] = {}
+_data_version: Dict[str, Any] = {"value": 0, "checked_at": None}
+_data_updated_at: Dict[str, Any] = {"value": None, "checked_at": None}
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Report hit, miss and eviction counters of both cache tiers.
+
+    Counters are per process and reset on restart.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Stats under the keys 'l1' and 'redis'.
+    """
+    return {"l1": local_cache.stats(), "redis": dict(redis_stats)}
+
+
+def bump_data_version() -> int:
+    """
+    Invalidate every cached result by moving to a new data version.
+
+    Called after an ingest that changed stored data. Entries cached under older
+    versions are never read again and simply expire with their TTL. The time
+    of the change is recorded alongside, for Last-Modified headers.
+
+    Returns:
+        int: The new data version.
+    """
+    pipeline = redis_client.pipeline()
+    pipeline.incr(DATA_VERSION_KEY)
+    pipeline.set(DATA_UPDATED_AT_KEY, time.time())
+    version, _ = pipeline.execute()
+    logger.info(f"Bumped cache data version to {version}")
+    return version
+
+
+async def get_data_version() -> int:
+    """
+    Read the current data version folded into every cache key.
+
+    The value is re-read from Redis at most every DATA_VERSION_CHECK_SECONDS,
+    which bounds how long a process keeps serving results cached before an
+    ingest, including from its L1 cache.
+
+    Returns:
+        int: Current data version, 0 if no ingest has bumped it yet.
+    """
+    now = time.monotonic()
+    checked_at = _data_version["checked_at"]
+    if checked_at is None or now - checked_at >= DATA_VERSION_CHECK_SECONDS:
+        stored = await async_redis_client.get(DATA_VERSION_KEY)
+        _data_version["value"] = int(stored or 0)
+        _data_version["checked_at"] = now
+    return _data_version["value"]
+
+
+async def get_data_updated_at() -> Optional[datetime]:
+    """
+    Read when an ingest last changed the data, re-read like the data version.
+
+    Returns:
+        Optional[datetime]: Time of the last data version bump in UTC, or None
+        if it was never bumped.
+    """
+    now = time.monotonic()
+    checked_at = _data_updated_at["checked_at"]
+    if checked_at is None or now - checked_at >= DATA_VERSION_CHECK_SECONDS:
+        stored = await async_redis_client.get(DATA_UPDATED_AT_KEY)
+        _data_updated_at["value"] = (
+            datetime.fromtimestamp(float(stored), timezone.utc) if stored else None
+        )
+        _data_updated_at["checked_at"] = now
+    return _data_updated_at["value"]
+
+
+async def _try_lock(lock_key: str, token: str, name: str) -> bool:
+    """
+    Try to take the short Redis lock that elects the worker recomputing a key.
+
+    Fails open: if Redis cannot be reached the caller computes the value itself.
+    """
+    try:
+        return bool(
+            await async_redis_client.set(
+                lock_key, token, nx=True, ex=CACHE_LOCK_SECONDS
+            )
+        )
+    except Exception as e:
+        redis_stats["errors"] += 1
+        CACHE_ERRORS.inc(name)
+        logger.error(f"Redis lock error for {lock_key}: {e}", exc_info=True)
+        return True
+
+
+async def _release_lock(lock_key: str, token: str, name: str) -> None:
+    try:
+        await async_redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+    except Exception as e:
+        redis_stats["errors"] += 1
+        CACHE_ERRORS.inc(name)
+        logger.error(f"Redis lock error for {lock_key}: {e}", exc_info=True)
+
+
+async def _wait_for_value(cache_key: str, name: str) -> Optional[bytes]:
     """
-    Cache function results in Redis for a given TTL.
+    Poll Redis for a value another worker is computing, up to
+    CACHE_LOCK_WAIT_SECONDS.
+    """
+    redis_stats["lock_waits"] += 1
+    deadline = time.monotonic() + CACHE_LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(CACHE_LOCK_POLL_SECONDS)
+        try:
+            cached_data = await async_redis_client.get(cache_key)
+        except Exception as e:
+            redis_stats["errors"] += 1
+            CACHE_ERRORS.inc(name)
+            logger.error(f"Redis caching error for {cache_key}: {e}", exc_info=True)
+            return None
+        if cached_data:
+            return cached_data
+    return None
+
+
+def _encode_entry(value: Any, compute_ms: float, codec: CompressedCodec) -> bytes:
+    """
+    Wrap a result with the time it was generated and how long it took.
+    """
+    entry = {
+        "value": value,
+        "generated_at": time.time(),
+        "compute_ms": round(compute_ms, 1),
+    }
+    return codec.dumps(entry)
+
+
+def _decode_entry(
+    cached_data: bytes, codec: CompressedCodec
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse a cached entry, returning None for anything not written by
+    ``_encode_entry`` with the same codec so it is treated as a miss.
+    """
+    try:
+        entry = codec.loads(cached_data)
+    except Exception as e:
+        logger.warning(f"Ignoring undecodable cache entry: {e}")
+        return None
+    if isinstance(entry, dict) and "value" in entry and "generated_at" in entry:
+        return entry
+    return None
+
+
+async def _load(
+    func: Callable[..., Awaitable[Any]],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cache_key: str,
+    ttl: int,
+    local: bool,
+    codec: CompressedCodec,
+    wait: bool = True,
+) -> Any:
+    """
+    Compute a cache entry, letting only one worker do it at a time.
+
+    The worker holding the Redis lock calls ``func`` and stores the result.
+    Other workers wait for that result to show up in Redis and only compute it
+    themselves if it does not arrive in time. With ``wait`` disabled they give
+    up right away and None is returned.
+    """
+    lock_key = f"lock:{cache_key}"
+    token = uuid4().hex
+    locked = await _try_lock(lock_key, token, func.__name__)
+    if not locked:
+        if not wait:
+            return None
+        cached_data = await _wait_for_value(cache_key, func.__name__)
+        entry = _decode_entry(cached_data, codec) if cached_data else None
+        if entry is not None:
+            if local:
+                local_cache.set(cache_key, entry["value"], len(cached_data))
+            return entry["value"]
+        logger.warning(f"Timed out waiting for {cache_key}, computing it here")
+
+    try:
+        cache_logger.info("Computing %s result for %s", func.__name__, cache_key)
+        started = time.perf_counter()
+        result = await func(*args, **kwargs)
+        compute_ms = (time.perf_counter() - started) * 1000
+        payload = _encode_entry(result, compute_ms, codec)
+        if local:
+            local_cache.set(cache_key, result, len(payload))
+
+        try:
+            await async_redis_client.setex(cache_key, ttl, payload)
+            cache_logger.info("Stored result in cache with key %s", cache_key)
+        except Exception as e:
+            redis_stats["errors"] += 1
+            CACHE_ERRORS.inc(func.__name__)
+            logger.error(f"Redis caching error for {func.__name__}: {e}", exc_info=True)
+        return result
+    finally:
+        if locked:
+            await _release_lock(lock_key, token, func.__name__)
+
+
+async def _refresh(
+    func: Callable[..., Awaitable[Any]],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    cache_key: str,
+    ttl: int,
+    local: bool,
+    codec: CompressedCodec,
+) -> None:
+    try:
+        await _load(func, args, kwargs, cache_key, ttl, local, codec, wait=False)
+    except Exception as e:
+        logger.error(f"Background refresh of {cache_key} failed: {e}", exc_info=True)
+
+
+def raw_arguments(
+    func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Default key normalizer: arguments exactly as passed.
+    """
+    return {"args": args, "kwargs": kwargs}
+
+
+_signature = functools.lru_cache(maxsize=None)(inspect.signature)
+
+
+def _canonical_value(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value).isoformat()
+        except ValueError:
+            return value
+    return value
+
+
+def canonical_arguments(lowercase: Iterable[str] = ()) -> KeyNormalizer:
+    """
+    Build a key normalizer under which equivalent calls share a cache entry.
+
+    Arguments are bound to the function signature, so positional and keyword
+    calls match, and arguments equal to their default are dropped. Dates and
+    ISO date strings are keyed by their ISO form, and the named arguments are
+    lowercased.
+
+    Args:
+        lowercase (Iterable[str]): Names of case-insensitive string arguments.
+
+    Returns:
+        KeyNormalizer: Normalizer to pass to ``redis_cache``.
+    """
+    lowercase = frozenset(lowercase)
+
+    def normalize(
+        func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        signature = _signature(func)
+        bound = signature.bind(*args, **kwargs)
+        key = {}
+        for name, value in bound.arguments.items():
+            if value == signature.parameters[name].default:
+                continue
+            if name in lowercase and isinstance(value, str):
+                value = value.lower()
+            key[name] = _canonical_value(value)
+        return key
+
+    return normalize
+
+
+def redis_cache(
+    ttl: int = CACHE_TTL,
+    local: bool = False,
+    soft_ttl: Optional[int] = None,
+    codec: Optional[CompressedCodec] = None,
+    key_normalizer: KeyNormalizer = raw_arguments,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """
+    Cache async function results in Redis for a given TTL.
+
+    Cache keys include the current data version, so results are invalidated as
+    soon as an ingest changes the data, independently of the TTL.
+
+    Misses are single-flight: identical concurrent calls in a process share one
+    in-flight computation, and a short Redis lock lets only one process
+    recompute a key while the others wait for its result.
+
+    With ``soft_ttl`` set, entries older than it are still served, but trigger
+    a background refresh (stale-while-revalidate), so callers only wait for
+    ``func`` when an entry is missing or past the hard ``ttl``. Entries record
+    when they were generated and how long ``func`` took.
+
+    With ``local`` enabled, results are also kept in the per-process L1 cache,
+    which serves hits without a Redis round trip or JSON decoding. Its entries
+    expire after L1_CACHE_TTL and are keyed by data version like Redis ones.
+
+    Keys are ``cache:v<data version>:<function>:<digest>``, where the digest is
+    taken over what ``key_normalizer`` returns for the call. The version-less
+    part is available as ``wrapper.cache_key(*args, **kwargs)``, and
+    ``wrapper.refresh(*args, **kwargs)`` refreshes an entry on demand, for
+    caches derived from it.
 
     Args:
         ttl (int): Cache time-to-live in seconds.
+        local (bool): Also cache results in the in-process L1 cache.
+        soft_ttl (Optional[int]): Age in seconds after which entries are
+            refreshed in the background.
+        codec (Optional[CompressedCodec]): Payload format, defaults to the one
+            configured by CACHE_CODEC.
+        key_normalizer (KeyNormalizer): Describes a call for its cache key, see
+            ``canonical_arguments``.
 
     Returns:
-        Callable: Decorated function with Redis caching.
+        Callable: Decorated coroutine function with Redis caching.
     """
 
-    def decorator(func: Callable[P, R]) -> Callable[P, R]:
-        @functools.wraps(func)
-        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-            # Create a unique cache key
-            key_raw = {"func": func.__name__, "args": args, "kwargs": kwargs}
-            key_str = json.dumps(key_raw, sort_keys=True, default=str)
-            cache_key = f"cache:{sha256(key_str.encode()).hexdigest()}"
+    codec = codec or cache_codec
 
-            try:
-                # Try Redis cache
-                cached_data = redis_client.get(cache_key)
-                if cached_data:
-                    logger.info(f"Cache hit for {func.__name__} with key {cache_key}")
-                    return json.loads(cached_data)
-
-                logger.info(
-                    f"Cache miss for {func.__name__} → calling original function"
-                )
-                # Call the original function
-                result = func(*args, **kwargs)
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        l1_hits = CACHE_HITS.labels(func.__name__, "l1")
+        redis_hits = CACHE_HITS.labels(func.__name__, "redis")
+        misses = CACHE_MISSES.labels(func.__name__)
+        errors = CACHE_ERRORS.labels(func.__name__)
 
-                # Store in Redis
-                redis_client.setex(cache_key, ttl, json.dumps(result, default=str))
-                logger.info(f"Stored result in cache with key {cache_key}")
-                return result
+        def key_for(*args: Any, **kwargs: Any) -> str:
+            key_str = json.dumps(
+                key_normalizer(func, args, kwargs), sort_keys=True, default=str
+            )
+            digest = blake2b(key_str.encode(), digest_size=12).hexdigest()
+            return f"{func.__name__}:{digest}"
 
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            key_hash = key_for(*args, **kwargs)
+
+            try:
+                # Try Redis cache for the current data version
+                version = await get_data_version()
+                cache_key = f"cache:v{version}:{key_hash}"
+                if local:
+                    value = local_cache.get(cache_key)
+                    if value is not _MISSING:
+                        l1_hits.inc()
+                        return value
+                cached_data = await async_redis_client.get(cache_key)
             except Exception as e:
+                redis_stats["errors"] += 1
+                errors.inc()
                 logger.error(
                     f"Redis caching error for {func.__name__}: {e}", exc_info=True
                 )
                 # Fallback to calling the original function if Redis fails
-                return func(*args, **kwargs)
+                return await func(*args, **kwargs)
+
+            entry = _decode_entry(cached_data, codec) if cached_data else None
+            if entry is not None:
+                redis_stats["hits"] += 1
+                redis_hits.inc()
+                cache_logger.info(
+                    "Cache hit for %s with key %s", func.__name__, cache_key
+                )
+                result = entry["value"]
+                if local:
+                    local_cache.set(cache_key, result, len(cached_data))
+                age = time.time() - entry["generated_at"]
+                if soft_ttl is not None and age >= soft_ttl:
+                    redis_stats["stale"] += 1
+                    if cache_key not in _refreshing:
+                        redis_stats["refreshes"] += 1
+                        cache_logger.info(
+                            "Refreshing %s in the background, "
+                            "served a %.0fs old result",
+                            cache_key,
+                            age,
+                        )
+                        task = asyncio.ensure_future(
+                            _refresh(func, args, kwargs, cache_key, ttl, local, codec)
+                        )
+                        _refreshing[cache_key] = task
+                        task.add_done_callback(
+                            lambda _: _refreshing.pop(cache_key, None)
+                        )
+                return result
+
+            redis_stats["misses"] += 1
+            misses.inc()
+            cache_logger.info(
+                "Cache miss for %s → calling original function", func.__name__
+            )
+            task = _inflight.get(cache_key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    _load(func, args, kwargs, cache_key, ttl, local, codec)
+                )
+                _inflight[cache_key] = task
+                task.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+            else:
+                redis_stats["coalesced"] += 1
+            # Shielded so one caller going away does not cancel it for the others
+            return await asyncio.shield(task)
+
+        async def refresh(*args: Any, **kwargs: Any) -> Optional[R]:
+            """
+            Get a result younger than ``soft_ttl``, recomputing and storing it
+            under the Redis lock unless the cached one is. Returns None if
+            another worker is recomputing it.
+            """
+            version = await get_data_version()
+            cache_key = f"cache:v{version}:{key_for(*args, **kwargs)}"
+            cached_data = await async_redis_client.get(cache_key)
+            entry = _decode_entry(cached_data, codec) if cached_data else None
+            if entry is not None and soft_ttl is not None:
+                if time.time() - entry["generated_at"] < soft_ttl:
+                    return entry["value"]
+            return await _load(
+                func, args, kwargs, cache_key, ttl, local, codec, wait=False
+            )
 
+        wrapper.cache_key = key_for  # type: ignore[attr-defined]
+        wrapper.refresh = refresh  # type: ignore[attr-defined]
+        wrapper.soft_ttl = soft_ttl  # type: ignore[attr-defined]
         return wrapper
 
     return decorator
@@ -1,57 +1,152 @@
-from collections import defaultdict
-from typing import Any, Dict, List, Optional
+import asyncio
+import itertools
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
 from fastapi import HTTPException
-from spacextracker.services.utils import to_datetime
-from spacextracker.services.cache_service import redis_cache
-from spacextracker.services.store_to_db import update_launches_in_db
+from pymongo import ASCENDING, DESCENDING
+from spacextracker.services.utils import decode_cursor, to_datetime
+from spacextracker.services.cache_service import canonical_arguments, redis_cache
+from spacextracker.services.seeding import ensure_seeded
 from spacextracker.db import (
     launches_collection,
-    rockets_collection,
-    launchpads_collection,
+    async_launches_collection,
+    async_rockets_collection,
+    async_launchpads_collection,
+    CACHE_SOFT_TTL,
     CACHE_TTL,
 )
 from spacextracker.logger import logger
+from spacextracker.metrics import MONGO_DURATION
+from spacextracker.models import LaunchListParams, LaunchQueryParams
 
+EXPORT_BATCH_SIZE = 500
 
-@redis_cache(ttl=CACHE_TTL)
-def get_launches(
+# Query timings by operation, bound once for the request path
+_find_launches_duration = MONGO_DURATION.labels("find_launches")
+_export_launches_duration = MONGO_DURATION.labels("export_launches")
+_launch_frequency_duration = MONGO_DURATION.labels("aggregate_launch_frequency")
+_find_rockets_duration = MONGO_DURATION.labels("find_rockets")
+_find_launchpads_duration = MONGO_DURATION.labels("find_launchpads")
+
+# Internal bookkeeping fields that are not part of the API response
+LAUNCH_PROJECTION: Dict[str, int] = {
+    "_id": 0,
+    "content_hash": 0,
+    "rocket.name_lower": 0,
+    "launchpad.name_lower": 0,
+}
+
+
+def build_launch_query(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    rocket_name: Optional[str] = None,
+    success: Optional[bool] = None,
+    launchpad: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Build the MongoDB filter for the supported launch query parameters.
+
+    Rocket and launchpad names are matched as case-insensitive prefixes against
+    the lowercase name fields stored at ingest, so every filter can be served by
+    an index seek (see services/indexes.py).
+    """
+    query: Dict[str, Any] = {}
+
+    if start_date or end_date:
+        query["date"] = {}
+        if start_date:
+            query["date"]["$gte"] = to_datetime(start_date)
+        if end_date:
+            query["date"]["$lte"] = to_datetime(end_date)
+
+    if rocket_name:
+        query["rocket.name_lower"] = {"$regex": f"^{re.escape(rocket_name.lower())}"}
+
+    if success is not None:
+        query["success"] = success
+
+    if launchpad:
+        query["launchpad.name_lower"] = {"$regex": f"^{re.escape(launchpad.lower())}"}
+
+    return query
+
+
+def apply_keyset(
+    query: Dict[str, Any], cursor: Optional[str], sort: str = "asc"
+) -> Dict[str, Any]:
+    """
+    Restrict a launch filter to the launches after a page cursor.
+
+    Launches are ordered by (date, _id), so a page continues strictly after the
+    (date, id) position encoded in the cursor.
+    """
+    if not cursor:
+        return query
+    launch_date, launch_id = decode_cursor(cursor)
+    op = "$gt" if sort == "asc" else "$lt"
+    keyset = {
+        "$or": [
+            {"date": {op: launch_date}},
+            {"date": launch_date, "_id": {op: launch_id}},
+        ]
+    }
+    return {"$and": [query, keyset]} if query else keyset
+
+
+@redis_cache(
+    ttl=CACHE_TTL,
+    soft_ttl=CACHE_SOFT_TTL,
+    local=True,
+    key_normalizer=canonical_arguments(lowercase=("rocket_name", "launchpad")),
+)
+async def get_launches(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     rocket_name: Optional[str] = None,
     success: Optional[bool] = None,
     launchpad: Optional[str] = None,
+    limit: Optional[int] = None,
+    sort: str = "asc",
+    cursor: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Fetch launches filtered by date, rocket, success, or launchpad.
+
+    Launches are ordered by date (then id) in the given sort direction. With a
+    limit, one page is returned; pass the cursor of its last launch (see
+    utils.encode_cursor) to fetch the next one.
+
+    Raises a 503 while the launch store is still being seeded.
     """
     try:
-        # Only update DB if collection is empty
-        if launches_collection.count_documents({}) == 0:
-            update_launches_in_db()
-        
-        query: Dict[str, Any] = {}
-
-        if start_date or end_date:
-            query["date"] = {}
-            if start_date:
-                query["date"]["$gte"] = to_datetime(start_date)
-            if end_date:
-                query["date"]["$lte"] = to_datetime(end_date)
-
-        if rocket_name:
-            query["rocket.name"] = {"$regex": rocket_name, "$options": "i"}
-
-        if success is not None:
-            query["success"] = success
-
-        if launchpad:
-            query["launchpad.name"] = {"$regex": launchpad, "$options": "i"}
-
-        launches: List[Dict[str, Any]] = list(
-            launches_collection.find(query, {"_id": 0})
+        # Wait briefly for the initial ingest if the store is still empty
+        await ensure_seeded()
+
+        query = build_launch_query(
+            start_date=start_date,
+            end_date=end_date,
+            rocket_name=rocket_name,
+            success=success,
+            launchpad=launchpad,
         )
+
+        query = apply_keyset(query, cursor, sort)
+        direction = ASCENDING if sort == "asc" else DESCENDING
+
+        launches_cursor = async_launches_collection.find(query, LAUNCH_PROJECTION).sort(
+            [("date", direction), ("_id", direction)]
+        )
+        if limit:
+            launches_cursor = launches_cursor.limit(limit)
+        started = time.perf_counter()
+        launches: List[Dict[str, Any]] = await launches_cursor.to_list()
+        _find_launches_duration.observe(time.perf_counter() - started)
         return launches
 
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Invalid input in get_launches: {e}")
         raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
@@ -60,32 +155,114 @@ def get_launches(
         raise HTTPException(status_code=500, detail="Failed to fetch launches")
 
 
-def get_launch_frequency() -> Dict[str, Dict[str, int]]:
+def iter_launches(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    rocket_name: Optional[str] = None,
+    success: Optional[bool] = None,
+    launchpad: Optional[str] = None,
+    sort: str = "asc",
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
     """
-    Calculate monthly and yearly launch frequencies.
+    Stream every launch matching the filters from a MongoDB cursor.
+
+    Unlike get_launches this is neither cached nor materialized: launches are
+    read from MongoDB in batches of ``batch_size`` as the iterator is consumed.
+    It uses the blocking client, so it is meant to be iterated from a worker
+    thread (as StreamingResponse does for sync iterators).
+    The query is sent before returning, so database errors surface to the caller
+    instead of in the middle of the stream.
     """
     try:
-        launches = list(launches_collection.find({}, {"_id": 0, "date": 1}))
+        query = build_launch_query(
+            start_date=start_date,
+            end_date=end_date,
+            rocket_name=rocket_name,
+            success=success,
+            launchpad=launchpad,
+        )
+        direction = ASCENDING if sort == "asc" else DESCENDING
+        launches_cursor = (
+            launches_collection.find(query, LAUNCH_PROJECTION)
+            .sort([("date", direction), ("_id", direction)])
+            .batch_size(batch_size)
+        )
+        # Only the first batch is timed, the rest is read while streaming
+        started = time.perf_counter()
+        first = next(launches_cursor, None)
+        _export_launches_duration.observe(time.perf_counter() - started)
+    except ValueError as e:
+        logger.error(f"Invalid input in iter_launches: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid input: {str(e)}")
+    except Exception:
+        logger.exception("Unexpected error in iter_launches")
+        raise HTTPException(status_code=500, detail="Failed to fetch launches")
 
-        monthly_stats: Dict[str, int] = defaultdict(int)
-        yearly_stats: Dict[int, int] = defaultdict(int)
+    if first is None:
+        return iter(())
+    return itertools.chain([first], launches_cursor)
 
-        for launch in launches:
-            launch_date = launch.get("date")
-            if not launch_date:
-                continue
-            if isinstance(launch_date, str):
-                launch_date = to_datetime(launch_date)
 
-            year_month = launch_date.strftime("%Y-%m")
-            year_only = launch_date.year
+async def get_launch_frequency(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    rocket_name: Optional[str] = None,
+    success: Optional[bool] = None,
+    launchpad: Optional[str] = None,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Calculate monthly and yearly launch frequencies, optionally scoped by the
+    launch filters. Counting is done by a MongoDB aggregation, so only the
+    buckets are transferred.
+    """
+    try:
+        query = build_launch_query(
+            start_date=start_date,
+            end_date=end_date,
+            rocket_name=rocket_name,
+            success=success,
+            launchpad=launchpad,
+        )
+        query.setdefault("date", {"$type": "date"})
 
-            monthly_stats[year_month] += 1
-            yearly_stats[year_only] += 1
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": query},
+            {
+                "$facet": {
+                    "monthly": [
+                        {
+                            "$group": {
+                                "_id": {
+                                    "$dateToString": {
+                                        "format": "%Y-%m",
+                                        "date": "$date",
+                                    }
+                                },
+                                "count": {"$sum": 1},
+                            }
+                        },
+                        {"$sort": {"_id": 1}},
+                    ],
+                    "yearly": [
+                        {"$group": {"_id": {"$year": "$date"}, "count": {"$sum": 1}}},
+                        {"$sort": {"_id": 1}},
+                    ],
+                }
+            },
+        ]
+        started = time.perf_counter()
+        buckets = await (await async_launches_collection.aggregate(pipeline)).to_list()
+        _launch_frequency_duration.observe(time.perf_counter() - started)
+        result = buckets[0] if buckets else {}
 
         return {
-            "monthly_launch_frequency": dict(monthly_stats),
-            "yearly_launch_frequency": dict(yearly_stats),
+            "monthly_launch_frequency": {
+                bucket["_id"]: bucket["count"] for bucket in result.get("monthly", [])
+            },
+            "yearly_launch_frequency": {
+                bucket["_id"]: bucket["count"] for bucket in result.get("yearly", [])
+            },
         }
 
     except ValueError as e:
@@ -98,14 +275,28 @@ def get_launch_frequency() -> Dict[str, Dict[str, int]]:
         )
 
 
-def get_rocket_success_rates() -> Dict[str, float]:
+def _name_prefix_query(name: Optional[str]) -> Dict[str, Any]:
+    """
+    Match documents whose name starts with the given text, ignoring case.
+    """
+    if not name:
+        return {}
+    return {"name": {"$regex": f"^{re.escape(name)}", "$options": "i"}}
+
+
+async def get_rocket_success_rates(
+    rocket_name: Optional[str] = None,
+) -> Dict[str, float]:
     """
     Fetch rocket success rates by rocket name.
     """
     try:
-        rockets = list(
-            rockets_collection.find({}, {"_id": 0, "name": 1, "success_rate_pct": 1})
-        )
+        started = time.perf_counter()
+        rockets = await async_rockets_collection.find(
+            _name_prefix_query(rocket_name),
+            {"_id": 0, "name": 1, "success_rate_pct": 1},
+        ).to_list()
+        _find_rockets_duration.observe(time.perf_counter() - started)
         return {
             rocket["name"]: rocket["success_rate_pct"]
             for rocket in rockets
@@ -118,23 +309,25 @@ def get_rocket_success_rates() -> Dict[str, float]:
         )
 
 
-def get_launchpad_totals() -> Dict[str, Dict[str, Any]]:
+async def get_launchpad_totals(
+    launchpad: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
     """
     Fetch total launch attempts and successes per launch site.
     """
     try:
-        launchpads = list(
-            launchpads_collection.find(
-                {},
-                {
-                    "_id": 0,
-                    "name": 1,
-                    "full_name": 1,
-                    "launch_attempts": 1,
-                    "launch_successes": 1,
-                },
-            )
-        )
+        started = time.perf_counter()
+        launchpads = await async_launchpads_collection.find(
+            _name_prefix_query(launchpad),
+            {
+                "_id": 0,
+                "name": 1,
+                "full_name": 1,
+                "launch_attempts": 1,
+                "launch_successes": 1,
+            },
+        ).to_list()
+        _find_launchpads_duration.observe(time.perf_counter() - started)
 
         return {
             lp["name"]: {
@@ -149,17 +342,55 @@ def get_launchpad_totals() -> Dict[str, Dict[str, Any]]:
         raise HTTPException(status_code=500, detail="Failed to fetch launchpad totals")
 
 
-@redis_cache(ttl=CACHE_TTL)
-def get_all_statistics() -> Dict[str, Any]:
+@redis_cache(
+    ttl=CACHE_TTL,
+    soft_ttl=CACHE_SOFT_TTL,
+    local=True,
+    key_normalizer=canonical_arguments(lowercase=("rocket_name", "launchpad")),
+)
+async def get_all_statistics(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    rocket_name: Optional[str] = None,
+    success: Optional[bool] = None,
+    launchpad: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Aggregate all launch statistics into one response.
+
+    Launch frequencies honour every filter; rocket success rates and launchpad
+    totals are narrowed by rocket and launchpad name only, since they are
+    lifetime figures reported by the SpaceX API. The three queries run
+    concurrently.
     """
     try:
+        rocket_success_rates, launchpad_totals, launch_frequency = await asyncio.gather(
+            get_rocket_success_rates(rocket_name),
+            get_launchpad_totals(launchpad),
+            get_launch_frequency(
+                start_date=start_date,
+                end_date=end_date,
+                rocket_name=rocket_name,
+                success=success,
+                launchpad=launchpad,
+            ),
+        )
         return {
-            "rocket_success_rates": get_rocket_success_rates(),
-            "launchpad_totals": get_launchpad_totals(),
-            "launch_frequency": get_launch_frequency(),
+            "rocket_success_rates": rocket_success_rates,
+            "launchpad_totals": launchpad_totals,
+            "launch_frequency": launch_frequency,
         }
     except Exception:
         logger.exception("Unexpected error in get_all_statistics")
         raise HTTPException(status_code=500, detail="Failed to aggregate statistics")
+
+
+async def warm_caches() -> None:
+    """
+    Cache the /launches and /statistics results for default parameters, so the
+    first requests after an ingest are cache hits.
+    """
+    await asyncio.gather(
+        get_launches(**LaunchListParams().model_dump(exclude_none=True)),
+        get_all_statistics(**LaunchQueryParams().model_dump(exclude_none=True)),
+    )
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CSV_COLUMNS = [
+    "id",
+    "name",
+    "date",
+    "success",
+    "upcoming",
+    "rocket",
+    "launchpad",
+    "details",
+    "img",
+    "webcast",
+    "article",
+    "wikipedia",
+]
+
+
+def _json_default(value: Any) -> str:
+    """
+    Serialize dates the way FastAPI does for the regular JSON endpoints.
+    """
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(launch: Dict[str, Any]) -> str:
+    return json.dumps(launch, default=_json_default)
+
+
+def _buffered(pieces: Iterable[str], size: int = EXPORT_BUFFER_SIZE) -> Iterator[bytes]:
+    """
+    Join small text pieces into chunks of about ``size`` bytes.
+    """
+    buffer: List[str] = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _ndjson_lines(launches: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for launch in launches:
+        yield _dumps(launch) + "\n"
+
+
+def _json_array_parts(launches: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    yield "["
+    separator = ""
+    for launch in launches:
+        yield separator + _dumps(launch)
+        separator = ","
+    yield "]"
+
+
+def _csv_rows(launches: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def flush() -> str:
+        row = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return row
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for launch in launches:
+        launch_date = launch.get("date")
+        links = launch.get("links") or {}
+        writer.writerow(
+            [
+                launch.get("id"),
+                launch.get("name"),
+                _json_default(launch_date) if launch_date else "",
+                launch.get("success"),
+                launch.get("upcoming"),
+                (launch.get("rocket") or {}).get("name"),
+                (launch.get("launchpad") or {}).get("name"),
+                launch.get("details"),
+                links.get("img"),
+                links.get("webcast"),
+                links.get("article"),
+                links.get("wikipedia"),
+            ]
+        )
+        yield flush()
+
+
+_ENCODERS: Dict[str, Callable[[Iterable[Dict[str, Any]]], Iterator[str]]] = {
+    "json": _json_array_parts,
+    "ndjson": _ndjson_lines,
+    "csv": _csv_rows,
+}
+
+
+def stream_launches(
+    launches: Iterable[Dict[str, Any]], export_format: str = "json"
+) -> Iterator[bytes]:
+    """
+    Encode launches for download as they are read.
+
+    Output is produced in chunks of about EXPORT_BUFFER_SIZE bytes, so memory
+    use stays constant regardless of the number of launches exported.
+
+    Args:
+        launches (Iterable[Dict[str, Any]]): Launches to export.
+        export_format (str): One of 'json', 'ndjson' or 'csv'.
+
+    Returns:
+        Iterator[bytes]: Encoded response body chunks.
+    """
+    return _buffered(_ENCODERS[export_format](launches))
@@ -0,0 +1,118 @@
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+from spacextracker.services.cache_service import (
+    get_data_updated_at,
+    get_data_version,
+)
+
+# Content-codings served under their own ETag (see variant_etag)
+CONTENT_CODINGS = ("br", "gzip")
+
+
+async def conditional_headers(
+    cached: Callable[..., Any], params: Dict[str, Any]
+) -> Dict[str, str]:
+    """
+    Build the validators of a cached endpoint response.
+
+    The ETag combines the data version with the canonical cache key of the
+    query, so it changes exactly when the cached result can. Last-Modified is
+    the time of the last ingest that changed data. Neither needs MongoDB or the
+    cached payload.
+
+    Args:
+        cached (Callable[..., Any]): Function decorated with ``redis_cache``.
+        params (Dict[str, Any]): Keyword arguments the endpoint calls it with.
+
+    Returns:
+        Dict[str, str]: ETag, Cache-Control and, once known, Last-Modified.
+    """
+    version = await get_data_version()
+    headers = {
+        "ETag": f'"v{version}-{cached.cache_key(**params)}"',
+        # Let clients store responses but revalidate them on every use
+        "Cache-Control": "no-cache",
+    }
+    updated_at = await get_data_updated_at()
+    if updated_at:
+        headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+    return headers
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of one content-coding of a response. Strong validators must differ
+    between codings (RFC 9110 8.8.3), so compressed ones get a suffix.
+    """
+    if encoding not in CONTENT_CODINGS:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Return the tag of If-None-Match naming any coding of ``etag``, if one does.
+    """
+    variants = {etag, *(variant_etag(etag, coding) for coding in CONTENT_CODINGS)}
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag in variants:
+            return tag
+    return None
+
+
+def not_modified_headers(
+    request_headers: Mapping[str, str], headers: Mapping[str, str]
+) -> Dict[str, str]:
+    """
+    Headers of a 304 for validators that ``is_not_modified`` accepted, with the
+    ETag of the coding the client holds.
+    """
+    headers = dict(headers)
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and "ETag" in headers:
+        matched = _matching_etag(if_none_match, headers["ETag"])
+        if matched:
+            headers["ETag"] = matched
+    return headers
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str], headers: Mapping[str, str]
+) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against response validators.
+
+    If-None-Match takes precedence when both are sent (RFC 9110 13.2.2), and
+    matches the ETag of any content-coding of the response.
+
+    Args:
+        request_headers (Mapping[str, str]): Incoming request headers.
+        headers (Mapping[str, str]): Validators from ``conditional_headers``.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 can be sent.
+    """
+    if not headers:
+        return False
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _matching_etag(if_none_match, headers["ETag"]) is not None
+
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since and last_modified:
+        since = _parse_http_date(if_modified_since)
+        modified = _parse_http_date(last_modified)
+        return since is not None and modified is not None and modified <= since
+    return False
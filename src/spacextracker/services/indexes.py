@@ -0,0 +1,42 @@
+from typing import List
+from pymongo import ASCENDING, IndexModel
+from spacextracker.db import launches_collection
+from spacextracker.logger import logger
+
+# Equality fields first, then the (date, _id) keyset used for sorting and
+# paging, so every filter combination accepted by LaunchQueryParams is answered
+# by an index scan. Unfiltered, date and success queries also come back in
+# keyset order. Rocket and launchpad names match by prefix ($regex on
+# name_lower), which scans a range of names, so those results still go through
+# a SORT stage. That sort is bounded by the page limit.
+LAUNCH_INDEXES: List[IndexModel] = [
+    IndexModel([("date", ASCENDING), ("_id", ASCENDING)], name="date_id"),
+    IndexModel(
+        [("success", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+        name="success_date_id",
+    ),
+    IndexModel(
+        [("rocket.name_lower", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+        name="rocket_name_date_id",
+    ),
+    IndexModel(
+        [("launchpad.name_lower", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+        name="launchpad_name_date_id",
+    ),
+]
+
+
+def ensure_indexes() -> List[str]:
+    """
+    Create the indexes backing the launch filters if they do not exist yet.
+
+    Returns:
+        List[str]: Names of the ensured indexes.
+    """
+    try:
+        names = launches_collection.create_indexes(LAUNCH_INDEXES)
+        logger.info(f"Ensured launch indexes: {', '.join(names)}")
+        return names
+    except Exception as e:
+        logger.error(f"Error creating launch indexes: {e}", exc_info=True)
+        raise
@@ -0,0 +1,263 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import brotli
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from spacextracker.db import async_redis_client, CACHE_TTL
+from spacextracker.logger import cache_logger, logger
+from spacextracker.services.cache_service import get_data_version, local_cache
+from spacextracker.services.http_cache import variant_etag
+
+RESPONSE_CACHE_ENABLED: bool = (
+    os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+)
+# Smaller bodies are only stored and served uncompressed
+RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+
+HeadersFor = Callable[[Any], Dict[str, str]]
+# Stored variants being computed and refreshed in this process, by key
+_inflight: Dict[str, "asyncio.Future[Tuple[Dict[str, bytes], Dict[str, str]]]"] = {}
+_refreshing: Dict[str, "asyncio.Future[None]"] = {}
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """
+    Pick the response encoding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding (str): Raw header value, may be empty.
+
+    Returns:
+        str: 'br', 'gzip' or 'identity'.
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            qualities[name] = quality
+
+    for encoding in ENCODINGS:
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def encode_variants(content: Any) -> Dict[str, bytes]:
+    """
+    Render content the way FastAPI's JSONResponse does, plus compressed copies.
+
+    Args:
+        content (Any): Endpoint result.
+
+    Returns:
+        Dict[str, bytes]: Body per encoding; only 'identity' for small bodies.
+    """
+    body = JSONResponse(jsonable_encoder(content)).body
+    variants = {"identity": body}
+    if len(body) >= RESPONSE_COMPRESS_MIN_BYTES:
+        variants["gzip"] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return variants
+
+
+def _response(body: bytes, encoding: str, headers: Dict[str, str]) -> Response:
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if "ETag" in headers:
+        headers["ETag"] = variant_etag(headers["ETag"], encoding)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _read(key: str, encoding: str) -> Optional[Dict[str, Any]]:
+    """
+    Read one encoding of a stored response, or None if it is not stored.
+    """
+    local_key = f"{key}:{encoding}"
+    stored = local_cache.get(local_key, None)
+    if stored is not None:
+        return stored
+
+    body, headers, generated_at = await async_redis_client.hmget(
+        key, [encoding, "headers", "generated_at"]
+    )
+    if headers is None:
+        return None
+    if body is None:
+        # Stored uncompressed only
+        encoding = "identity"
+        body = await async_redis_client.hget(key, encoding)
+        if body is None:
+            return None
+    stored = {
+        "body": body,
+        "encoding": encoding,
+        "headers": json.loads(headers),
+        "generated_at": float(generated_at or 0),
+    }
+    local_cache.set(local_key, stored, len(body))
+    return stored
+
+
+async def _store(
+    key: str, result: Any, headers_for: Optional[HeadersFor]
+) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """
+    Encode a result and store its variants, returning them with the headers
+    derived from it.
+    """
+    extra = headers_for(result) if headers_for else {}
+    variants = encode_variants(result)
+    generated_at = time.time()
+    try:
+        async with async_redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    **variants,
+                    "headers": json.dumps(extra),
+                    "generated_at": generated_at,
+                },
+            )
+            pipe.expire(key, CACHE_TTL)
+            await pipe.execute()
+        cache_logger.info("Stored %s response variants under %s", sorted(variants), key)
+    except Exception as e:
+        logger.error(f"Response cache error for {key}: {e}", exc_info=True)
+        return variants, extra
+
+    for encoding, body in variants.items():
+        # Replace what this process would otherwise keep serving from L1
+        local_cache.set(
+            f"{key}:{encoding}",
+            {
+                "body": body,
+                "encoding": encoding,
+                "headers": extra,
+                "generated_at": generated_at,
+            },
+            len(body),
+        )
+    return variants, extra
+
+
+async def _load(
+    cached: Callable[..., Awaitable[Any]],
+    kwargs: Dict[str, Any],
+    key: str,
+    headers_for: Optional[HeadersFor],
+) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    return await _store(key, await cached(**kwargs), headers_for)
+
+
+async def _refresh(
+    cached: Callable[..., Awaitable[Any]],
+    kwargs: Dict[str, Any],
+    key: str,
+    headers_for: Optional[HeadersFor],
+) -> None:
+    try:
+        result = await cached.refresh(**kwargs)  # type: ignore[attr-defined]
+        if result is None:
+            # Another worker is recomputing it; a later hit refreshes from that
+            return
+        await _store(key, result, headers_for)
+    except Exception as e:
+        logger.error(f"Background refresh of {key} failed: {e}", exc_info=True)
+
+
+async def cached_response(
+    cached: Callable[..., Awaitable[Any]],
+    kwargs: Dict[str, Any],
+    accept_encoding: str = "",
+    headers: Optional[Dict[str, str]] = None,
+    headers_for: Optional[HeadersFor] = None,
+) -> Response:
+    """
+    Serve a cached endpoint result as stored, encoded and compressed bytes.
+
+    On a hit the body is returned as is, in the best encoding the client
+    accepts, with no JSON encoding or compression work. On a miss ``cached``
+    is called, and the rendered body is stored in Redis together with its gzip
+    and brotli variants, under the data version like other cache entries.
+    Concurrent misses in a process share one computation. Redis errors fall
+    back to an uncached, uncompressed response.
+
+    Stored responses older than the ``soft_ttl`` of ``cached`` are still
+    served, while one worker refreshes them in the background from a freshly
+    computed result entry, as ``redis_cache`` does for results.
+
+    Compressed variants carry their own ETag (see ``variant_etag``).
+
+    Args:
+        cached (Callable[..., Awaitable[Any]]): Function decorated with
+            ``redis_cache`` that produces the endpoint result.
+        kwargs (Dict[str, Any]): Keyword arguments to call it with.
+        accept_encoding (str): Accept-Encoding header of the request.
+        headers (Optional[Dict[str, str]]): Headers added to every response.
+        headers_for (Optional[HeadersFor]): Derives headers from the result,
+            stored alongside the body.
+
+    Returns:
+        Response: Raw JSON response.
+    """
+    headers = headers or {}
+    encoding = choose_encoding(accept_encoding)
+    try:
+        version = await get_data_version()
+        key = f"response:v{version}:{cached.cache_key(**kwargs)}"
+        stored = await _read(key, encoding)
+    except Exception as e:
+        logger.error(f"Response cache error for {cached.__name__}: {e}", exc_info=True)
+        result = await cached(**kwargs)
+        extra = headers_for(result) if headers_for else {}
+        return _response(
+            encode_variants(result)["identity"], "identity", {**headers, **extra}
+        )
+
+    if stored is not None:
+        cache_logger.info("Response cache hit for %s (%s)", key, stored["encoding"])
+        soft_ttl = getattr(cached, "soft_ttl", None)
+        age = time.time() - stored["generated_at"]
+        if soft_ttl is not None and age >= soft_ttl and key not in _refreshing:
+            cache_logger.info(
+                "Refreshing %s in the background, served a %.0fs old response",
+                key,
+                age,
+            )
+            task = asyncio.ensure_future(_refresh(cached, kwargs, key, headers_for))
+            _refreshing[key] = task
+            task.add_done_callback(lambda _: _refreshing.pop(key, None))
+        return _response(
+            stored["body"], stored["encoding"], {**stored["headers"], **headers}
+        )
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_load(cached, kwargs, key, headers_for))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller going away does not cancel it for the others
+    variants, extra = await asyncio.shield(task)
+
+    if encoding not in variants:
+        encoding = "identity"
+    return _response(variants[encoding], encoding, {**extra, **headers})
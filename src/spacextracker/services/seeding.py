@@ -0,0 +1,167 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+from fastapi import HTTPException
+from spacextracker.db import (
+    async_launches_collection,
+    async_redis_client,
+    launches_collection,
+    redis_client,
+)
+from spacextracker.logger import logger
+from spacextracker.services.store_to_db import update_launches_in_db
+from spacextracker.services.sync_state import get_sync_state, get_sync_state_async
+
+SEED_ON_STARTUP: bool = os.getenv("SEED_ON_STARTUP", "true").lower() == "true"
+# How long a request waits for an in-progress seed before getting a 503
+SEED_WAIT_SECONDS: float = float(os.getenv("SEED_WAIT_SECONDS", 2))
+SEED_RETRY_AFTER: int = int(os.getenv("SEED_RETRY_AFTER", 10))
+SEED_LOCK_SECONDS: int = int(os.getenv("SEED_LOCK_SECONDS", 600))
+SEED_LOCK_KEY = "lock:seed_launches"
+SEED_POLL_SECONDS = 1.0
+
+# Seeding state of this process. Once seeded, the store never goes back to
+# empty, so requests skip every check after the first successful one.
+_seeding: Dict[str, Any] = {"done": False, "task": None}
+
+
+def is_seeded(state: Dict[str, Any]) -> bool:
+    """
+    A completed full sync marks the launch store as seeded.
+    """
+    return bool(state.get("last_full_sync"))
+
+
+def has_launches() -> bool:
+    """
+    Whether launches are stored while no seed is writing them.
+
+    Stores filled before the seeded marker existed have launches but no sync
+    state, and count as seeded too. Redis errors count as no seed running.
+    """
+    if launches_collection.find_one({}, {"_id": 1}) is None:
+        return False
+    try:
+        return not redis_client.exists(SEED_LOCK_KEY)
+    except Exception as e:
+        logger.error(f"Error reading seed lock: {e}", exc_info=True)
+        return True
+
+
+async def has_launches_async() -> bool:
+    """
+    Async variant of ``has_launches`` for the request path.
+    """
+    if await async_launches_collection.find_one({}, {"_id": 1}) is None:
+        return False
+    try:
+        return not await async_redis_client.exists(SEED_LOCK_KEY)
+    except Exception as e:
+        logger.error(f"Error reading seed lock: {e}", exc_info=True)
+        return True
+
+
+def _release_seed_lock(token: str) -> None:
+    try:
+        if redis_client.get(SEED_LOCK_KEY) == token:
+            redis_client.delete(SEED_LOCK_KEY)
+    except Exception as e:
+        logger.error(f"Error releasing seed lock: {e}", exc_info=True)
+
+
+def seed_launches() -> None:
+    """
+    Run the initial full ingest, once across all API processes.
+
+    The process holding a Redis lock runs the ingest, unless launches are
+    already stored; others block until the seeded marker appears or the lock
+    is released over stored launches. If Redis is unreachable the ingest runs anyway,
+    which is safe since writes are idempotent upserts.
+
+    Raises:
+        TimeoutError: If another process did not finish within SEED_LOCK_SECONDS.
+    """
+    token = uuid4().hex
+    try:
+        locked = redis_client.set(SEED_LOCK_KEY, token, nx=True, ex=SEED_LOCK_SECONDS)
+    except Exception as e:
+        logger.error(f"Error taking seed lock: {e}", exc_info=True)
+        locked = True
+
+    if locked:
+        try:
+            if is_seeded(get_sync_state("launches")):
+                return
+            # Checked under the lock, so these were not written by a seed
+            if launches_collection.find_one({}, {"_id": 1}) is not None:
+                logger.info("Launch store already holds launches, not seeding")
+                return
+            logger.info("Seeding empty launch store from the SpaceX API")
+            update_launches_in_db(full=True)
+        finally:
+            _release_seed_lock(token)
+        return
+
+    logger.info("Launch store is being seeded by another process, waiting")
+    deadline = time.monotonic() + SEED_LOCK_SECONDS
+    while time.monotonic() < deadline:
+        if is_seeded(get_sync_state("launches")) or has_launches():
+            return
+        time.sleep(SEED_POLL_SECONDS)
+    raise TimeoutError("Timed out waiting for the launch store to be seeded")
+
+
+def _seed_task() -> "asyncio.Future[None]":
+    """
+    Return the running seed job of this process, starting one if needed.
+    """
+    task = _seeding["task"]
+    if task is None or (task.done() and (task.cancelled() or task.exception())):
+        task = asyncio.ensure_future(asyncio.to_thread(seed_launches))
+        _seeding["task"] = task
+    return task
+
+
+async def ensure_seeded(wait: Optional[float] = SEED_WAIT_SECONDS) -> None:
+    """
+    Make sure launch data has been ingested before it is queried.
+
+    Concurrent callers share a single seed job. Callers that would wait longer
+    than ``wait`` get a 503 asking them to retry instead.
+
+    Args:
+        wait (Optional[float]): Seconds to wait for seeding, None to wait until
+            it completes.
+
+    Raises:
+        HTTPException: 503 with a Retry-After header if still seeding.
+    """
+    if _seeding["done"]:
+        return
+    if is_seeded(await get_sync_state_async("launches")) or await has_launches_async():
+        _seeding["done"] = True
+        return
+
+    task = _seed_task()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=wait)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Launch data is still being loaded, please retry shortly",
+            headers={"Retry-After": str(SEED_RETRY_AFTER)},
+        )
+    _seeding["done"] = True
+
+
+async def warm_up() -> None:
+    """
+    Seed the launch store in the background when the API starts.
+    """
+    try:
+        await ensure_seeded(wait=None)
+        logger.info("Launch store is seeded")
+    except Exception:
+        logger.exception("Seeding launch store on startup failed")
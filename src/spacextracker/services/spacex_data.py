@@ -1,20 +1,183 @@
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 import requests
+from requests.adapters import HTTPAdapter
 from spacextracker.logger import logger
+from spacextracker.services.utils import iter_json_array
 
-API_BASE_URL = "https://api.spacexdata.com/v4/"
+# Point at a mirror or a local replay server (see benchmarks/replay_server.py)
+API_BASE_URL: str = (
+    os.getenv("API_BASE_URL", "https://api.spacexdata.com/v4/").rstrip("/") + "/"
+)
+QUERY_PAGE_SIZE = 200
+FETCH_WORKERS = 3
+STREAM_CHUNK_SIZE = 64 * 1024
+# Endpoints fetched with conditional requests; launches only on full syncs,
+# incremental ones go through /launches/query
+UPSTREAM_ENDPOINTS = ("launches", "rockets", "launchpads")
 
+# Timeout of each attempt; failed attempts are retried with jittered
+# exponential backoff until API_RETRIES or the API_DEADLINE_SECONDS budget
+# of the whole call runs out
+API_TIMEOUT_SECONDS: float = float(os.getenv("API_TIMEOUT_SECONDS", 10))
+API_RETRIES: int = int(os.getenv("API_RETRIES", 4))
+API_BACKOFF_SECONDS: float = float(os.getenv("API_BACKOFF_SECONDS", 0.5))
+API_BACKOFF_MAX_SECONDS: float = float(os.getenv("API_BACKOFF_MAX_SECONDS", 8))
+API_DEADLINE_SECONDS: float = float(os.getenv("API_DEADLINE_SECONDS", 60))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
 
-def get_json_from_api(endpoint: str) -> Any:
+T = TypeVar("T")
+
+
+def create_session(pool_size: int = FETCH_WORKERS) -> requests.Session:
+    """
+    Create an HTTP session that keeps connections to the SpaceX API alive.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections per host.
+
+    Returns:
+        requests.Session: Session shared by all SpaceX API calls.
+    """
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    http.mount("https://", adapter)
+    http.mount("http://", adapter)
+    return http
+
+
+session = create_session()
+
+
+def _retry_delay(attempt: int, response: Optional[requests.Response]) -> float:
+    """
+    Seconds to wait before retry number ``attempt`` (from 0): the server's
+    Retry-After if it sent one in seconds, else full-jitter backoff.
+    """
+    # Not ``if response``: error responses are falsy
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    cap = min(API_BACKOFF_MAX_SECONDS, API_BACKOFF_SECONDS * 2**attempt)
+    return random.uniform(0, cap)
+
+
+def send_with_retry(
+    send: Callable[..., requests.Response], url: str, **kwargs: Any
+) -> requests.Response:
+    """
+    Send a request, retrying connection errors, timeouts and RETRY_STATUSES.
+
+    Args:
+        send (Callable[..., requests.Response]): ``session.get`` or ``session.post``.
+        url (str): Request URL.
+        **kwargs: Passed on to ``send``.
+
+    Returns:
+        requests.Response: The first response that is not retried, or the last
+        one once retries or the deadline are used up.
+
+    Raises:
+        requests.RequestException: If the last attempt failed to connect or
+            timed out.
+    """
+    deadline = time.monotonic() + API_DEADLINE_SECONDS
+    attempt = 0
+    while True:
+        timeout = max(0.0, min(API_TIMEOUT_SECONDS, deadline - time.monotonic()))
+        response: Optional[requests.Response] = None
+        error: Optional[requests.RequestException] = None
+        try:
+            response = send(url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            failure = f"HTTP {response.status_code}"
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+            failure = str(e)
+
+        delay = _retry_delay(attempt, response)
+        if attempt >= API_RETRIES or time.monotonic() + delay >= deadline:
+            if error is not None:
+                raise error
+            return response
+        if response is not None:
+            response.close()
+        attempt += 1
+        logger.warning(
+            "Retrying %s in %.2fs (attempt %d): %s", url, delay, attempt, failure
+        )
+        time.sleep(delay)
+
+
+def _conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _send_conditional(
+    url: str, validators: Optional[Dict[str, str]], **kwargs: Any
+) -> Optional[requests.Response]:
+    """
+    GET ``url`` conditional on ``validators``, returning None on 304 Not
+    Modified. Otherwise ``validators`` is updated from the response.
+    """
+    headers = _conditional_headers(validators)
+    if headers:
+        kwargs["headers"] = headers
+    response = send_with_retry(session.get, url, **kwargs)
+    if response.status_code == 304:
+        response.close()
+        return None
+    response.raise_for_status()
+    if validators is not None:
+        validators.clear()
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+            if response.headers.get(header):
+                validators[key] = response.headers[header]
+    return response
+
+
+def get_json_from_api(
+    endpoint: str, validators: Optional[Dict[str, str]] = None
+) -> Any:
     """
     Fetch JSON data from a SpaceX API endpoint.
+
+    Args:
+        endpoint (str): Endpoint path, e.g. 'rockets'.
+        validators (Optional[Dict[str, str]]): 'etag' and 'last_modified' of
+            the last fetch. The request is made conditional on them, and they
+            are replaced with the values of the response.
+
+    Returns:
+        Any: Decoded body, or None if the API answered 304 Not Modified.
     """
     API_URL = f"{API_BASE_URL}{endpoint}"
     try:
         logger.info(f"Requesting SpaceX API: {API_URL}")
-        response = requests.get(API_URL, timeout=10)
-        response.raise_for_status()
+        response = _send_conditional(API_URL, validators)
+        if response is None:
+            logger.info("SpaceX API answered 304 Not Modified for %s", endpoint)
+            return None
         data = response.json()
         logger.info(
             f"Received {len(data) if isinstance(data, list) else '1'} records from {endpoint}"
@@ -28,69 +191,349 @@ def get_json_from_api(endpoint: str) -> Any:
         raise
 
 
-def get_data_from_api() -> (
-    Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]
-):
+def query_api(
+    endpoint: str, query: Dict[str, Any], options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run a query against a SpaceX API ``/query`` endpoint.
+    """
+    API_URL = f"{API_BASE_URL}{endpoint}/query"
+    try:
+        logger.info(f"Querying SpaceX API: {API_URL} with {query}")
+        response = send_with_retry(
+            session.post, API_URL, json={"query": query, "options": options}
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as e:
+        logger.error(f"Request error while querying {endpoint}: {e}", exc_info=True)
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error while querying {endpoint}: {e}", exc_info=True)
+        raise
+
+
+def stream_json_from_api(
+    endpoint: str, validators: Optional[Dict[str, str]] = None
+) -> Optional[Iterator[Any]]:
+    """
+    Fetch a JSON array from a SpaceX API endpoint and decode its items as the
+    response body streams in.
+
+    The request is sent before returning, so the round trip overlaps with other
+    fetches; the body is read while the returned iterator is consumed. Returns
+    None if the API answered 304 Not Modified to a request conditional on
+    ``validators`` (see ``get_json_from_api``).
+    """
+    API_URL = f"{API_BASE_URL}{endpoint}"
+    try:
+        logger.info(f"Streaming SpaceX API: {API_URL}")
+        response = _send_conditional(API_URL, validators, stream=True)
+    except requests.RequestException as e:
+        logger.error(f"Request error while fetching {endpoint}: {e}", exc_info=True)
+        raise
+    if response is None:
+        logger.info("SpaceX API answered 304 Not Modified for %s", endpoint)
+        return None
+
+    def items() -> Iterator[Any]:
+        count = 0
+        with response:
+            for item in iter_json_array(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            ):
+                count += 1
+                yield item
+        logger.info(f"Received {count} records from {endpoint}")
+
+    return items()
+
+
+def launch_list_changed(validators: Dict[str, str]) -> bool:
+    """
+    Ask whether the full launch list changed since ``validators`` were stored.
+
+    The request is conditional on them and its body is never read, so an
+    unchanged list costs one 304 and a changed one only its headers. On a
+    change ``validators`` are replaced with those of the current list.
+    """
+    API_URL = f"{API_BASE_URL}launches"
+    try:
+        logger.info(f"Checking SpaceX API for changes: {API_URL}")
+        response = _send_conditional(API_URL, validators, stream=True)
+    except requests.RequestException as e:
+        logger.error(f"Request error while checking launches: {e}", exc_info=True)
+        raise
+    if response is None:
+        logger.info("SpaceX API answered 304 Not Modified for launches")
+        return False
+    response.close()
+    return True
+
+
+def query_pages_from_api(
+    endpoint: str, query: Dict[str, Any], page_size: int = QUERY_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate every document matching a query, fetching one page at a time.
+
+    The first page is requested before returning; later pages are requested as
+    the returned iterator is consumed.
+    """
+
+    first_page = query_api(endpoint, query, query_options(1, page_size))
+
+    def docs() -> Iterator[Dict[str, Any]]:
+        result = first_page
+        count = 0
+        while True:
+            for doc in result.get("docs", []):
+                count += 1
+                yield doc
+            if not result.get("hasNextPage"):
+                break
+            result = query_api(
+                endpoint, query, query_options(result["nextPage"], page_size)
+            )
+        logger.info(f"Received {count} records from {endpoint} query")
+
+    return docs()
+
+
+def get_launches_from_api(
+    since: Optional[datetime] = None, validators: Optional[Dict[str, str]] = None
+) -> Optional[Iterator[Dict[str, Any]]]:
+    """
+    Fetch raw launches, either all of them or only those dated on or after
+    ``since`` plus every launch still flagged as upcoming.
+
+    Only the full list is fetched conditionally on ``validators`` (see
+    ``get_json_from_api``), and None is returned if it did not change.
+    """
+    if since is None:
+        return stream_json_from_api("launches", validators)
+    return query_pages_from_api("launches", launches_query(since))
+
+
+def launches_query(since: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Build the ``/launches/query`` filter for launches dated on or after
+    ``since`` plus every launch still flagged as upcoming, or for all launches.
+    """
+    if since is None:
+        return {}
+    since_utc = since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return {"$or": [{"date_utc": {"$gte": since_utc}}, {"upcoming": True}]}
+
+
+def count_query_pages(
+    endpoint: str, query: Dict[str, Any], page_size: int = QUERY_PAGE_SIZE
+) -> int:
+    """
+    Count the pages of ``page_size`` documents a query returns, fetching a
+    single document.
+    """
+    result = query_api(endpoint, query, {"page": 1, "limit": 1, "select": "id"})
+    return -(-result.get("totalDocs", 0) // page_size)
+
+
+def query_options(page: int, page_size: int = QUERY_PAGE_SIZE) -> Dict[str, Any]:
+    # Launches sharing a date_utc would otherwise be free to move between
+    # pages fetched by different tasks, so ties are broken by _id. The sort goes
+    # to MongoDB as is, where the id of the responses is a mongoose virtual.
+    return {
+        "page": page,
+        "limit": page_size,
+        "sort": {"date_utc": "asc", "_id": "asc"},
+    }
+
+
+def transform_launch(
+    launch: Dict[str, Any],
+    rockets: Dict[str, Dict[str, Any]],
+    launchpads: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Build the stored launch document with embedded rocket and launchpad info.
+    """
+    return {
+        "id": launch.get("id"),
+        "name": launch.get("name", "Unknown"),
+        "success": launch.get("success"),
+        "upcoming": launch.get("upcoming"),
+        "date": datetime.fromisoformat(launch.get("date_utc").replace("Z", "+00:00")),
+        "details": launch.get("details"),
+        "links": {
+            "img": launch.get("links", {}).get("patch", {}).get("small"),
+            "webcast": launch.get("links", {}).get("webcast"),
+            "article": launch.get("links", {}).get("article"),
+            "wikipedia": launch.get("links", {}).get("wikipedia"),
+        },
+        "rocket": rockets.get(launch.get("rocket"), {}),
+        "launchpad": launchpads.get(launch.get("launchpad"), {}),
+    }
+
+
+def _timed(name: str, func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a fetch function and log how long it took.
+    """
+    started = time.perf_counter()
+    logger.info(f"Fetching {name} data")
+    result = func(*args)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Fetched {name} data in {elapsed_ms:.0f} ms")
+    return result
+
+
+def _transform_launches(
+    launches_data: Iterable[Dict[str, Any]],
+    rockets: Dict[str, Dict[str, Any]],
+    launchpads: Dict[str, Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    """
+    Transform raw launches one at a time as they are decoded.
+    """
+    count = 0
+    for launch in launches_data:
+        count += 1
+        yield transform_launch(launch, rockets, launchpads)
+    logger.info(f"Processed {count} launches")
+
+
+def get_data_from_api(
+    since: Optional[datetime] = None,
+    validators: Optional[Dict[str, Dict[str, str]]] = None,
+    stored: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+) -> Tuple[
+    Optional[Iterator[Dict[str, Any]]],
+    Optional[List[Dict[str, Any]]],
+    Optional[List[Dict[str, Any]]],
+]:
     """
     Fetch launches with full rocket and launchpad info.
+
+    Rockets, launchpads and launches are fetched concurrently over the shared
+    connection pool. Launches are returned as an iterator that decodes and
+    transforms each launch as the response streams in, so the launch history is
+    never held in memory as a whole.
+
+    Args:
+        since (Optional[datetime]): If given, only fetch launches dated on or
+            after it (plus upcoming ones) instead of the full launch history.
+        validators (Optional[Dict[str, Dict[str, str]]]): 'etag' and
+            'last_modified' per endpoint of UPSTREAM_ENDPOINTS. Requests are
+            made conditional on them, and they are updated in place from the
+            responses.
+        stored (Optional[Callable[[str], List[Dict[str, Any]]]]): Returns the
+            stored 'rockets' or 'launchpads', whose fields are embedded in
+            launches when the API reports them unchanged. Required with
+            ``validators``.
+
+    Returns:
+        Tuple: Launches, rockets and launchpads, each None if the API answered
+        304 Not Modified. Launches are fetched again unconditionally when they
+        did not change but rockets or launchpads did, since they embed their
+        fields.
+    """
+    if validators is None:
+        validators = {}
+    for endpoint in UPSTREAM_ENDPOINTS:
+        validators.setdefault(endpoint, {})
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        rockets_future = executor.submit(
+            _timed, "rockets", get_rockets_from_api, validators["rockets"]
+        )
+        launchpads_future = executor.submit(
+            _timed, "launchpads", get_launchpads_from_api, validators["launchpads"]
+        )
+        launches_future = executor.submit(
+            _timed, "launches", get_launches_from_api, since, validators["launches"]
+        )
+        rockets_data = rockets_future.result()
+        launchpads_data = launchpads_future.result()
+        launches_data = launches_future.result()
+
+    if launches_data is None:
+        if rockets_data is None and launchpads_data is None:
+            return None, None, None
+        validators["launches"].clear()
+        launches_data = _timed(
+            "launches", get_launches_from_api, since, validators["launches"]
+        )
+
+    rockets, launchpads = build_lookups(
+        rockets_data if rockets_data is not None else stored("rockets"),
+        launchpads_data if launchpads_data is not None else stored("launchpads"),
+    )
+    launches = _transform_launches(launches_data, rockets, launchpads)
+    return launches, rockets_data, launchpads_data
+
+
+def build_lookups(
+    rockets_data: List[Dict[str, Any]], launchpads_data: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Index the rocket and launchpad fields embedded in launches by id.
     """
-    logger.info("Fetching rockets data")
-    rockets_data = get_rockets_from_api()
     rockets: Dict[str, Dict[str, Any]] = {
         rocket["id"]: {
             "id": rocket["id"],
             "name": rocket["name"],
+            "name_lower": rocket["name"].lower(),
             "success_rate_pct": rocket.get("success_rate_pct"),
         }
         for rocket in rockets_data
     }
-
-    logger.info("Fetching launchpads data")
-    launchpads_data = get_launchpads_from_api()
     launchpads: Dict[str, Dict[str, Any]] = {
         lp["id"]: {
             "id": lp["id"],
             "name": lp["name"],
+            "name_lower": lp["name"].lower(),
             "full_name": lp.get("full_name"),
             "launch_attempts": lp.get("launch_attempts"),
             "launch_successes": lp.get("launch_successes"),
         }
         for lp in launchpads_data
     }
+    return rockets, launchpads
 
-    logger.info("Fetching launches data")
-    launches_data = get_json_from_api("launches")
-    launches: List[Dict[str, Any]] = []
 
-    for launch in launches_data:
-        launch_data: Dict[str, Any] = {
-            "id": launch.get("id"),
-            "name": launch.get("name", "Unknown"),
-            "success": launch.get("success"),
-            "date": datetime.fromisoformat(
-                launch.get("date_utc").replace("Z", "+00:00")
-            ),
-            "details": launch.get("details"),
-            "links": {
-                "img": launch.get("links", {}).get("patch", {}).get("small"),
-                "webcast": launch.get("links", {}).get("webcast"),
-                "article": launch.get("links", {}).get("article"),
-                "wikipedia": launch.get("links", {}).get("wikipedia"),
-            },
-            "rocket": rockets.get(launch.get("rocket"), {}),
-            "launchpad": launchpads.get(launch.get("launchpad"), {}),
-        }
-        launches.append(launch_data)
-
-    logger.info(f"Processed {len(launches)} launches")
-    return launches, rockets_data, launchpads_data
+def get_dimensions_from_api(
+    validators: Optional[Dict[str, Dict[str, str]]] = None,
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]:
+    """
+    Fetch rockets and launchpads concurrently, each conditional on its
+    ``validators`` entry (see ``get_data_from_api``) and None if unchanged.
+    """
+    if validators is None:
+        validators = {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        rockets_future = executor.submit(
+            _timed,
+            "rockets",
+            get_rockets_from_api,
+            validators.setdefault("rockets", {}),
+        )
+        launchpads_future = executor.submit(
+            _timed,
+            "launchpads",
+            get_launchpads_from_api,
+            validators.setdefault("launchpads", {}),
+        )
+        return rockets_future.result(), launchpads_future.result()
 
 
-def get_rockets_from_api() -> List[Dict[str, Any]]:
+def get_rockets_from_api(
+    validators: Optional[Dict[str, str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
     """
-    Fetch all rockets with key features.
+    Fetch all rockets with key features, or None if they did not change since
+    the fetch ``validators`` came from.
     """
-    data = get_json_from_api("rockets")
+    data = get_json_from_api("rockets", validators)
+    if data is None:
+        return None
     rockets = [
         {
             "id": rocket.get("id"),
@@ -111,11 +554,16 @@ def get_rockets_from_api() -> List[Dict[str, Any]]:
     return rockets
 
 
-def get_launchpads_from_api() -> List[Dict[str, Any]]:
+def get_launchpads_from_api(
+    validators: Optional[Dict[str, str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
     """
-    Fetch all launchpads with key features.
+    Fetch all launchpads with key features, or None if they did not change since
+    the fetch ``validators`` came from.
     """
-    data = get_json_from_api("launchpads")
+    data = get_json_from_api("launchpads", validators)
+    if data is None:
+        return None
     launchpads = [
         {
             "id": launchpad.get("id"),
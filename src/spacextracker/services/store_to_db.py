@@ -1,45 +1,466 @@
-from spacextracker.services.spacex_data import get_data_from_api
+import os
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from spacextracker.services.cache_service import bump_data_version
+from spacextracker.services.spacex_data import (
+    QUERY_PAGE_SIZE,
+    UPSTREAM_ENDPOINTS,
+    build_lookups,
+    get_data_from_api,
+    get_dimensions_from_api,
+    query_api,
+    query_options,
+    transform_launch,
+)
+from spacextracker.services.sync_state import get_sync_state, set_sync_state
 from spacextracker.db import (
     launches_collection,
     rockets_collection,
     launchpads_collection,
+    BULK_WRITE_BATCH_SIZE,
 )
 from spacextracker.logger import logger
 
+# Launches dated within this window before the watermark are re-fetched on
+# incremental syncs, since results and details keep changing shortly after launch.
+SYNC_LOOKBACK_DAYS: int = int(os.getenv("SYNC_LOOKBACK_DAYS", 7))
+FULL_SYNC_HOURS: int = int(os.getenv("FULL_SYNC_HOURS", 24))
+# Bump when the stored launch document shape changes, to force a full reconcile
+SCHEMA_VERSION = 2
+
+
+def compute_content_hash(doc: Dict[str, Any]) -> str:
+    """
+    Compute a stable hash of a document's content.
+
+    Args:
+        doc (Dict[str, Any]): Document to hash (without the hash field itself).
+
+    Returns:
+        str: Hex digest identifying the document content.
+    """
+    payload = json.dumps(doc, sort_keys=True, default=str)
+    return sha256(payload.encode()).hexdigest()
+
+
+def bulk_upsert(
+    collection: Collection,
+    docs: Iterable[Dict[str, Any]],
+    batch_size: int = BULK_WRITE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Upsert documents in unordered bulk writes, skipping unchanged ones.
+
+    Each document is stored with a ``content_hash``. Before writing a batch the
+    stored hashes are read back, and documents whose hash did not change are
+    not sent to MongoDB at all.
+
+    Args:
+        collection (Collection): Target MongoDB collection.
+        docs (Iterable[Dict[str, Any]]): Documents keyed by their ``id`` field.
+        batch_size (int): Maximum number of documents per bulk write.
+
+    Returns:
+        Dict[str, int]: Counts under the keys 'inserted', 'updated' and 'unchanged'.
+    """
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    batch: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        ids = [doc["id"] for doc in batch]
+        stored_hashes = {
+            stored["_id"]: stored.get("content_hash")
+            for stored in collection.find(
+                {"_id": {"$in": ids}}, {"_id": 1, "content_hash": 1}
+            )
+        }
+
+        operations = []
+        for doc in batch:
+            content_hash = compute_content_hash(doc)
+            if stored_hashes.get(doc["id"]) == content_hash:
+                stats["unchanged"] += 1
+                continue
+            operations.append(
+                UpdateOne(
+                    {"_id": doc["id"]},
+                    {"$set": {**doc, "content_hash": content_hash}},
+                    upsert=True,
+                )
+            )
+
+        if operations:
+            result = collection.bulk_write(operations, ordered=False)
+            stats["inserted"] += result.upserted_count
+            stats["updated"] += result.matched_count
+        batch.clear()
+
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return stats
+
+
+def _as_utc(value: datetime) -> datetime:
+    """
+    Treat naive datetimes read back from MongoDB as UTC.
+    """
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
-def update_launches_in_db() -> int:
+
+def get_sync_since(full: bool = False) -> Optional[datetime]:
+    """
+    Decide where an incremental launch sync should start.
+
+    Args:
+        full (bool): Force a full reconcile.
+
+    Returns:
+        Optional[datetime]: Start date for an incremental sync, or None when a
+        full reconcile is needed (forced, never synced, stored documents use an
+        older schema, or last full sync is older than FULL_SYNC_HOURS).
+    """
+    if full:
+        return None
+    state = get_sync_state("launches")
+    watermark = state.get("watermark")
+    last_full_sync = state.get("last_full_sync")
+    if not watermark or not last_full_sync:
+        return None
+    if state.get("schema_version") != SCHEMA_VERSION:
+        return None
+    if datetime.now(timezone.utc) - _as_utc(last_full_sync) >= timedelta(
+        hours=FULL_SYNC_HOURS
+    ):
+        return None
+    return _as_utc(watermark) - timedelta(days=SYNC_LOOKBACK_DAYS)
+
+
+def get_upstream_validators(
+    full: bool = False, endpoints: Tuple[str, ...] = UPSTREAM_ENDPOINTS
+) -> Dict[str, Dict[str, str]]:
+    """
+    Read the ETag and Last-Modified values stored by the last successful sync.
+
+    Args:
+        full (bool): Force a full reconcile.
+        endpoints (Tuple[str, ...]): Endpoints to read them for.
+
+    Returns:
+        Dict[str, Dict[str, str]]: 'etag' and 'last_modified' per endpoint.
+        Empty when a full reconcile is forced or the stored launches use an
+        older schema, so the API data is fetched and stored again.
+    """
+    if full:
+        return {}
+    if get_sync_state("launches").get("schema_version") != SCHEMA_VERSION:
+        return {}
+    validators = {}
+    for endpoint in endpoints:
+        state = get_sync_state(endpoint)
+        validators[endpoint] = {
+            key: state[key] for key in ("etag", "last_modified") if state.get(key)
+        }
+    return validators
+
+
+def _stored_documents(endpoint: str) -> List[Dict[str, Any]]:
+    """
+    Read back the stored rockets or launchpads the API reported unchanged.
+    """
+    collection = {"rockets": rockets_collection, "launchpads": launchpads_collection}
+    return list(collection[endpoint].find({}, {"_id": 0, "content_hash": 0}))
+
+
+def _empty_totals() -> Dict[str, int]:
+    return {"processed": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+
+
+def _validator_fields(validators: Dict[str, str]) -> Dict[str, Any]:
+    # Clear values the API stopped sending, so they are not sent again
+    return {"etag": None, "last_modified": None, **validators}
+
+
+def _invalidate_cached_responses() -> None:
+    try:
+        bump_data_version()
+    except Exception as e:
+        logger.error(f"Error bumping cache data version: {e}", exc_info=True)
+
+
+def _finish_sync(
+    totals: Dict[str, int],
+    watermark: Optional[datetime],
+    full_sync: bool,
+    validators: Dict[str, Dict[str, str]],
+    invalidate: bool = True,
+) -> None:
+    """
+    Persist sync state once all writes succeeded and, unless ``invalidate`` is
+    False, invalidate cached responses if any document changed.
+
+    Validators of launches describe the whole list, so they are only stored
+    after a full sync; a later full reconcile answered with 304 then proves
+    that nothing changed since.
+    """
+    state: Dict[str, Any] = {}
+    if watermark:
+        state["watermark"] = watermark
+    if full_sync:
+        if "launches" in validators:
+            state.update(_validator_fields(validators["launches"]))
+        state["last_full_sync"] = datetime.now(timezone.utc)
+        state["schema_version"] = SCHEMA_VERSION
+    if state:
+        set_sync_state("launches", **state)
+    for endpoint in ("rockets", "launchpads"):
+        if endpoint in validators:
+            set_sync_state(endpoint, **_validator_fields(validators[endpoint]))
+
+    if invalidate and (totals["inserted"] or totals["updated"]):
+        _invalidate_cached_responses()
+
+
+def _track_launches(
+    launches: Iterable[Dict[str, Any]], progress: Dict[str, Any]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Pass launches through while counting them and tracking the watermark.
+    """
+    for launch in launches:
+        progress["processed"] += 1
+        launch_date = launch.get("date")
+        if launch_date and not launch.get("upcoming"):
+            if progress["watermark"] is None or launch_date > progress["watermark"]:
+                progress["watermark"] = launch_date
+        yield launch
+
+
+def update_launches_in_db(
+    full: bool = False, batch_size: int = BULK_WRITE_BATCH_SIZE
+) -> Dict[str, int]:
     """
     Fetch the latest SpaceX launches, rockets, and launchpads data from the API
-    and update the corresponding MongoDB collections. Uses upsert to insert or update.
+    and update the corresponding MongoDB collections. Uses unordered bulk upserts
+    and skips documents whose content hash did not change.
+
+    Launches are synced incrementally from the persisted watermark (the date of
+    the latest past launch seen) unless a periodic full reconcile is due. They
+    are streamed from the API straight into batched writes, so memory use does
+    not grow with the size of the launch history.
+
+    Rockets, launchpads and, on full syncs, the launch list are requested
+    conditionally on the ETag and Last-Modified values of the last sync, and
+    those answered with 304 Not Modified are not written. When all three are,
+    nothing is transformed or written at all. The new values are stored once
+    the data is.
+
+    When any document was inserted or updated, the cache data version is bumped
+    so cached API responses are invalidated immediately.
+
+    Args:
+        full (bool): Force a full reconcile instead of an incremental sync.
+        batch_size (int): Maximum number of documents per bulk write.
 
     Returns:
-        int: Number of launches updated/inserted.
+        Dict[str, int]: Number of processed launches under the key 'processed',
+        plus 'inserted', 'updated' and 'unchanged' totals across all collections.
     """
     try:
-        logger.info("Starting update of SpaceX data in MongoDB")
-        launches, rockets, launchpads = get_data_from_api()
+        since = get_sync_since(full)
+        validators = get_upstream_validators(full)
+
         logger.info(
-            f"Fetched {len(launches)} launches, {len(rockets)} rockets, {len(launchpads)} launchpads from API"
+            f"Starting {'incremental' if since else 'full'} update of SpaceX data in MongoDB"
         )
+        launches, rockets, launchpads = get_data_from_api(
+            since=since, validators=validators, stored=_stored_documents
+        )
+        if launches is None:
+            # The launch list is only fetched conditionally on full syncs, and
+            # matching the API is what a full reconcile would establish
+            set_sync_state("launches", last_full_sync=datetime.now(timezone.utc))
+            logger.info("SpaceX data unchanged, skipping update")
+            return _empty_totals()
+        progress: Dict[str, Any] = {"processed": 0, "watermark": None}
 
-        for launch in launches:
-            launches_collection.update_one(
-                {"_id": launch["id"]}, {"$set": launch}, upsert=True
-            )
-
-        for rocket in rockets:
-            rockets_collection.update_one(
-                {"_id": rocket["id"]}, {"$set": rocket}, upsert=True
+        totals = _empty_totals()
+        for name, collection, docs in (
+            ("launches", launches_collection, _track_launches(launches, progress)),
+            ("rockets", rockets_collection, rockets),
+            ("launchpads", launchpads_collection, launchpads),
+        ):
+            if docs is None:
+                logger.info(f"Skipping {name}, unchanged since the last sync")
+                continue
+            stats = bulk_upsert(collection, docs, batch_size)
+            logger.info(
+                f"Stored {name}: {stats['inserted']} inserted, "
+                f"{stats['updated']} updated, {stats['unchanged']} unchanged"
             )
+            for key, value in stats.items():
+                totals[key] += value
 
-        for lp in launchpads:
-            launchpads_collection.update_one(
-                {"_id": lp["id"]}, {"$set": lp}, upsert=True
-            )
+        totals["processed"] = progress["processed"]
+        logger.info(
+            f"Synced {progress['processed']} launches, {len(rockets or [])} rockets, {len(launchpads or [])} launchpads from API"
+        )
 
+        _finish_sync(totals, progress["watermark"], since is None, validators)
         logger.info("SpaceX data update completed successfully")
-        return len(launches)
+        return totals
 
     except Exception as e:
         logger.error(f"Error updating SpaceX data in MongoDB: {e}", exc_info=True)
         raise
+
+
+# Fan-out ingest, run as Celery tasks by tasks.py: store_dimensions once, then
+# store_launch_page for every page of the launches query, then finish_launch_pages
+# ------------------------
+
+
+def store_dimensions(
+    validators: Optional[Dict[str, Dict[str, str]]] = None,
+    batch_size: int = BULK_WRITE_BATCH_SIZE,
+) -> Tuple[Dict[str, int], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Fetch and store rockets and launchpads, invalidating cached responses if
+    any of them changed.
+
+    Args:
+        validators (Optional[Dict[str, Dict[str, str]]]): Stored validators of
+            rockets and launchpads. They are fetched conditionally on them and
+            not written if unchanged; the dict is updated in place.
+        batch_size (int): Maximum number of documents per bulk write.
+
+    Returns:
+        Tuple: Write counts, and the rocket and launchpad fields embedded in
+        launches keyed by id, for ``store_launch_page``.
+    """
+    rockets_data, launchpads_data = get_dimensions_from_api(validators)
+    totals = _empty_totals()
+    for collection, docs in (
+        (rockets_collection, rockets_data),
+        (launchpads_collection, launchpads_data),
+    ):
+        if docs is None:
+            continue
+        for key, value in bulk_upsert(collection, docs, batch_size).items():
+            totals[key] += value
+    if totals["inserted"] or totals["updated"]:
+        _invalidate_cached_responses()
+    rockets, launchpads = build_lookups(
+        rockets_data if rockets_data is not None else _stored_documents("rockets"),
+        (
+            launchpads_data
+            if launchpads_data is not None
+            else _stored_documents("launchpads")
+        ),
+    )
+    return totals, rockets, launchpads
+
+
+def store_launch_page(
+    query: Dict[str, Any],
+    page: int,
+    rockets: Dict[str, Dict[str, Any]],
+    launchpads: Dict[str, Dict[str, Any]],
+    page_size: int = QUERY_PAGE_SIZE,
+    batch_size: int = BULK_WRITE_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Fetch one page of a launches query, transform it and store it, invalidating
+    cached responses if any launch changed.
+
+    Args:
+        query (Dict[str, Any]): ``/launches/query`` filter.
+        page (int): Page number, from 1.
+        rockets (Dict[str, Dict[str, Any]]): Embedded rocket fields by id.
+        launchpads (Dict[str, Dict[str, Any]]): Embedded launchpad fields by id.
+        page_size (int): Launches per page.
+        batch_size (int): Maximum number of documents per bulk write.
+
+    Returns:
+        Dict[str, Any]: Counts as returned by ``update_launches_in_db``, the
+        page's watermark as an ISO string (or None), and seconds spent on
+        'fetch_s', 'transform_s' and 'write_s'.
+    """
+    started = time.perf_counter()
+    result = query_api("launches", query, query_options(page, page_size))
+    fetched = time.perf_counter()
+    docs = [transform_launch(launch, rockets, launchpads) for launch in result["docs"]]
+    transformed = time.perf_counter()
+    progress: Dict[str, Any] = {"processed": 0, "watermark": None}
+    stats = bulk_upsert(
+        launches_collection, _track_launches(docs, progress), batch_size
+    )
+    written = time.perf_counter()
+    if stats["inserted"] or stats["updated"]:
+        # Right away, as the chord callback does not run if another page fails
+        _invalidate_cached_responses()
+    watermark = progress["watermark"]
+    return {
+        **stats,
+        "processed": progress["processed"],
+        "watermark": watermark.isoformat() if watermark else None,
+        "fetch_s": fetched - started,
+        "transform_s": transformed - fetched,
+        "write_s": written - transformed,
+    }
+
+
+def finish_launch_pages(
+    pages: List[Dict[str, Any]],
+    dimensions: Dict[str, int],
+    full_sync: bool,
+    validators: Dict[str, Dict[str, str]],
+) -> Dict[str, Any]:
+    """
+    Combine the results of ``store_launch_page`` and persist the sync state.
+
+    Args:
+        pages (List[Dict[str, Any]]): Results of every page.
+        dimensions (Dict[str, int]): Write counts of ``store_dimensions``.
+        full_sync (bool): Whether the pages covered every launch.
+        validators (Dict[str, Dict[str, str]]): Updated by ``store_dimensions``.
+
+    Returns:
+        Dict[str, Any]: Totals as returned by ``update_launches_in_db``, plus
+        the seconds all pages spent on each stage under 'stages_s'.
+    """
+    totals = _empty_totals()
+    for key in ("inserted", "updated", "unchanged"):
+        totals[key] += dimensions.get(key, 0)
+    stages = {"fetch_s": 0.0, "transform_s": 0.0, "write_s": 0.0}
+    watermark: Optional[datetime] = None
+    for page in pages:
+        for key in totals:
+            totals[key] += page[key]
+        for key in stages:
+            stages[key] += page[key]
+        if page["watermark"]:
+            page_watermark = datetime.fromisoformat(page["watermark"])
+            if watermark is None or page_watermark > watermark:
+                watermark = page_watermark
+
+    # Pages and dimensions invalidated cached responses as they were written
+    _finish_sync(totals, watermark, full_sync, validators, invalidate=False)
+    logger.info(
+        f"Stored {totals['processed']} launches from {len(pages)} pages: "
+        f"{totals['inserted']} inserted, {totals['updated']} updated, "
+        f"{totals['unchanged']} unchanged"
+    )
+    return {
+        **totals,
+        "stages_s": {key: round(value, 3) for key, value in stages.items()},
+    }
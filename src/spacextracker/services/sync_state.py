@@ -0,0 +1,41 @@
+from typing import Any, Dict
+from spacextracker.db import async_sync_state_collection, sync_state_collection
+
+
+def get_sync_state(name: str) -> Dict[str, Any]:
+    """
+    Read the persisted sync state for an endpoint.
+
+    Args:
+        name (str): Name of the synced endpoint, e.g. 'launches'.
+
+    Returns:
+        Dict[str, Any]: Stored state fields, or an empty dict if never synced.
+    """
+    state = sync_state_collection.find_one({"_id": name}, {"_id": 0})
+    return state or {}
+
+
+async def get_sync_state_async(name: str) -> Dict[str, Any]:
+    """
+    Read the persisted sync state for an endpoint from the request path.
+
+    Args:
+        name (str): Name of the synced endpoint, e.g. 'launches'.
+
+    Returns:
+        Dict[str, Any]: Stored state fields, or an empty dict if never synced.
+    """
+    state = await async_sync_state_collection.find_one({"_id": name}, {"_id": 0})
+    return state or {}
+
+
+def set_sync_state(name: str, **fields: Any) -> None:
+    """
+    Persist sync state fields for an endpoint.
+
+    Args:
+        name (str): Name of the synced endpoint, e.g. 'launches'.
+        **fields: State fields to set.
+    """
+    sync_state_collection.update_one({"_id": name}, {"$set": fields}, upsert=True)
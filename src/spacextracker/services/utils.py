@@ -1,4 +1,8 @@
+import base64
+import codecs
+import json
 from datetime import datetime, time, date
+from typing import Any, Iterable, Iterator, Tuple, Union
 
 
 def to_datetime(d: date, end: bool = False) -> datetime:
@@ -15,3 +19,95 @@ def to_datetime(d: date, end: bool = False) -> datetime:
     if end:
         return datetime.combine(d, time.max)
     return datetime.combine(d, time.min)
+
+
+def encode_cursor(launch_date: Union[datetime, str], launch_id: str) -> str:
+    """
+    Encode a (date, id) keyset position as an opaque URL-safe token.
+
+    Args:
+        launch_date (Union[datetime, str]): Date of the last launch on a page,
+            as a datetime or its string form from a cached response.
+        launch_id (str): Id of the last launch on a page.
+
+    Returns:
+        str: Cursor token for the next page.
+    """
+    if isinstance(launch_date, str):
+        launch_date = datetime.fromisoformat(launch_date)
+    payload = json.dumps([launch_date.isoformat(), launch_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        cursor (str): Cursor token.
+
+    Returns:
+        Tuple[datetime, str]: Date and id of the last launch of the previous page.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        launch_date, launch_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(launch_date), str(launch_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Decode the items of a top-level JSON array as its bytes arrive.
+
+    Only the current chunk and the item being decoded are held in memory, so
+    arbitrarily long arrays can be processed with a flat memory profile.
+
+    Args:
+        chunks (Iterable[bytes]): UTF-8 encoded pieces of a JSON array.
+
+    Yields:
+        Any: Each decoded array item, in order.
+
+    Raises:
+        ValueError: If the payload is not a JSON array or ends prematurely.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+
+    for chunk in chunks:
+        buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # item continues in the next chunk
+            delimited = end < len(buffer) and buffer[end] in " \t\r\n,]"
+            if not isinstance(item, (dict, list)) and not delimited:
+                # A number cut off at the chunk boundary ("0." or "1e") still
+                # decodes, so a scalar is only complete once a delimiter follows
+                break
+            yield item
+            pos = end
+
+    raise ValueError("Unexpected end of JSON array")
@@ -1,24 +1,227 @@
-from typing import Dict
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+from celery import chord
 from .celery_app import celery, celery_logger
-from .services.store_to_db import update_launches_in_db
+from .db import redis_client
+from .metrics import record_task
+from .profiling import profile_run
+from .services.data_access import warm_caches
+from .services.indexes import ensure_indexes
+from .services.spacex_data import (
+    QUERY_PAGE_SIZE,
+    count_query_pages,
+    launch_list_changed,
+    launches_query,
+)
+from .services.store_to_db import (
+    finish_launch_pages,
+    get_sync_since,
+    get_upstream_validators,
+    store_dimensions,
+    store_launch_page,
+)
+
+# Launches fetched, transformed and written by each ingest_launch_page task
+INGEST_PAGE_SIZE: int = int(os.getenv("INGEST_PAGE_SIZE", QUERY_PAGE_SIZE))
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run_async(coro: Awaitable[T]) -> T:
+    # The async MongoDB and Redis clients bind to the loop they first run on,
+    # so each worker process keeps one loop for its whole life
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def _record_run(task: str, duration: float, processed: int, failed: bool) -> None:
+    try:
+        record_task(redis_client, task, duration, processed, failed)
+    except Exception as e:
+        celery_logger.error(f"Recording metrics of '{task}' failed: {e}")
+
+
+def _launches_unchanged(
+    since: Optional[datetime],
+    dimensions: Dict[str, int],
+    validators: Dict[str, Dict[str, str]],
+) -> bool:
+    # Launch pages come from /launches/query, which has no validators, so a
+    # due full reconcile first asks /launches whether anything changed. Changed
+    # rockets or launchpads are embedded in launches, which then need a rewrite.
+    if since is not None or not validators.get("launches"):
+        return False
+    if dimensions["inserted"] or dimensions["updated"]:
+        return False
+    return not launch_list_changed(validators["launches"])
+
 
 @celery.task
-def fetch_and_store_launches() -> Dict[str, int]:
+def fetch_and_store_launches(
+    full: bool = False, profile: bool = False
+) -> Dict[str, Any]:
     """
-    Fetch latest launches from SpaceX API and store them in MongoDB.
+    Start an ingest of SpaceX API data into MongoDB.
+
+    Rockets and launchpads are fetched and stored here, once, and skipped when
+    the API answers their conditional requests with 304 Not Modified. A due
+    full reconcile then asks the same of the launch list, and when nothing
+    changed no launch page is dispatched; the callback still records the full
+    sync. Otherwise launches are fanned out as one ``ingest_launch_page`` task per page of the
+    launches query, in a chord whose ``finalize_ingest`` callback stores the
+    sync state, bumps the cache data version and warms the caches. Pages run in
+    parallel across all Celery workers.
+
+    Args:
+        full (bool): Force a full reconcile instead of an incremental sync.
+        profile (bool): Write profiles of this task and its page tasks to
+            PROFILE_DIR; runs are also profiled at PROFILE_SAMPLE_RATE.
 
     Returns:
-        Dict[str, int]: Number of processed launches under the key 'processed'.
+        Dict[str, Any]: Number of dispatched pages under 'pages', the write
+        counts of rockets and launchpads under 'dimensions', and seconds spent
+        on each stage of this task under 'stages_s'.
     """
+    started_at = time.time()
+    started = time.perf_counter()
     try:
         celery_logger.info("Celery task 'fetch_and_store_launches' started")
-        count = update_launches_in_db()
+        with profile_run("fetch_and_store_launches", force=profile):
+            ensure_indexes()
+            since = get_sync_since(full)
+            validators = get_upstream_validators(full)
+            prepared = time.perf_counter()
+            dimensions, rockets, launchpads = store_dimensions(validators)
+            stored = time.perf_counter()
+            query = launches_query(since)
+            if _launches_unchanged(since, dimensions, validators):
+                pages = 0
+            else:
+                pages = count_query_pages("launches", query, INGEST_PAGE_SIZE)
+
+        finalize = finalize_ingest.s(dimensions, since is None, validators, started_at)
+        header = [
+            ingest_launch_page.s(
+                query, page, rockets, launchpads, INGEST_PAGE_SIZE, profile
+            )
+            for page in range(1, pages + 1)
+        ]
+        if header:
+            chord(header)(finalize)
+        else:
+            finalize.delay([])
+        dispatched = time.perf_counter()
+
+        stages = {
+            "prepare_s": round(prepared - started, 3),
+            "dimensions_s": round(stored - prepared, 3),
+            "dispatch_s": round(dispatched - stored, 3),
+        }
         celery_logger.info(
-            f"Celery task 'fetch_and_store_launches' completed successfully, processed {count} launches"
+            f"Celery task 'fetch_and_store_launches' dispatched {pages} "
+            f"{'full' if since is None else 'incremental'} launch pages "
+            f"(stages: {stages})"
         )
-        return {"processed": count}
+        return {"pages": pages, "dimensions": dimensions, "stages_s": stages}
     except Exception as e:
+        _record_run(
+            "fetch_and_store_launches", time.perf_counter() - started, 0, failed=True
+        )
         celery_logger.error(
             f"Celery task 'fetch_and_store_launches' failed: {e}", exc_info=True
         )
         raise
+
+
+@celery.task
+def ingest_launch_page(
+    query: Dict[str, Any],
+    page: int,
+    rockets: Dict[str, Dict[str, Any]],
+    launchpads: Dict[str, Dict[str, Any]],
+    page_size: int = QUERY_PAGE_SIZE,
+    profile: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fetch, transform and store one page of launches.
+
+    Returns:
+        Dict[str, Any]: Result of ``store_launch_page``.
+    """
+    started = time.perf_counter()
+    try:
+        with profile_run(f"ingest_launch_page_{page}", force=profile):
+            result = store_launch_page(
+                query, page, rockets, launchpads, page_size=page_size
+            )
+        _record_run(
+            "ingest_launch_page",
+            time.perf_counter() - started,
+            result["processed"],
+            failed=False,
+        )
+        return result
+    except Exception as e:
+        _record_run("ingest_launch_page", time.perf_counter() - started, 0, failed=True)
+        celery_logger.error(
+            f"Celery task 'ingest_launch_page' failed on page {page}: {e}",
+            exc_info=True,
+        )
+        raise
+
+
+@celery.task
+def finalize_ingest(
+    pages: List[Dict[str, Any]],
+    dimensions: Dict[str, int],
+    full_sync: bool,
+    validators: Dict[str, Dict[str, str]],
+    started_at: float,
+) -> Dict[str, Any]:
+    """
+    Store the sync state of a fanned-out ingest and warm the caches.
+
+    Returns:
+        Dict[str, Any]: Totals as returned by ``update_launches_in_db``, plus
+        'pages', and under 'stages_s' the seconds all pages spent fetching,
+        transforming and writing, the wall-clock seconds from the start of
+        ``fetch_and_store_launches`` to this task ('pipeline_s') and of this
+        task ('finalize_s').
+    """
+    started = time.perf_counter()
+    pipeline_s = time.time() - started_at
+    try:
+        stats = finish_launch_pages(pages, dimensions, full_sync, validators)
+        if stats["inserted"] or stats["updated"]:
+            try:
+                _run_async(warm_caches())
+            except Exception as e:
+                celery_logger.error(f"Warming caches failed: {e}", exc_info=True)
+        stats["pages"] = len(pages)
+        stats["stages_s"]["pipeline_s"] = round(pipeline_s, 3)
+        stats["stages_s"]["finalize_s"] = round(time.perf_counter() - started, 3)
+        _record_run(
+            "fetch_and_store_launches",
+            time.time() - started_at,
+            stats["processed"],
+            failed=False,
+        )
+        celery_logger.info(
+            f"Celery task 'fetch_and_store_launches' completed successfully, processed {stats['processed']} launches "
+            f"({stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged) "
+            f"in {len(pages)} pages (stages: {stats['stages_s']})"
+        )
+        return stats
+    except Exception as e:
+        _record_run(
+            "fetch_and_store_launches", time.time() - started_at, 0, failed=True
+        )
+        celery_logger.error(f"Celery task 'finalize_ingest' failed: {e}", exc_info=True)
+        raise
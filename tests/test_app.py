@@ -1,36 +1,287 @@
+import csv
+import gzip
+import io
+import time
+from datetime import date, datetime
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+
+from spacextracker.services.cache_service import local_cache
 from src.spacextracker.app import app
+from src.spacextracker.services.utils import encode_cursor
 
 client = TestClient(app)
 
+VALIDATORS = {
+    "ETag": '"v3-get_launches:abc"',
+    "Cache-Control": "no-cache",
+    "Last-Modified": "Tue, 16 Sep 2025 05:20:00 GMT",
+}
+
+
+def patch_cached(name, **kwargs):
+    """
+    Patch a ``redis_cache`` decorated function of the app, keeping the
+    synchronous ``cache_key`` the response cache derives its key from.
+    """
+    cache_key = MagicMock(side_effect=lambda **kw: f"{name}:{sorted(kw.items())}")
+    return patch(
+        f"src.spacextracker.app.{name}", cache_key=cache_key, soft_ttl=None, **kwargs
+    )
+
+
+@pytest.fixture(autouse=True)
+def response_redis():
+    # Patched where the app imports it from. Every Redis lookup misses and
+    # writes go to a mocked pipeline; the L1 cache is emptied around each test.
+    with (
+        patch(
+            "spacextracker.services.response_cache.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch("spacextracker.services.response_cache.get_data_version", return_value=1),
+    ):
+        local_cache.clear()
+        mock_redis.hmget.return_value = [None, None, None]
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        mock_redis.pipeline = MagicMock()
+        mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+        yield mock_redis
+        local_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def validators():
+    with patch(
+        "src.spacextracker.app.conditional_headers", return_value=VALIDATORS
+    ) as mock_validators:
+        yield mock_validators
+
 
 # launches API test cases
 # ------------------------
 def test_get_launches_success():
-    with patch("src.spacextracker.app.get_launches") as mock_get:
+    with patch_cached("get_launches") as mock_get:
         mock_get.return_value = [{"id": "1", "name": "Falcon 1"}]
         response = client.get("/launches")
         assert response.status_code == 200
         assert response.json() == [{"id": "1", "name": "Falcon 1"}]
 
 
+def test_get_launches_paging_params_and_next_cursor():
+    launches = [
+        {"id": "1", "date": "2025-01-01 00:00:00"},
+        {"id": "2", "date": "2025-01-02 00:00:00"},
+    ]
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = launches
+        response = client.get("/launches?limit=2&sort=desc")
+        assert response.status_code == 200
+        mock_get.assert_called_once_with(limit=2, sort="desc")
+        assert response.headers["x-next-cursor"] == encode_cursor(
+            "2025-01-02 00:00:00", "2"
+        )
+
+
+def test_get_launches_last_page_has_no_cursor():
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = [{"id": "1", "date": "2025-01-01 00:00:00"}]
+        response = client.get("/launches?limit=2")
+        assert response.status_code == 200
+        assert "x-next-cursor" not in response.headers
+
+
+def test_get_launches_invalid_limit():
+    response = client.get("/launches?limit=0")
+    assert response.status_code == 422
+    response = client.get("/launches?sort=sideways")
+    assert response.status_code == 422
+
+
 def test_get_launches_db_error():
-    with patch("src.spacextracker.app.get_launches") as mock_get:
+    with patch_cached("get_launches") as mock_get:
         mock_get.side_effect = Exception("DB connection failed")
         response = client.get("/launches")
         assert response.status_code == 500
         assert "DB connection failed" in response.text
 
 
+def test_get_launches_while_seeding_returns_retry_after():
+    with patch_cached("get_launches") as mock_get:
+        mock_get.side_effect = HTTPException(
+            status_code=503, detail="Still loading", headers={"Retry-After": "10"}
+        )
+        response = client.get("/launches")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "10"
+
+
+def test_get_launches_serves_stored_launches_without_sync_state():
+    # Launches stored by a release without the seeded marker, upstream down.
+    # Patched where the app imports them from.
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=[{"id": "1"}])
+    with (
+        patch.dict("spacextracker.services.seeding._seeding", {"done": False}),
+        patch("spacextracker.services.seeding.get_sync_state_async", return_value={}),
+        patch(
+            "spacextracker.services.seeding.async_launches_collection"
+        ) as mock_seed_launches,
+        patch(
+            "spacextracker.services.seeding.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_seed_redis,
+        patch(
+            "spacextracker.services.seeding.update_launches_in_db",
+            side_effect=ConnectionError("SpaceX API unreachable"),
+        ) as mock_update,
+        patch(
+            "spacextracker.services.data_access.async_launches_collection"
+        ) as mock_launches,
+        patch(
+            "spacextracker.services.cache_service.get_data_version",
+            side_effect=ConnectionError("Redis down"),
+        ),
+    ):
+        mock_seed_launches.find_one = AsyncMock(return_value={"_id": "l1"})
+        mock_seed_redis.exists.return_value = 0
+        mock_launches.find.return_value = cursor
+        response = client.get("/launches")
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": "1"}]
+    mock_update.assert_not_called()
+
+
+def test_get_launches_sets_validators():
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = [{"id": "1"}]
+        response = client.get("/launches?rocket_name=Falcon")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == VALIDATORS["ETag"]
+    assert response.headers["Last-Modified"] == VALIDATORS["Last-Modified"]
+
+
+def test_get_launches_if_none_match_returns_304(validators):
+    with patch_cached("get_launches") as mock_get:
+        response = client.get(
+            "/launches?rocket_name=Falcon",
+            headers={"If-None-Match": VALIDATORS["ETag"]},
+        )
+        mock_get.assert_not_called()
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == VALIDATORS["ETag"]
+    assert validators.call_args.args[1] == {
+        "rocket_name": "Falcon",
+        "limit": 100,
+        "sort": "asc",
+    }
+
+
+def test_get_launches_gzip_etag_returns_304():
+    with patch_cached("get_launches") as mock_get:
+        response = client.get(
+            "/launches",
+            headers={"If-None-Match": '"v3-get_launches:abc-gzip"'},
+        )
+        mock_get.assert_not_called()
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"v3-get_launches:abc-gzip"'
+
+
+def test_get_launches_stale_etag_returns_body():
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = [{"id": "1"}]
+        response = client.get("/launches", headers={"If-None-Match": '"v2-old"'})
+    assert response.status_code == 200
+    assert response.json() == [{"id": "1"}]
+
+
+def test_get_launches_without_validators_when_redis_down(validators):
+    validators.side_effect = ConnectionError("Redis down")
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = [{"id": "1"}]
+        response = client.get("/launches", headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+def test_get_launches_compressed_for_gzip_clients(response_redis):
+    launches = [{"id": str(i), "details": "x" * 100} for i in range(20)]
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = launches
+        response = client.get("/launches", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == '"v3-get_launches:abc-gzip"'
+    assert response.json() == launches
+
+    pipe = response_redis.pipeline.return_value.__aenter__.return_value
+    stored = pipe.hset.call_args.kwargs["mapping"]
+    assert set(stored) == {"identity", "gzip", "br", "headers", "generated_at"}
+
+
+def test_get_launches_repeat_request_served_from_stored_body(response_redis):
+    launches = [{"id": str(i), "details": "x" * 100} for i in range(20)]
+    with patch_cached("get_launches") as mock_get:
+        mock_get.return_value = launches
+        first = client.get("/launches", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/launches", headers={"Accept-Encoding": "gzip"})
+        mock_get.assert_called_once()
+
+    pipe = response_redis.pipeline.return_value.__aenter__.return_value
+    stored = pipe.hset.call_args.kwargs["mapping"]
+    # The second request is answered from L1 without reading Redis again
+    response_redis.hmget.assert_called_once()
+    assert second.headers["Content-Encoding"] == "gzip"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.content == gzip.decompress(stored["gzip"])
+    assert second.json() == launches
+
+
+def test_get_launches_served_from_response_cache(response_redis):
+    response_redis.hmget.return_value = [
+        b'[{"id":"1"}]',
+        b'{"X-Next-Cursor": "abc"}',
+        str(time.time()).encode(),
+    ]
+    with patch_cached("get_launches") as mock_get:
+        mock_get.soft_ttl = None
+        response = client.get("/launches?limit=1", headers={"Accept-Encoding": ""})
+        mock_get.assert_not_called()
+    assert response.status_code == 200
+    assert response.content == b'[{"id":"1"}]'
+    assert response.headers["X-Next-Cursor"] == "abc"
+    assert "Content-Encoding" not in response.headers
+
+
+def test_get_launches_without_response_cache():
+    with (
+        patch("src.spacextracker.app.RESPONSE_CACHE_ENABLED", False),
+        patch_cached("get_launches") as mock_get,
+    ):
+        mock_get.return_value = [{"id": "1"}]
+        response = client.get("/launches")
+    assert response.status_code == 200
+    assert response.json() == [{"id": "1"}]
+    assert response.headers["ETag"] == VALIDATORS["ETag"]
+
+
 def test_get_launches_invalid_params():
     response = client.get("/launches?start_date=invalid-date")
     assert response.status_code == 422  # FastAPI validation error
 
 
 def test_launches_valid_params_success():
-    with patch("src.spacextracker.app.get_launches") as mock_get:
+    with patch_cached("get_launches") as mock_get:
         mock_get.return_value = [{"id": "2"}]
         response = client.get(
             "/launches?start_date=2025-01-01&end_date=2025-01-31&rocket_name=Falcon"
@@ -86,15 +337,55 @@ def test_fetch_statistics_success():
         "launchpad_totals": {"LC-39A": {"attempts": 10, "successes": 9}},
         "launch_frequency": {"monthly": [1, 2, 3], "yearly": [5, 10, 15]},
     }
-    with patch("src.spacextracker.app.get_all_statistics") as mock_get:
+    with patch_cached("get_all_statistics") as mock_get:
         mock_get.return_value = mock_stats
         response = client.get("/statistics")
         assert response.status_code == 200
         assert response.json() == mock_stats
 
 
+def test_fetch_statistics_with_filters():
+    with patch_cached("get_all_statistics") as mock_get:
+        mock_get.return_value = {}
+        response = client.get(
+            "/statistics?start_date=2025-01-01&end_date=2025-01-31&rocket_name=Falcon"
+        )
+        assert response.status_code == 200
+        mock_get.assert_called_once_with(
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 1, 31),
+            rocket_name="Falcon",
+        )
+
+
+def test_fetch_statistics_if_modified_since_returns_304():
+    with patch_cached("get_all_statistics") as mock_stats:
+        response = client.get(
+            "/statistics",
+            headers={"If-Modified-Since": "Wed, 17 Sep 2025 00:00:00 GMT"},
+        )
+        mock_stats.assert_not_called()
+    assert response.status_code == 304
+
+
+def test_fetch_statistics_modified_since_older_date_returns_body():
+    with patch_cached("get_all_statistics") as mock_stats:
+        mock_stats.return_value = {"launch_frequency": {}}
+        response = client.get(
+            "/statistics",
+            headers={"If-Modified-Since": "Mon, 15 Sep 2025 00:00:00 GMT"},
+        )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == VALIDATORS["ETag"]
+
+
+def test_fetch_statistics_invalid_params():
+    response = client.get("/statistics?start_date=2025-01-01")
+    assert response.status_code == 422
+
+
 def test_fetch_statistics_generic_exception():
-    with patch("src.spacextracker.app.get_all_statistics") as mock_get:
+    with patch_cached("get_all_statistics") as mock_get:
         mock_get.side_effect = Exception("Database error")
         response = client.get("/statistics")
         assert response.status_code == 500
@@ -107,8 +398,10 @@ def test_fetch_statistics_generic_exception():
 def test_download_launches_success():
     mock_launches = [{"id": "1", "name": "Falcon 9"}]
 
-    with patch("src.spacextracker.app.get_launches", return_value=mock_launches):
-        response = client.get("/launches/download")
+    with patch(
+        "src.spacextracker.app.iter_launches", return_value=iter(mock_launches)
+    ) as mock_iter:
+        response = client.get("/launches/download?rocket_name=Falcon")
 
         assert response.status_code == 200
         assert response.json() == mock_launches
@@ -116,10 +409,70 @@ def test_download_launches_success():
             response.headers["content-disposition"]
             == "attachment; filename=launches.json"
         )
+        mock_iter.assert_called_once_with(rocket_name="Falcon")
+
+
+def test_download_launches_ndjson():
+    mock_launches = [
+        {"id": "1", "date": datetime(2025, 1, 1, 12, 0)},
+        {"id": "2", "date": datetime(2025, 1, 2, 12, 0)},
+    ]
+
+    with patch("src.spacextracker.app.iter_launches", return_value=iter(mock_launches)):
+        response = client.get("/launches/download?format=ndjson")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text.splitlines() == [
+            '{"id": "1", "date": "2025-01-01T12:00:00"}',
+            '{"id": "2", "date": "2025-01-02T12:00:00"}',
+        ]
+        assert (
+            response.headers["content-disposition"]
+            == "attachment; filename=launches.ndjson"
+        )
+
+
+def test_download_launches_csv():
+    mock_launches = [
+        {
+            "id": "1",
+            "name": "Demo, Flight",
+            "date": datetime(2025, 1, 1),
+            "success": True,
+            "rocket": {"name": "Falcon 9"},
+            "launchpad": {"name": "LC-39A"},
+            "links": {"webcast": "https://example.com/w"},
+        }
+    ]
+
+    with patch("src.spacextracker.app.iter_launches", return_value=iter(mock_launches)):
+        response = client.get("/launches/download?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0][:3] == ["id", "name", "date"]
+        assert rows[1][:7] == [
+            "1",
+            "Demo, Flight",
+            "2025-01-01T00:00:00",
+            "True",
+            "",
+            "Falcon 9",
+            "LC-39A",
+        ]
+
+
+def test_download_launches_invalid_format():
+    response = client.get("/launches/download?format=xml")
+    assert response.status_code == 422
 
 
 def test_download_launches_exception():
-    with patch("src.spacextracker.app.get_launches", side_effect=Exception("DB error")):
+    with patch(
+        "src.spacextracker.app.iter_launches", side_effect=Exception("DB error")
+    ):
         response = client.get("/launches/download")
         assert response.status_code == 500
         assert "DB error" in response.json()["detail"]
@@ -135,7 +488,7 @@ def test_download_statistics_success():
         },
     }
 
-    with patch("src.spacextracker.app.get_all_statistics", return_value=mock_stats):
+    with patch_cached("get_all_statistics", return_value=mock_stats):
         response = client.get("/statistics/download")
         assert response.status_code == 200
         assert response.json() == mock_stats
@@ -146,9 +499,79 @@ def test_download_statistics_success():
 
 
 def test_download_statistics_exception():
-    with patch(
-        "src.spacextracker.app.get_all_statistics", side_effect=Exception("API error")
-    ):
+    with patch_cached("get_all_statistics", side_effect=Exception("API error")):
         response = client.get("/statistics/download")
         assert response.status_code == 500
         assert "API error" in response.json()["detail"]
+
+
+def test_cache_stats():
+    stats = {
+        "l1": {"hits": 2, "misses": 1, "evictions": 0},
+        "redis": {"hits": 1, "misses": 1, "errors": 0},
+    }
+    with patch("src.spacextracker.app.get_cache_stats", return_value=stats):
+        response = client.get("/cache/stats")
+    assert response.status_code == 200
+    assert response.json() == stats
+
+
+def test_metrics():
+    task_totals = {
+        b"duration:fetch_and_store_launches:1": b"2",
+        b"duration_sum:fetch_and_store_launches": b"7.5",
+        b"processed:fetch_and_store_launches": b"410",
+        b"failures:fetch_and_store_launches": b"1",
+    }
+    with (
+        patch_cached("get_launches", return_value=[]),
+        patch(
+            "src.spacextracker.app.async_redis_client", new_callable=AsyncMock
+        ) as mock_redis,
+    ):
+        mock_redis.hgetall.return_value = task_totals
+        client.get("/launches")
+        client.get("/no-such-page")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert (
+        'spacextracker_http_requests_total{method="GET",route="/launches",status="200"}'
+        in body
+    )
+    assert 'route="other",status="404"' in body
+    assert "/no-such-page" not in body
+    assert (
+        'spacextracker_celery_task_processed_total{task="fetch_and_store_launches"} 410.0'
+        in body
+    )
+    assert (
+        'spacextracker_celery_task_duration_seconds_count{task="fetch_and_store_launches"} 2.0'
+        in body
+    )
+
+
+def test_metrics_label_unknown_methods_as_other():
+    with patch(
+        "src.spacextracker.app.async_redis_client", new_callable=AsyncMock
+    ) as mock_redis:
+        mock_redis.hgetall.return_value = {}
+        client.request("FOO-BAR", "/launches")
+        response = client.get("/metrics")
+
+    assert 'method="other",route="/launches",status="405"' in response.text
+    assert "FOO-BAR" not in response.text
+
+
+def test_metrics_without_redis():
+    with patch(
+        "src.spacextracker.app.async_redis_client", new_callable=AsyncMock
+    ) as mock_redis:
+        mock_redis.hgetall.side_effect = ConnectionError("Redis down")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "spacextracker_http_request_duration_seconds" in response.text
+    assert "spacextracker_celery_task" not in response.text
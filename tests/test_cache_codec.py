@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.spacextracker.services import cache_codec
+
+LAUNCHES = [
+    {
+        "id": f"l{i}",
+        "name": f"Launch {i}",
+        "date": datetime(2020, 1, 1, 12, i),
+        "success": i % 2 == 0,
+        "details": "x" * 200,
+        "rocket": {"id": "r1", "name": "Falcon 9"},
+    }
+    for i in range(50)
+]
+
+
+@pytest.mark.parametrize("name", ["msgpack", "json"])
+def test_codec_round_trip(name):
+    codec = cache_codec.get_codec(name)
+    value = {"count": 3, "names": ["a", "b"], "nested": {"ok": True, "none": None}}
+    assert codec.loads(codec.dumps(value)) == value
+
+
+def test_msgpack_round_trips_datetimes():
+    codec = cache_codec.get_codec("msgpack")
+    naive = datetime(2025, 9, 1, 12, 30, 15, 123000)
+    aware = datetime(2025, 9, 1, 12, 30, tzinfo=timezone.utc)
+
+    decoded = codec.loads(codec.dumps({"naive": naive, "aware": aware}))
+
+    assert decoded == {"naive": naive, "aware": aware}
+    assert decoded["naive"].tzinfo is None
+    assert decoded["aware"].tzinfo == timezone.utc
+
+
+def test_json_codec_stringifies_datetimes():
+    codec = cache_codec.get_codec("json")
+    decoded = codec.loads(codec.dumps({"date": datetime(2025, 9, 1)}))
+    assert decoded == {"date": "2025-09-01 00:00:00"}
+
+
+def test_compression_above_threshold_only():
+    codec = cache_codec.CompressedCodec(cache_codec.MsgpackCodec(), min_size=1024)
+
+    small = codec.dumps({"id": "l1"})
+    large = codec.dumps(LAUNCHES)
+
+    assert small[:1] == b"\x00"
+    assert large[:1] == b"\x01"
+    assert len(large) < len(cache_codec.MsgpackCodec().dumps(LAUNCHES))
+    assert codec.loads(small) == {"id": "l1"}
+    assert codec.loads(large) == LAUNCHES
+
+
+def test_unknown_header_rejected():
+    codec = cache_codec.get_codec("msgpack")
+    with pytest.raises(ValueError):
+        codec.loads(b'{"sum": 3}')
+
+
+def test_unknown_codec_name():
+    with pytest.raises(ValueError):
+        cache_codec.get_codec("pickle")
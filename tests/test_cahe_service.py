@@ -1,35 +1,64 @@
-import json
-from unittest.mock import patch
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
 
 from src.spacextracker.services import cache_service
 
 
-def sample_func(x, y):
+@pytest.fixture(autouse=True)
+def fresh_cache_state():
+    # Read the data version from Redis on every call and start with an empty L1
+    cache_service.local_cache.clear()
+    with patch(
+        "src.spacextracker.services.cache_service.DATA_VERSION_CHECK_SECONDS", 0
+    ):
+        yield
+    cache_service.local_cache.clear()
+
+
+async def sample_func(x, y):
     return {"sum": x + y}
 
 
+def _entry(value, age=0):
+    return cache_service.cache_codec.dumps(
+        {"value": value, "generated_at": time.time() - age, "compute_ms": 1.0}
+    )
+
+
 def test_cache_hit():
-    cached_value = json.dumps({"sum": 3})
+    cached_value = _entry({"sum": 3})
 
-    with patch("src.spacextracker.services.cache_service.redis_client") as mock_redis:
-        mock_redis.get.return_value = cached_value
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        # First read is the data version, second the cached entry
+        mock_redis.get.side_effect = ["4", cached_value]
 
         decorated = cache_service.redis_cache()(sample_func)
-        result = decorated(1, 2)
+        result = asyncio.run(decorated(1, 2))
 
         assert result == {"sum": 3}
 
-        mock_redis.get.assert_called_once()
+        assert mock_redis.get.call_count == 2
+        assert mock_redis.get.call_args.args[0].startswith("cache:v4:")
         mock_redis.setex.assert_not_called()
 
 
 def test_cache_miss():
-    with patch("src.spacextracker.services.cache_service.redis_client") as mock_redis:
-        mock_redis.get.return_value = None
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [None, None]
         mock_redis.setex.return_value = True
 
         decorated = cache_service.redis_cache()(sample_func)
-        result = decorated(1, 2)
+        result = asyncio.run(decorated(1, 2))
 
         assert result == {"sum": 3}
 
@@ -38,25 +67,519 @@ def test_cache_miss():
 
 
 def test_cache_miss_with_kwargs():
-    with patch("src.spacextracker.services.cache_service.redis_client") as mock_redis:
-        mock_redis.get.return_value = None
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [None, None]
         mock_redis.setex.return_value = True
 
         decorated = cache_service.redis_cache()(sample_func)
-        result = decorated(x=5, y=7)
+        result = asyncio.run(decorated(x=5, y=7))
 
         assert result == {"sum": 12}
         mock_redis.setex.assert_called_once()
 
 
 def test_cache_ttl_override():
-    with patch("src.spacextracker.services.cache_service.redis_client") as mock_redis:
-        mock_redis.get.return_value = None
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [None, None]
         mock_redis.setex.return_value = True
 
         decorated = cache_service.redis_cache(ttl=60)(sample_func)
-        result = decorated(2, 3)
+        result = asyncio.run(decorated(2, 3))
 
         assert result == {"sum": 5}
         args, kwargs = mock_redis.setex.call_args
         assert args[1] == 60
+
+
+def test_cache_redis_down_calls_function_once():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ConnectionError("Redis down")
+
+        decorated = cache_service.redis_cache()(counted)
+        result = asyncio.run(decorated(1))
+
+        assert result == {"x": 1}
+        assert calls == [1]
+
+
+def test_cache_key_changes_with_data_version():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", None, "2", None]
+
+        decorated = cache_service.redis_cache()(sample_func)
+        asyncio.run(decorated(1, 2))
+        asyncio.run(decorated(1, 2))
+
+        first_key = mock_redis.setex.call_args_list[0].args[0]
+        second_key = mock_redis.setex.call_args_list[1].args[0]
+        assert first_key.startswith("cache:v1:")
+        assert second_key.startswith("cache:v2:")
+        assert first_key.split(":")[2:] == second_key.split(":")[2:]
+
+
+def test_bump_data_version():
+    with patch("src.spacextracker.services.cache_service.redis_client") as mock_redis:
+        pipeline = mock_redis.pipeline.return_value
+        pipeline.execute.return_value = [5, True]
+        assert cache_service.bump_data_version() == 5
+        pipeline.incr.assert_called_once_with(cache_service.DATA_VERSION_KEY)
+        key, updated_at = pipeline.set.call_args.args
+        assert key == cache_service.DATA_UPDATED_AT_KEY
+        assert updated_at <= time.time()
+
+
+def test_data_version_is_read_at_most_once_per_interval():
+    with (
+        patch(
+            "src.spacextracker.services.cache_service.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch(
+            "src.spacextracker.services.cache_service.DATA_VERSION_CHECK_SECONDS", 60
+        ),
+        patch.dict(cache_service._data_version, {"checked_at": None}),
+    ):
+        mock_redis.get.return_value = "3"
+
+        async def read_twice():
+            return [await cache_service.get_data_version() for _ in range(2)]
+
+        assert asyncio.run(read_twice()) == [3, 3]
+        assert mock_redis.get.call_count == 1
+
+
+def test_get_data_updated_at():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [b"1758000000.5", None]
+
+        assert asyncio.run(cache_service.get_data_updated_at()) == datetime(
+            2025, 9, 16, 5, 20, 0, 500000, tzinfo=timezone.utc
+        )
+        assert asyncio.run(cache_service.get_data_updated_at()) is None
+
+
+def test_local_cache_serves_hits_without_redis():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", None, "1"]
+
+        decorated = cache_service.redis_cache(local=True)(counted)
+        assert asyncio.run(decorated(1)) == {"x": 1}
+        assert asyncio.run(decorated(1)) == {"x": 1}
+
+        assert calls == [1]
+        # Only the version is read for the second call
+        assert mock_redis.get.call_count == 3
+        mock_redis.setex.assert_called_once()
+
+
+def test_local_cache_misses_after_data_version_bump():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", None, "2", None]
+
+        decorated = cache_service.redis_cache(local=True)(counted)
+        asyncio.run(decorated(1))
+        asyncio.run(decorated(1))
+
+        assert calls == [1, 1]
+
+
+def test_local_cache_lru_eviction_by_entries():
+    cache = cache_service.LocalCache(max_entries=2, max_bytes=1000, ttl=60)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3, 10)
+
+    assert cache.get("b") is cache_service._MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_local_cache_eviction_by_bytes():
+    cache = cache_service.LocalCache(max_entries=10, max_bytes=25, ttl=60)
+    cache.set("a", 1, 10)
+    cache.set("b", 2, 10)
+    cache.set("c", 3, 10)
+    cache.set("too-big", 4, 26)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == 20
+    assert stats["evictions"] == 1
+    assert cache.get("too-big") is cache_service._MISSING
+
+
+def test_local_cache_ttl_expiry():
+    cache = cache_service.LocalCache(max_entries=10, max_bytes=1000, ttl=5)
+    with patch("src.spacextracker.services.cache_service.time") as mock_time:
+        mock_time.monotonic.return_value = 100.0
+        cache.set("a", 1, 10)
+        mock_time.monotonic.return_value = 106.0
+        assert cache.get("a") is cache_service._MISSING
+
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert (stats["hits"], stats["misses"]) == (0, 1)
+
+
+def test_get_cache_stats_counts_redis_tier():
+    with (
+        patch(
+            "src.spacextracker.services.cache_service.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch.dict(cache_service.redis_stats, {"hits": 0, "misses": 0, "errors": 0}),
+    ):
+        mock_redis.get.side_effect = ["1", None, "1", _entry({"sum": 3})]
+
+        decorated = cache_service.redis_cache()(sample_func)
+        asyncio.run(decorated(1, 2))
+        asyncio.run(decorated(1, 2))
+
+        stats = cache_service.get_cache_stats()
+        assert stats["redis"]["hits"] == 1
+        assert stats["redis"]["misses"] == 1
+        assert set(stats["l1"]) >= {"hits", "misses", "evictions", "entries"}
+
+
+def test_concurrent_misses_call_function_once():
+    calls = []
+
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return {"x": x}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.return_value = None
+        mock_redis.set.return_value = True
+
+        decorated = cache_service.redis_cache()(slow)
+
+        async def burst():
+            return await asyncio.gather(*(decorated(1) for _ in range(10)))
+
+        results = asyncio.run(burst())
+
+        assert results == [{"x": 1}] * 10
+        assert calls == [1]
+        mock_redis.setex.assert_called_once()
+        # The recompute lock is taken once and released with its token
+        mock_redis.set.assert_called_once()
+        lock_key, token = mock_redis.set.call_args.args
+        assert lock_key.startswith("lock:cache:v0:")
+        assert mock_redis.eval.call_args.args[2:] == (lock_key, token)
+
+
+def test_miss_waits_for_value_computed_by_other_worker():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with (
+        patch(
+            "src.spacextracker.services.cache_service.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch("src.spacextracker.services.cache_service.CACHE_LOCK_POLL_SECONDS", 0),
+    ):
+        # Version, miss, first poll, then the other worker's value
+        mock_redis.get.side_effect = ["1", None, None, _entry({"x": 2})]
+        mock_redis.set.return_value = None
+
+        decorated = cache_service.redis_cache()(counted)
+        result = asyncio.run(decorated(1))
+
+        assert result == {"x": 2}
+        assert calls == []
+        mock_redis.setex.assert_not_called()
+        mock_redis.eval.assert_not_called()
+
+
+def test_miss_computes_after_lock_wait_times_out():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with (
+        patch(
+            "src.spacextracker.services.cache_service.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch("src.spacextracker.services.cache_service.CACHE_LOCK_POLL_SECONDS", 0),
+        patch("src.spacextracker.services.cache_service.CACHE_LOCK_WAIT_SECONDS", 0.01),
+    ):
+        mock_redis.get.return_value = None
+        mock_redis.set.return_value = None
+
+        decorated = cache_service.redis_cache()(counted)
+        result = asyncio.run(decorated(1))
+
+        assert result == {"x": 1}
+        assert calls == [1]
+        mock_redis.setex.assert_called_once()
+
+
+def test_cached_entry_records_generation_and_compute_time():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [None, None]
+
+        decorated = cache_service.redis_cache()(sample_func)
+        asyncio.run(decorated(1, 2))
+
+        stored = cache_service.cache_codec.loads(mock_redis.setex.call_args.args[2])
+        assert stored["value"] == {"sum": 3}
+        assert stored["generated_at"] <= time.time()
+        assert stored["compute_ms"] >= 0
+
+
+def test_stale_entry_served_and_refreshed_in_background():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x, "fresh": True}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"x": 1}, age=120)]
+        mock_redis.set.return_value = True
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(counted)
+
+        async def call_and_wait_for_refresh():
+            result = await decorated(1)
+            assert calls == []
+            await asyncio.gather(*cache_service._refreshing.values())
+            return result
+
+        result = asyncio.run(call_and_wait_for_refresh())
+
+        # The caller got the stale value, the refresh stored a new one
+        assert result == {"x": 1}
+        assert calls == [1]
+        stored = cache_service.cache_codec.loads(mock_redis.setex.call_args.args[2])
+        assert stored["value"] == {"x": 1, "fresh": True}
+
+
+def test_stale_entry_refresh_skipped_when_another_worker_holds_lock():
+    calls = []
+
+    async def counted(x):
+        calls.append(x)
+        return {"x": x}
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"x": 1}, age=120)]
+        mock_redis.set.return_value = None
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(counted)
+
+        async def call_and_wait_for_refresh():
+            result = await decorated(1)
+            await asyncio.gather(*cache_service._refreshing.values())
+            return result
+
+        assert asyncio.run(call_and_wait_for_refresh()) == {"x": 1}
+        assert calls == []
+        mock_redis.setex.assert_not_called()
+
+
+def test_fresh_entry_within_soft_ttl_not_refreshed():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"sum": 3}, age=10)]
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(sample_func)
+        assert asyncio.run(decorated(1, 2)) == {"sum": 3}
+
+        mock_redis.set.assert_not_called()
+        mock_redis.setex.assert_not_called()
+
+
+def test_refresh_returns_entry_within_soft_ttl():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"sum": 3}, age=10)]
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(sample_func)
+        assert decorated.soft_ttl == 60
+        assert asyncio.run(decorated.refresh(1, 2)) == {"sum": 3}
+        mock_redis.setex.assert_not_called()
+
+
+def test_refresh_recomputes_stale_entry():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"sum": 0}, age=120)]
+        mock_redis.set.return_value = True
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(sample_func)
+        assert asyncio.run(decorated.refresh(1, 2)) == {"sum": 3}
+        stored = cache_service.cache_codec.loads(mock_redis.setex.call_args.args[2])
+        assert stored["value"] == {"sum": 3}
+
+
+def test_refresh_returns_none_when_another_worker_holds_lock():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", _entry({"sum": 0}, age=120)]
+        mock_redis.set.return_value = None
+
+        decorated = cache_service.redis_cache(soft_ttl=60)(sample_func)
+        assert asyncio.run(decorated.refresh(1, 2)) is None
+        mock_redis.setex.assert_not_called()
+
+
+def test_cache_hit_returns_same_types_as_miss():
+    launch = {"id": "l1", "date": datetime(2025, 9, 1, 12, 30)}
+
+    async def fetch():
+        return [launch]
+
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = [None, None]
+        decorated = cache_service.redis_cache()(fetch)
+        assert asyncio.run(decorated()) == [launch]
+        stored = mock_redis.setex.call_args.args[2]
+
+        mock_redis.get.side_effect = [None, stored]
+        assert asyncio.run(decorated()) == [launch]
+
+
+def test_statistics_entry_round_trips_through_msgpack():
+    statistics = {
+        "rocket_success_rates": {"Falcon 9": 98.0},
+        "launchpad_totals": {"KSC LC 39A": {"launches": 55, "successes": 54}},
+        "launch_frequency": {
+            "monthly_launch_frequency": {"2020-01": 2, "2020-02": 1},
+            "yearly_launch_frequency": {2020: 3, 2021: 31},
+        },
+    }
+    codec = cache_service.get_codec("msgpack")
+
+    entry = cache_service._decode_entry(
+        cache_service._encode_entry(statistics, 12.5, codec), codec
+    )
+
+    assert entry is not None
+    assert entry["value"] == statistics
+
+
+def test_undecodable_entry_is_a_miss():
+    with patch(
+        "src.spacextracker.services.cache_service.async_redis_client",
+        new_callable=AsyncMock,
+    ) as mock_redis:
+        mock_redis.get.side_effect = ["1", b'{"sum": 3}']
+
+        decorated = cache_service.redis_cache()(sample_func)
+        assert asyncio.run(decorated(1, 2)) == {"sum": 3}
+        mock_redis.setex.assert_called_once()
+
+
+async def search(start_date=None, rocket_name=None, limit=None, sort="asc"):
+    return []
+
+
+def test_raw_cache_keys_differ_for_equivalent_calls():
+    decorated = cache_service.redis_cache()(search)
+    assert decorated.cache_key("2020-01-01") != decorated.cache_key(
+        start_date="2020-01-01"
+    )
+
+
+def test_canonical_cache_keys_match_equivalent_calls():
+    normalizer = cache_service.canonical_arguments(lowercase=("rocket_name",))
+    decorated = cache_service.redis_cache(key_normalizer=normalizer)(search)
+
+    key = decorated.cache_key(date(2020, 1, 1), "Falcon 9")
+    assert key.startswith("search:")
+    assert decorated.cache_key(start_date="2020-01-01", rocket_name="falcon 9") == key
+    assert (
+        decorated.cache_key(
+            rocket_name="FALCON 9", start_date=date(2020, 1, 1), sort="asc"
+        )
+        == key
+    )
+    assert decorated.cache_key(date(2020, 1, 1), "Falcon 9", None) == key
+
+
+def test_canonical_cache_keys_keep_distinct_calls_apart():
+    normalizer = cache_service.canonical_arguments(lowercase=("rocket_name",))
+    decorated = cache_service.redis_cache(key_normalizer=normalizer)(search)
+
+    keys = {
+        decorated.cache_key(),
+        decorated.cache_key(sort="desc"),
+        decorated.cache_key(limit=10),
+        decorated.cache_key(rocket_name="Falcon"),
+        decorated.cache_key(start_date=date(2020, 1, 2)),
+    }
+    assert len(keys) == 5
@@ -1,61 +1,209 @@
+import asyncio
 import pytest
-from unittest.mock import patch
-from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import date, datetime
 from fastapi import HTTPException
 
 from src.spacextracker.services import data_access
+from src.spacextracker.services.utils import encode_cursor
+
+
+def _cursor(docs):
+    """Mock of an async pymongo cursor whose to_list() returns docs."""
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
+
+def _seeded_collection():
+    return MagicMock()
+
+
+@pytest.fixture(autouse=True)
+def seeded_store():
+    with patch(
+        "src.spacextracker.services.data_access.ensure_seeded"
+    ) as mock_ensure_seeded:
+        yield mock_ensure_seeded
 
 
 def test_get_launches_success_no_cache():
     mock_data = [{"rocket": {"name": "Falcon 9"}, "success": True}]
 
-    # Patch redis_client used inside the decorator
+    # Call the undecorated function to bypass the Redis cache
     with patch(
-        "src.spacextracker.services.data_access.launches_collection"
+        "src.spacextracker.services.data_access.async_launches_collection",
+        _seeded_collection(),
     ) as mock_col:
-        mock_col.find.return_value = mock_data
-        result = data_access.get_launches.__wrapped__()
+        mock_col.find.return_value.sort.return_value = _cursor(mock_data)
+        result = asyncio.run(data_access.get_launches.__wrapped__())
         assert result == mock_data
         mock_col.find.assert_called_once()
+        mock_col.find.return_value.sort.assert_called_once_with(
+            [("date", 1), ("_id", 1)]
+        )
+
+
+def test_get_launches_page_after_cursor():
+    cursor = encode_cursor(datetime(2025, 1, 1), "l1")
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection",
+        _seeded_collection(),
+    ) as mock_col:
+        sorted_cursor = mock_col.find.return_value.sort.return_value
+        sorted_cursor.limit.return_value = _cursor([{"id": "l0"}])
+        result = asyncio.run(
+            data_access.get_launches.__wrapped__(
+                success=True, limit=1, sort="desc", cursor=cursor
+            )
+        )
+
+        assert result == [{"id": "l0"}]
+        query = mock_col.find.call_args.args[0]
+        assert query == {
+            "$and": [
+                {"success": True},
+                {
+                    "$or": [
+                        {"date": {"$lt": datetime(2025, 1, 1)}},
+                        {"date": datetime(2025, 1, 1), "_id": {"$lt": "l1"}},
+                    ]
+                },
+            ]
+        }
+        mock_col.find.return_value.sort.assert_called_once_with(
+            [("date", -1), ("_id", -1)]
+        )
+        sorted_cursor.limit.assert_called_once_with(1)
+
+
+def test_get_launches_invalid_cursor():
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection",
+        _seeded_collection(),
+    ):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(data_access.get_launches.__wrapped__(cursor="not-a-cursor"))
+        assert exc.value.status_code == 400
+
+
+def test_build_launch_query_uses_prefix_match_on_lowercase_names():
+    query = data_access.build_launch_query(rocket_name="Falcon 9", launchpad="KSC.")
+    assert query == {
+        "rocket.name_lower": {"$regex": "^falcon\\ 9"},
+        "launchpad.name_lower": {"$regex": "^ksc\\."},
+    }
 
 
 def test_get_launches_db_exception():
     with patch(
-        "src.spacextracker.services.data_access.launches_collection"
+        "src.spacextracker.services.data_access.async_launches_collection",
+        _seeded_collection(),
     ) as mock_col:
         mock_col.find.side_effect = Exception("MongoDB down")
         with pytest.raises(HTTPException) as exc:
-            data_access.get_launches.__wrapped__()
+            asyncio.run(data_access.get_launches.__wrapped__())
         assert exc.value.status_code == 500
         assert "Failed to fetch launches" in exc.value.detail
 
 
-def test_get_launch_frequency_success():
-    mock_launches = [
-        {"date": datetime(2025, 1, 1)},
-        {"date": datetime(2025, 1, 2)},
-        {"date": datetime(2025, 2, 1)},
-    ]
+def test_get_launches_waits_for_seeding(seeded_store):
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection"
+    ) as mock_col:
+        mock_col.find.return_value.sort.return_value = _cursor([])
+        asyncio.run(data_access.get_launches.__wrapped__())
+        seeded_store.assert_awaited_once_with()
+        mock_col.count_documents.assert_not_called()
+
+
+def test_get_launches_still_seeding_returns_503(seeded_store):
+    seeded_store.side_effect = HTTPException(
+        status_code=503, headers={"Retry-After": "10"}
+    )
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection"
+    ) as mock_col:
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(data_access.get_launches.__wrapped__())
+        assert exc.value.status_code == 503
+        mock_col.find.assert_not_called()
+
+
+def test_iter_launches_streams_from_cursor():
     with patch(
         "src.spacextracker.services.data_access.launches_collection"
-    ) as mock_col, patch(
-        "src.spacextracker.services.data_access.to_datetime", side_effect=lambda x: x
-    ):
-        mock_col.find.return_value = mock_launches
-        result = data_access.get_launch_frequency()
+    ) as mock_col:
+        batched = mock_col.find.return_value.sort.return_value.batch_size
+        batched.return_value = iter([{"id": "l1"}, {"id": "l2"}])
+        launches = data_access.iter_launches(rocket_name="Falcon", batch_size=50)
+
+        batched.assert_called_once_with(50)
+        assert list(launches) == [{"id": "l1"}, {"id": "l2"}]
+
+
+def test_iter_launches_db_exception():
+    with patch(
+        "src.spacextracker.services.data_access.launches_collection"
+    ) as mock_col:
+        mock_col.find.side_effect = Exception("MongoDB down")
+        with pytest.raises(HTTPException) as exc:
+            data_access.iter_launches()
+        assert exc.value.status_code == 500
+
+
+def test_get_launch_frequency_success():
+    mock_buckets = {
+        "monthly": [{"_id": "2025-01", "count": 2}, {"_id": "2025-02", "count": 1}],
+        "yearly": [{"_id": 2025, "count": 3}],
+    }
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection"
+    ) as mock_col:
+        mock_col.aggregate = AsyncMock(return_value=_cursor([mock_buckets]))
+        result = asyncio.run(data_access.get_launch_frequency())
         assert "monthly_launch_frequency" in result
         assert "yearly_launch_frequency" in result
         assert result["monthly_launch_frequency"]["2025-01"] == 2
         assert result["monthly_launch_frequency"]["2025-02"] == 1
+        assert result["yearly_launch_frequency"] == {2025: 3}
+
+        pipeline = mock_col.aggregate.call_args.args[0]
+        assert pipeline[0] == {"$match": {"date": {"$type": "date"}}}
+        mock_col.find.assert_not_called()
+
+
+def test_get_launch_frequency_with_filters():
+    with patch(
+        "src.spacextracker.services.data_access.async_launches_collection"
+    ) as mock_col:
+        mock_col.aggregate = AsyncMock(return_value=_cursor([]))
+        result = asyncio.run(
+            data_access.get_launch_frequency(
+                start_date=date(2025, 1, 1),
+                end_date=date(2025, 12, 31),
+                rocket_name="Falcon",
+            )
+        )
+        assert result == {
+            "monthly_launch_frequency": {},
+            "yearly_launch_frequency": {},
+        }
+        match = mock_col.aggregate.call_args.args[0][0]["$match"]
+        assert match["date"] == {
+            "$gte": datetime(2025, 1, 1),
+            "$lte": datetime(2025, 12, 31),
+        }
+        assert match["rocket.name_lower"] == {"$regex": "^falcon"}
 
 
 def test_get_launch_frequency_exception():
     with patch(
-        "src.spacextracker.services.data_access.launches_collection"
+        "src.spacextracker.services.data_access.async_launches_collection"
     ) as mock_col:
-        mock_col.find.side_effect = Exception("MongoDB down")
+        mock_col.aggregate = AsyncMock(side_effect=Exception("MongoDB down"))
         with pytest.raises(HTTPException) as exc:
-            data_access.get_launch_frequency()
+            asyncio.run(data_access.get_launch_frequency())
         assert exc.value.status_code == 500
 
 
@@ -64,17 +212,21 @@ def test_get_rocket_success_rates_success():
         {"name": "Falcon 9", "success_rate_pct": 98},
         {"name": "Falcon Heavy", "success_rate_pct": 100},
     ]
-    with patch("src.spacextracker.services.data_access.rockets_collection") as mock_col:
-        mock_col.find.return_value = mock_rockets
-        result = data_access.get_rocket_success_rates()
+    with patch(
+        "src.spacextracker.services.data_access.async_rockets_collection"
+    ) as mock_col:
+        mock_col.find.return_value = _cursor(mock_rockets)
+        result = asyncio.run(data_access.get_rocket_success_rates())
         assert result == {"Falcon 9": 98, "Falcon Heavy": 100}
 
 
 def test_get_rocket_success_rates_exception():
-    with patch("src.spacextracker.services.data_access.rockets_collection") as mock_col:
+    with patch(
+        "src.spacextracker.services.data_access.async_rockets_collection"
+    ) as mock_col:
         mock_col.find.side_effect = Exception("MongoDB down")
         with pytest.raises(HTTPException):
-            data_access.get_rocket_success_rates()
+            asyncio.run(data_access.get_rocket_success_rates())
 
 
 def test_get_launchpad_totals_success():
@@ -87,31 +239,35 @@ def test_get_launchpad_totals_success():
         }
     ]
     with patch(
-        "src.spacextracker.services.data_access.launchpads_collection"
+        "src.spacextracker.services.data_access.async_launchpads_collection"
     ) as mock_col:
-        mock_col.find.return_value = mock_launchpads
-        result = data_access.get_launchpad_totals()
+        mock_col.find.return_value = _cursor(mock_launchpads)
+        result = asyncio.run(data_access.get_launchpad_totals())
         assert result["LC-39A"]["launch_attempts"] == 10
         assert result["LC-39A"]["launch_successes"] == 9
 
 
 def test_get_launchpad_totals_exception():
     with patch(
-        "src.spacextracker.services.data_access.launchpads_collection"
+        "src.spacextracker.services.data_access.async_launchpads_collection"
     ) as mock_col:
         mock_col.find.side_effect = Exception("MongoDB down")
         with pytest.raises(HTTPException):
-            data_access.get_launchpad_totals()
+            asyncio.run(data_access.get_launchpad_totals())
 
 
 def test_get_all_statistics_success():
-    with patch(
-        "src.spacextracker.services.data_access.get_rocket_success_rates"
-    ) as mock_rockets, patch(
-        "src.spacextracker.services.data_access.get_launchpad_totals"
-    ) as mock_launchpads, patch(
-        "src.spacextracker.services.data_access.get_launch_frequency"
-    ) as mock_frequency:
+    with (
+        patch(
+            "src.spacextracker.services.data_access.get_rocket_success_rates"
+        ) as mock_rockets,
+        patch(
+            "src.spacextracker.services.data_access.get_launchpad_totals"
+        ) as mock_launchpads,
+        patch(
+            "src.spacextracker.services.data_access.get_launch_frequency"
+        ) as mock_frequency,
+    ):
         mock_rockets.return_value = {"Falcon 9": 98}
         mock_launchpads.return_value = {
             "LC-39A": {"launch_attempts": 10, "launch_successes": 9}
@@ -121,16 +277,56 @@ def test_get_all_statistics_success():
             "yearly_launch_frequency": {2025: 2},
         }
 
-        result = data_access.get_all_statistics.__wrapped__()
+        result = asyncio.run(data_access.get_all_statistics.__wrapped__())
         assert "rocket_success_rates" in result
         assert "launchpad_totals" in result
         assert "launch_frequency" in result
 
 
+def test_get_all_statistics_passes_filters():
+    with (
+        patch(
+            "src.spacextracker.services.data_access.get_rocket_success_rates"
+        ) as mock_rockets,
+        patch(
+            "src.spacextracker.services.data_access.get_launchpad_totals"
+        ) as mock_launchpads,
+        patch(
+            "src.spacextracker.services.data_access.get_launch_frequency"
+        ) as mock_frequency,
+    ):
+        asyncio.run(
+            data_access.get_all_statistics.__wrapped__(
+                rocket_name="Falcon", launchpad="KSC", success=True
+            )
+        )
+
+        mock_rockets.assert_called_once_with("Falcon")
+        mock_launchpads.assert_called_once_with("KSC")
+        mock_frequency.assert_called_once_with(
+            start_date=None,
+            end_date=None,
+            rocket_name="Falcon",
+            success=True,
+            launchpad="KSC",
+        )
+
+
+def test_get_rocket_success_rates_with_name_filter():
+    with patch(
+        "src.spacextracker.services.data_access.async_rockets_collection"
+    ) as mock_col:
+        mock_col.find.return_value = _cursor([])
+        asyncio.run(data_access.get_rocket_success_rates("Falcon"))
+        assert mock_col.find.call_args.args[0] == {
+            "name": {"$regex": "^Falcon", "$options": "i"}
+        }
+
+
 def test_get_all_statistics_exception():
     with patch(
         "src.spacextracker.services.data_access.get_rocket_success_rates"
     ) as mock_rockets:
         mock_rockets.side_effect = Exception("Unexpected error")
         with pytest.raises(HTTPException):
-            data_access.get_all_statistics.__wrapped__()
+            asyncio.run(data_access.get_all_statistics.__wrapped__())
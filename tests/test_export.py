@@ -0,0 +1,32 @@
+import json
+
+from src.spacextracker.services import export
+
+
+def test_stream_launches_json_array_is_chunked():
+    launches = ({"id": str(i), "name": "x" * 100} for i in range(2000))
+
+    chunks = list(export.stream_launches(launches, "json"))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < export.EXPORT_BUFFER_SIZE + 1024 for chunk in chunks)
+    assert len(json.loads(b"".join(chunks))) == 2000
+
+
+def test_stream_launches_empty_json():
+    assert b"".join(export.stream_launches(iter([]), "json")) == b"[]"
+
+
+def test_stream_launches_is_lazy():
+    consumed = []
+
+    def launches():
+        for i in range(10_000):
+            consumed.append(i)
+            yield {"id": str(i), "name": "x" * 100}
+
+    stream = export.stream_launches(launches(), "ndjson")
+    first = next(stream)
+
+    assert first.startswith(b'{"id": "0"')
+    assert len(consumed) < 10_000
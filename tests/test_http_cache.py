@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from src.spacextracker.services import http_cache
+
+HEADERS = {
+    "ETag": '"v3-get_launches:abc"',
+    "Last-Modified": "Tue, 16 Sep 2025 05:20:00 GMT",
+}
+
+
+def test_conditional_headers():
+    cached = MagicMock()
+    cached.cache_key.return_value = "get_launches:abc"
+    with (
+        patch("src.spacextracker.services.http_cache.get_data_version", return_value=3),
+        patch(
+            "src.spacextracker.services.http_cache.get_data_updated_at",
+            return_value=datetime(2025, 9, 16, 5, 20, 0, 500000, tzinfo=timezone.utc),
+        ),
+    ):
+        headers = asyncio.run(
+            http_cache.conditional_headers(cached, {"rocket_name": "Falcon"})
+        )
+
+    cached.cache_key.assert_called_once_with(rocket_name="Falcon")
+    assert headers == {**HEADERS, "Cache-Control": "no-cache"}
+
+
+def test_conditional_headers_before_first_ingest():
+    cached = MagicMock()
+    cached.cache_key.return_value = "get_launches:abc"
+    with (
+        patch("src.spacextracker.services.http_cache.get_data_version", return_value=0),
+        patch(
+            "src.spacextracker.services.http_cache.get_data_updated_at",
+            return_value=None,
+        ),
+    ):
+        headers = asyncio.run(http_cache.conditional_headers(cached, {}))
+
+    assert headers["ETag"] == '"v0-get_launches:abc"'
+    assert "Last-Modified" not in headers
+
+
+def test_if_none_match():
+    assert http_cache.is_not_modified({"if-none-match": HEADERS["ETag"]}, HEADERS)
+    assert http_cache.is_not_modified(
+        {"if-none-match": f'"other", W/{HEADERS["ETag"]}'}, HEADERS
+    )
+    assert http_cache.is_not_modified({"if-none-match": "*"}, HEADERS)
+    assert not http_cache.is_not_modified({"if-none-match": '"v2-abc"'}, HEADERS)
+
+
+def test_variant_etag():
+    assert http_cache.variant_etag('"v1-abc"', "gzip") == '"v1-abc-gzip"'
+    assert http_cache.variant_etag('"v1-abc"', "br") == '"v1-abc-br"'
+    assert http_cache.variant_etag('"v1-abc"', "identity") == '"v1-abc"'
+
+
+def test_if_none_match_accepts_encoded_variants():
+    for coding in http_cache.CONTENT_CODINGS:
+        tag = http_cache.variant_etag(HEADERS["ETag"], coding)
+        assert http_cache.is_not_modified({"if-none-match": tag}, HEADERS)
+        assert http_cache.is_not_modified({"if-none-match": f"W/{tag}"}, HEADERS)
+    assert not http_cache.is_not_modified(
+        {"if-none-match": http_cache.variant_etag('"v2-abc"', "gzip")}, HEADERS
+    )
+
+
+def test_not_modified_headers_echo_the_matched_tag():
+    tag = http_cache.variant_etag(HEADERS["ETag"], "br")
+    headers = http_cache.not_modified_headers({"if-none-match": f'"x", {tag}'}, HEADERS)
+    assert headers == {**HEADERS, "ETag": tag}
+    assert http_cache.not_modified_headers({}, HEADERS) == HEADERS
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request_headers = {
+        "if-none-match": '"v2-abc"',
+        "if-modified-since": "Wed, 17 Sep 2025 00:00:00 GMT",
+    }
+    assert not http_cache.is_not_modified(request_headers, HEADERS)
+
+
+def test_if_modified_since():
+    assert http_cache.is_not_modified(
+        {"if-modified-since": HEADERS["Last-Modified"]}, HEADERS
+    )
+    assert not http_cache.is_not_modified(
+        {"if-modified-since": "Mon, 15 Sep 2025 00:00:00 GMT"}, HEADERS
+    )
+    assert not http_cache.is_not_modified({"if-modified-since": "garbage"}, HEADERS)
+
+
+def test_unconditional_or_without_validators():
+    assert not http_cache.is_not_modified({}, HEADERS)
+    assert not http_cache.is_not_modified({"if-none-match": "*"}, {})
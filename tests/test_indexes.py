@@ -0,0 +1,108 @@
+import os
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from src.spacextracker.services import indexes
+from src.spacextracker.services.data_access import build_launch_query
+
+FILTER_SHAPES = {
+    "unfiltered": {},
+    "date_range": {"start_date": date(2020, 1, 1), "end_date": date(2020, 12, 31)},
+    "success": {"success": True},
+    "rocket": {"rocket_name": "Falcon"},
+    "launchpad": {"launchpad": "KSC"},
+    "rocket_date": {
+        "rocket_name": "falcon 9",
+        "start_date": date(2020, 1, 1),
+        "end_date": date(2020, 12, 31),
+    },
+    "launchpad_date": {
+        "launchpad": "ksc",
+        "start_date": date(2020, 1, 1),
+        "end_date": date(2020, 12, 31),
+    },
+    "success_date": {
+        "success": False,
+        "start_date": date(2020, 1, 1),
+        "end_date": date(2020, 12, 31),
+    },
+    "rocket_success": {"rocket_name": "Falcon", "success": True},
+    "all_filters": {
+        "rocket_name": "Falcon",
+        "launchpad": "KSC",
+        "success": True,
+        "start_date": date(2020, 1, 1),
+        "end_date": date(2020, 12, 31),
+    },
+}
+
+# Shapes without a name prefix match, read in (date, _id) order from the index
+KEYSET_ORDERED_SHAPES = {"unfiltered", "date_range", "success", "success_date"}
+
+
+def test_ensure_indexes_creates_launch_indexes():
+    with patch("src.spacextracker.services.indexes.launches_collection") as mock_col:
+        mock_col.create_indexes.return_value = ["date", "success_date"]
+        result = indexes.ensure_indexes()
+
+    assert result == ["date", "success_date"]
+    mock_col.create_indexes.assert_called_once_with(indexes.LAUNCH_INDEXES)
+
+
+@pytest.fixture(scope="module")
+def explain_collection():
+    client = MongoClient(
+        os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+        serverSelectionTimeoutMS=500,
+    )
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB is not available for explain-plan tests")
+
+    db = client["spacextracker_test_indexes"]
+    collection = db["launch"]
+    collection.insert_many(
+        [
+            {
+                "_id": f"l{i}",
+                "date": datetime(2019 + i % 3, 1 + i % 12, 1),
+                "success": i % 2 == 0,
+                "rocket": {"name": "Falcon 9", "name_lower": "falcon 9"},
+                "launchpad": {"name": "KSC LC 39A", "name_lower": "ksc lc 39a"},
+            }
+            for i in range(50)
+        ]
+    )
+    collection.create_indexes(indexes.LAUNCH_INDEXES)
+    yield collection
+    client.drop_database(db.name)
+    client.close()
+
+
+def _plan_stages(plan):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+@pytest.mark.parametrize("shape", FILTER_SHAPES)
+def test_launch_filters_use_indexes(explain_collection, shape):
+    query = build_launch_query(**FILTER_SHAPES[shape])
+    plan = (
+        explain_collection.find(query)
+        .sort([("date", 1), ("_id", 1)])
+        .explain()["queryPlanner"]["winningPlan"]
+    )
+
+    stages = set(_plan_stages(plan))
+    assert "COLLSCAN" not in stages
+    if shape in KEYSET_ORDERED_SHAPES:
+        assert "SORT" not in stages
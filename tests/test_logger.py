@@ -0,0 +1,110 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueListener
+from unittest.mock import patch
+
+from src.spacextracker import logger as logging_setup
+
+
+def make_record(msg, *args, **attributes):
+    record = logging.LogRecord(
+        "spacextracker.test", logging.INFO, "x.py", 1, msg, args, None
+    )
+    record.__dict__.update(attributes)
+    return record
+
+
+def test_parse_rates():
+    assert logging_setup._parse_rates("") == {}
+    assert logging_setup._parse_rates(" spacextracker.cache=0.01,a=1") == {
+        "spacextracker.cache": 0.01,
+        "a": 1.0,
+    }
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("Fetched %d launches", 50, route="/launches")
+
+    entry = json.loads(logging_setup.JsonFormatter().format(record))
+
+    assert entry["message"] == "Fetched 50 launches"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "spacextracker.test"
+    assert entry["route"] == "/launches"
+    assert entry["time"].endswith("+00:00")
+
+
+def test_json_formatter_includes_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record("failed", exc_info=sys.exc_info())
+
+    entry = json.loads(logging_setup.JsonFormatter().format(record))
+
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_sampled_logger_drops_info_but_keeps_warnings():
+    log = logging.getLogger("spacextracker.test.sampled")
+    sampled = logging_setup.SampledLogger(log, rate=0.0)
+    with patch.object(log, "_log") as emit:
+        sampled.info("Cache hit for %s", "get_launches")
+        sampled.warning("Timed out waiting for %s", "key")
+
+    assert emit.call_count == 1
+    assert emit.call_args.args[:3] == (
+        logging.WARNING,
+        "Timed out waiting for %s",
+        ("key",),
+    )
+
+
+def test_sampled_logger_keeps_everything_at_rate_one():
+    log = logging.getLogger("spacextracker.test.unsampled")
+    log.setLevel(logging.INFO)
+    sampled = logging_setup.SampledLogger(log)
+    with patch.object(log, "_log") as emit:
+        for _ in range(10):
+            sampled.info("Cache hit")
+
+    assert emit.call_count == 10
+
+
+def test_deferred_queue_handler_formats_on_listener():
+    records = queue.SimpleQueue()
+    handler = logging_setup.DeferredQueueHandler(records)
+    record = make_record("Cache hit for %s", "get_launches")
+
+    handler.handle(record)
+
+    queued = records.get_nowait()
+    assert queued is record
+    assert queued.args == ("get_launches",)
+
+
+def test_queued_writes_from_listener_thread():
+    written = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            written.append(self.format(record))
+
+    handler = logging_setup.queued(ListHandler())
+    listener = logging_setup._listeners.pop(handler)
+    try:
+        handler.handle(make_record("Fetched %d launches", 50))
+    finally:
+        listener.stop()
+        logging_setup._pipelines.pop()
+
+    assert isinstance(listener, QueueListener)
+    assert written == ["Fetched 50 launches"]
+
+
+def test_queued_is_a_no_op_when_disabled():
+    target = logging.NullHandler()
+    with patch("src.spacextracker.logger.LOG_QUEUE", False):
+        assert logging_setup.queued(target) is target
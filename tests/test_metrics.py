@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock
+
+from src.spacextracker import metrics
+
+
+def test_counter_and_gauge_render():
+    counter = metrics.Counter("hits_total", "Hits.", ("function",))
+    counter.inc("get_launches")
+    counter.labels("get_launches").inc(2)
+    gauge = metrics.Gauge("in_flight", "In flight.", ("route",))
+    gauge.inc("/launches")
+    gauge.inc("/launches")
+    gauge.dec("/launches")
+
+    assert metrics.render([counter, gauge]) == (
+        "# HELP hits_total Hits.\n"
+        "# TYPE hits_total counter\n"
+        'hits_total{function="get_launches"} 3.0\n'
+        "# HELP in_flight In flight.\n"
+        "# TYPE in_flight gauge\n"
+        'in_flight{route="/launches"} 1.0\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("duration_seconds", "Duration.", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.labels().observe(0.5)
+    histogram.observe(3)
+
+    samples = list(histogram.samples())
+    assert samples == [
+        ("duration_seconds_bucket", '{le="0.1"}', 2.0),
+        ("duration_seconds_bucket", '{le="1"}', 3.0),
+        ("duration_seconds_bucket", '{le="+Inf"}', 4.0),
+        ("duration_seconds_sum", "", 3.65),
+        ("duration_seconds_count", "", 4.0),
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("errors_total", "Errors.", ("function",))
+    counter.inc('say "hi"\n')
+    assert 'errors_total{function="say \\"hi\\"\\n"} 1.0' in counter.render()
+
+
+def test_registry():
+    registry = []
+    counter = metrics.Counter("runs_total", "Runs.", registry=registry)
+    assert registry == [counter]
+    assert metrics.CACHE_HITS in metrics.REGISTRY
+
+
+def test_record_task_round_trip():
+    redis_client = MagicMock()
+    pipe = redis_client.pipeline.return_value.__enter__.return_value
+    totals = {}
+    pipe.hincrbyfloat.side_effect = lambda key, field, amount: totals.update(
+        {field: totals.get(field, 0) + amount}
+    )
+
+    metrics.record_task(redis_client, "fetch", 12.5, 205, failed=False)
+    metrics.record_task(redis_client, "fetch", 0.5, 0, failed=True)
+
+    pipe.hincrbyfloat.assert_any_call(metrics.TASK_METRICS_KEY, "duration:fetch:3", 1)
+    assert pipe.execute.call_count == 2
+    duration, processed, failures = metrics.task_metrics(totals)
+    assert list(processed.samples()) == [
+        ("spacextracker_celery_task_processed_total", '{task="fetch"}', 205.0)
+    ]
+    assert list(failures.samples())[0][2] == 1.0
+    samples = {(name, labels): value for name, labels, value in duration.samples()}
+    assert (
+        samples[
+            (
+                "spacextracker_celery_task_duration_seconds_bucket",
+                '{task="fetch",le="1"}',
+            )
+        ]
+        == 1.0
+    )
+    assert (
+        samples[
+            (
+                "spacextracker_celery_task_duration_seconds_bucket",
+                '{task="fetch",le="30"}',
+            )
+        ]
+        == 2.0
+    )
+    assert (
+        samples[("spacextracker_celery_task_duration_seconds_sum", '{task="fetch"}')]
+        == 13.0
+    )
@@ -0,0 +1,104 @@
+import os
+import pstats
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.spacextracker import profiling
+
+
+def busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_stack_sampler_writes_collapsed_stacks(tmp_path):
+    sampler = profiling.StackSampler(interval=0.001)
+    sampler.start()
+    busy(0.05)
+    sampler.stop()
+    path = tmp_path / "run.collapsed"
+    sampler.write(str(path))
+
+    lines = path.read_text().splitlines()
+    assert lines
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert any("busy (test_profiling.py)" in line for line in lines)
+
+
+def test_call_profiler_writes_pstats(tmp_path):
+    path = str(tmp_path / "run.prof")
+    capture = profiling.start_capture("pstats")
+    busy(0.01)
+    profiling.finish_capture(capture, path)
+
+    stats = pstats.Stats(path)
+    assert any(func[2] == "busy" for func in stats.stats)
+
+
+def test_only_one_capture_at_a_time(tmp_path):
+    capture = profiling.start_capture("pstats")
+    try:
+        assert profiling.start_capture("pstats") is None
+    finally:
+        profiling.finish_capture(capture, str(tmp_path / "run.prof"))
+    assert not profiling._capturing.locked()
+
+
+def test_profile_run_is_off_by_default(tmp_path):
+    with patch("src.spacextracker.profiling.PROFILE_DIR", str(tmp_path)):
+        with profiling.profile_run("fetch_and_store_launches") as path:
+            busy(0.001)
+    assert path is None
+    assert not os.listdir(tmp_path)
+
+
+def test_profile_run_forced(tmp_path):
+    with patch("src.spacextracker.profiling.PROFILE_DIR", str(tmp_path)):
+        with profiling.profile_run("fetch_and_store_launches", force=True) as path:
+            busy(0.01)
+    assert os.path.dirname(path) == str(tmp_path)
+    assert "-fetch_and_store_launches-" in os.path.basename(path)
+    assert os.path.exists(path)
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/launches")
+    def launches():
+        busy(0.01)
+        return []
+
+    @app.get("/health")
+    def health():
+        return {}
+
+    app.add_middleware(profiling.ProfilingMiddleware, token="secret")
+    return TestClient(app)
+
+
+def test_middleware_profiles_requests_with_token(tmp_path):
+    with patch("src.spacextracker.profiling.PROFILE_DIR", str(tmp_path)):
+        response = make_client().get("/launches", headers={"X-Profile": "secret"})
+
+    assert response.status_code == 200
+    name = response.headers["x-profile-file"]
+    assert "-launches-" in name
+    assert os.listdir(tmp_path) == [name]
+
+
+def test_middleware_skips_unselected_requests(tmp_path):
+    client = make_client()
+    with patch("src.spacextracker.profiling.PROFILE_DIR", str(tmp_path)):
+        plain = client.get("/launches")
+        wrong_token = client.get("/launches", headers={"X-Profile": "guess"})
+        other_path = client.get("/health", headers={"X-Profile": "secret"})
+
+    for response in (plain, wrong_token, other_path):
+        assert response.status_code == 200
+        assert "x-profile-file" not in response.headers
+    assert not os.listdir(tmp_path)
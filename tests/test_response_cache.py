@@ -0,0 +1,232 @@
+import asyncio
+import gzip
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import brotli
+import pytest
+
+from src.spacextracker.services import response_cache
+from src.spacextracker.services.cache_service import LocalCache
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", "identity"),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("*", "br"),
+        ("*;q=0", "identity"),
+        ("identity", "identity"),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert response_cache.choose_encoding(accept_encoding) == expected
+
+
+def test_encode_variants_renders_like_json_response():
+    variants = response_cache.encode_variants({"date": datetime(2025, 9, 1)})
+    assert variants == {"identity": b'{"date":"2025-09-01T00:00:00"}'}
+
+
+def test_encode_variants_compresses_large_bodies():
+    content = [{"details": "x" * 100} for _ in range(20)]
+    variants = response_cache.encode_variants(content)
+
+    assert gzip.decompress(variants["gzip"]) == variants["identity"]
+    assert brotli.decompress(variants["br"]) == variants["identity"]
+    assert len(variants["br"]) < len(variants["identity"])
+
+
+def _cached(result):
+    cached = AsyncMock(return_value=result)
+    cached.cache_key = MagicMock(return_value="get_launches:abc")
+    cached.__name__ = "get_launches"
+    cached.soft_ttl = None
+    cached.refresh = AsyncMock(return_value=result)
+    return cached
+
+
+def test_cached_response_miss_stores_variants_then_hits_locally():
+    content = [{"details": "x" * 100} for _ in range(20)]
+    cached = _cached(content)
+    with (
+        patch(
+            "src.spacextracker.services.response_cache.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch(
+            "src.spacextracker.services.response_cache.get_data_version", return_value=7
+        ),
+        patch(
+            "src.spacextracker.services.response_cache.local_cache",
+            LocalCache(max_entries=10, max_bytes=10**6, ttl=60),
+        ),
+    ):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        mock_redis.pipeline = MagicMock()
+        mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+        mock_redis.hmget.return_value = [None, None, None]
+
+        first = asyncio.run(response_cache.cached_response(cached, {}, "br"))
+        (key,) = pipe.hset.call_args.args
+        stored = pipe.hset.call_args.kwargs["mapping"]
+        assert key == "response:v7:get_launches:abc"
+        pipe.expire.assert_called_once_with(key, response_cache.CACHE_TTL)
+
+        mock_redis.hmget.return_value = [
+            stored["br"],
+            stored["headers"],
+            stored["generated_at"],
+        ]
+        second = asyncio.run(response_cache.cached_response(cached, {}, "br"))
+        third = asyncio.run(response_cache.cached_response(cached, {}, "br"))
+
+    cached.assert_awaited_once_with()
+    assert first.body == second.body == third.body == stored["br"]
+    assert third.headers["Content-Encoding"] == "br"
+    # Storing the variants filled the L1 cache, so later calls skip Redis
+    assert mock_redis.hmget.call_count == 1
+
+
+def test_cached_response_small_body_served_uncompressed():
+    cached = _cached({"ok": True})
+    with (
+        patch(
+            "src.spacextracker.services.response_cache.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+        patch(
+            "src.spacextracker.services.response_cache.get_data_version", return_value=1
+        ),
+        patch("src.spacextracker.services.response_cache.local_cache") as mock_local,
+    ):
+        mock_local.get.return_value = None
+        mock_redis.hmget.return_value = [None, b"{}", b"0"]
+        mock_redis.hget.return_value = b'{"ok":true}'
+
+        response = asyncio.run(response_cache.cached_response(cached, {}, "gzip"))
+
+    cached.assert_not_awaited()
+    mock_redis.hget.assert_awaited_once_with("response:v1:get_launches:abc", "identity")
+    assert response.body == b'{"ok":true}'
+    assert "Content-Encoding" not in response.headers
+
+
+def test_cached_response_redis_down_serves_uncached():
+    cached = _cached({"ok": True})
+    with patch(
+        "src.spacextracker.services.response_cache.get_data_version",
+        side_effect=ConnectionError("Redis down"),
+    ):
+        response = asyncio.run(
+            response_cache.cached_response(cached, {}, "gzip", headers={"ETag": "x"})
+        )
+
+    assert response.body == b'{"ok":true}'
+    assert response.headers["ETag"] == "x"
+
+
+def _stored_response_redis():
+    mock_redis = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline = MagicMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+    return mock_redis, pipe
+
+
+def test_cached_response_stale_hit_refreshes_in_background():
+    cached = _cached({"fresh": True})
+    cached.soft_ttl = 60
+    mock_redis, pipe = _stored_response_redis()
+    mock_redis.hmget.return_value = [b'{"stale":true}', b"{}", b"1"]
+
+    async def serve():
+        responses = await asyncio.gather(
+            response_cache.cached_response(cached, {}, ""),
+            response_cache.cached_response(cached, {}, ""),
+        )
+        await asyncio.gather(*response_cache._refreshing.values())
+        return responses
+
+    with (
+        patch(
+            "src.spacextracker.services.response_cache.async_redis_client", mock_redis
+        ),
+        patch(
+            "src.spacextracker.services.response_cache.get_data_version", return_value=1
+        ),
+        patch(
+            "src.spacextracker.services.response_cache.local_cache",
+            LocalCache(max_entries=10, max_bytes=10**6, ttl=60),
+        ),
+    ):
+        first, second = asyncio.run(serve())
+
+    assert first.body == second.body == b'{"stale":true}'
+    cached.assert_not_awaited()
+    # One refresh for both stale hits
+    cached.refresh.assert_awaited_once_with()
+    stored = pipe.hset.call_args.kwargs["mapping"]
+    assert stored["identity"] == b'{"fresh":true}'
+    assert stored["generated_at"] > 1
+
+
+def test_cached_response_refresh_skipped_while_another_worker_computes():
+    cached = _cached({"fresh": True})
+    cached.soft_ttl = 60
+    cached.refresh.return_value = None
+    mock_redis, pipe = _stored_response_redis()
+
+    async def refresh():
+        await response_cache._refresh(cached, {}, "response:v1:k", None)
+
+    with patch(
+        "src.spacextracker.services.response_cache.async_redis_client", mock_redis
+    ):
+        asyncio.run(refresh())
+
+    pipe.hset.assert_not_called()
+
+
+def test_cached_response_concurrent_misses_compute_once():
+    cached = _cached([{"details": "x" * 100} for _ in range(20)])
+    mock_redis, pipe = _stored_response_redis()
+    mock_redis.hmget.return_value = [None, None, None]
+
+    async def serve():
+        return await asyncio.gather(
+            *(response_cache.cached_response(cached, {}, "gzip") for _ in range(3))
+        )
+
+    with (
+        patch(
+            "src.spacextracker.services.response_cache.async_redis_client", mock_redis
+        ),
+        patch(
+            "src.spacextracker.services.response_cache.get_data_version", return_value=1
+        ),
+        patch("src.spacextracker.services.response_cache.local_cache") as mock_local,
+    ):
+        mock_local.get.return_value = None
+        responses = asyncio.run(serve())
+
+    cached.assert_awaited_once_with()
+    pipe.hset.assert_called_once()
+    assert {response.body for response in responses} == {
+        pipe.hset.call_args.kwargs["mapping"]["gzip"]
+    }
+    assert response_cache._inflight == {}
+
+
+@pytest.mark.parametrize(
+    "encoding, etag",
+    [("identity", '"v1-k"'), ("gzip", '"v1-k-gzip"'), ("br", '"v1-k-br"')],
+)
+def test_cached_response_etag_names_the_encoding(encoding, etag):
+    response = response_cache._response(b"{}", encoding, {"ETag": '"v1-k"'})
+    assert response.headers["ETag"] == etag
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from src.spacextracker.services import seeding
+
+SEEDED_STATE = {"last_full_sync": datetime(2025, 9, 1, tzinfo=timezone.utc)}
+
+
+@pytest.fixture(autouse=True)
+def fresh_seeding_state():
+    with patch.dict(seeding._seeding, {"done": False, "task": None}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def launches():
+    # An empty launch store unless a test stores launches
+    sync_collection, async_collection = MagicMock(), MagicMock()
+    sync_collection.find_one.return_value = None
+    async_collection.find_one = AsyncMock(return_value=None)
+    with (
+        patch(
+            "src.spacextracker.services.seeding.launches_collection", sync_collection
+        ),
+        patch(
+            "src.spacextracker.services.seeding.async_launches_collection",
+            async_collection,
+        ),
+        patch(
+            "src.spacextracker.services.seeding.async_redis_client",
+            new_callable=AsyncMock,
+        ) as mock_redis,
+    ):
+        mock_redis.exists.return_value = 0
+        yield sync_collection, async_collection, mock_redis
+
+
+def test_ensure_seeded_marker_checked_once():
+    with (
+        patch(
+            "src.spacextracker.services.seeding.get_sync_state_async",
+            return_value=SEEDED_STATE,
+        ) as mock_state,
+        patch("src.spacextracker.services.seeding.seed_launches") as mock_seed,
+    ):
+        asyncio.run(seeding.ensure_seeded())
+        asyncio.run(seeding.ensure_seeded())
+
+        mock_state.assert_awaited_once_with("launches")
+        mock_seed.assert_not_called()
+
+
+def test_concurrent_cold_requests_share_one_seed():
+    calls = []
+
+    def seed():
+        calls.append(1)
+
+    with (
+        patch(
+            "src.spacextracker.services.seeding.get_sync_state_async", return_value={}
+        ),
+        patch("src.spacextracker.services.seeding.seed_launches", side_effect=seed),
+    ):
+
+        async def burst():
+            await asyncio.gather(*(seeding.ensure_seeded() for _ in range(10)))
+
+        asyncio.run(burst())
+
+    assert calls == [1]
+    assert seeding._seeding["done"]
+
+
+def test_slow_seed_returns_503_with_retry_after():
+    release = threading.Event()
+
+    with (
+        patch(
+            "src.spacextracker.services.seeding.get_sync_state_async", return_value={}
+        ),
+        patch(
+            "src.spacextracker.services.seeding.seed_launches",
+            side_effect=lambda: release.wait(5),
+        ) as mock_seed,
+    ):
+
+        async def cold_request():
+            try:
+                await seeding.ensure_seeded(wait=0.01)
+            finally:
+                release.set()
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(cold_request())
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": str(seeding.SEED_RETRY_AFTER)}
+    mock_seed.assert_called_once_with()
+    assert not seeding._seeding["done"]
+
+
+def test_seed_launches_runs_full_ingest_under_lock():
+    with (
+        patch("src.spacextracker.services.seeding.redis_client") as mock_redis,
+        patch("src.spacextracker.services.seeding.get_sync_state", return_value={}),
+        patch(
+            "src.spacextracker.services.seeding.update_launches_in_db"
+        ) as mock_update,
+    ):
+        mock_redis.set.return_value = True
+        # The lock still holds the token this call set
+        mock_redis.get.side_effect = lambda key: mock_redis.set.call_args.args[1]
+        seeding.seed_launches()
+
+        mock_update.assert_called_once_with(full=True)
+        mock_redis.delete.assert_called_once_with(seeding.SEED_LOCK_KEY)
+
+
+def test_seed_launches_waits_for_other_process():
+    with (
+        patch("src.spacextracker.services.seeding.redis_client") as mock_redis,
+        patch(
+            "src.spacextracker.services.seeding.get_sync_state",
+            side_effect=[{}, SEEDED_STATE],
+        ),
+        patch(
+            "src.spacextracker.services.seeding.update_launches_in_db"
+        ) as mock_update,
+        patch("src.spacextracker.services.seeding.SEED_POLL_SECONDS", 0),
+    ):
+        mock_redis.set.return_value = None
+        seeding.seed_launches()
+
+        mock_update.assert_not_called()
+
+
+def test_stored_launches_without_sync_state_count_as_seeded(launches):
+    _, async_collection, _ = launches
+    async_collection.find_one.return_value = {"_id": "l1"}
+    with (
+        patch(
+            "src.spacextracker.services.seeding.get_sync_state_async", return_value={}
+        ),
+        patch(
+            "src.spacextracker.services.seeding.update_launches_in_db",
+            side_effect=ConnectionError("SpaceX API unreachable"),
+        ) as mock_update,
+    ):
+        asyncio.run(seeding.ensure_seeded(wait=0.01))
+        asyncio.run(seeding.ensure_seeded(wait=0.01))
+
+    mock_update.assert_not_called()
+    async_collection.find_one.assert_awaited_once_with({}, {"_id": 1})
+    assert seeding._seeding["done"]
+
+
+def test_launches_written_by_a_running_seed_do_not_count(launches):
+    _, async_collection, mock_redis = launches
+    async_collection.find_one.return_value = {"_id": "l1"}
+    mock_redis.exists.return_value = 1
+    assert not asyncio.run(seeding.has_launches_async())
+
+    mock_redis.exists.side_effect = ConnectionError("Redis down")
+    assert asyncio.run(seeding.has_launches_async())
+
+
+def test_seed_launches_skips_ingest_over_stored_launches(launches):
+    sync_collection, _, _ = launches
+    sync_collection.find_one.return_value = {"_id": "l1"}
+    with (
+        patch("src.spacextracker.services.seeding.redis_client") as mock_redis,
+        patch("src.spacextracker.services.seeding.get_sync_state", return_value={}),
+        patch(
+            "src.spacextracker.services.seeding.update_launches_in_db"
+        ) as mock_update,
+    ):
+        mock_redis.set.return_value = True
+        mock_redis.get.side_effect = lambda key: mock_redis.set.call_args.args[1]
+        seeding.seed_launches()
+
+        mock_update.assert_not_called()
+        mock_redis.delete.assert_called_once_with(seeding.SEED_LOCK_KEY)
@@ -1,4 +1,10 @@
+import importlib
+import json
+import threading
+import time
 import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timezone
 from requests.exceptions import HTTPError
@@ -13,7 +19,7 @@ def test_get_json_from_api_success():
     mock_response.raise_for_status.return_value = None
 
     with patch(
-        "src.spacextracker.services.spacex_data.requests.get",
+        "src.spacextracker.services.spacex_data.session.get",
         return_value=mock_response,
     ) as mock_get:
         result = spacex_data.get_json_from_api("rockets")
@@ -28,7 +34,7 @@ def test_get_json_from_api_http_error():
     mock_response.raise_for_status.side_effect = HTTPError("404 Not Found")
 
     with patch(
-        "src.spacextracker.services.spacex_data.requests.get",
+        "src.spacextracker.services.spacex_data.session.get",
         return_value=mock_response,
     ):
         with pytest.raises(HTTPError):
@@ -118,18 +124,23 @@ def test_get_data_from_api():
         }
     ]
 
-    with patch(
-        "src.spacextracker.services.spacex_data.get_rockets_from_api",
-        return_value=rockets_mock,
-    ), patch(
-        "src.spacextracker.services.spacex_data.get_launchpads_from_api",
-        return_value=launchpads_mock,
-    ), patch(
-        "src.spacextracker.services.spacex_data.get_json_from_api",
-        return_value=launches_mock,
+    with (
+        patch(
+            "src.spacextracker.services.spacex_data.get_rockets_from_api",
+            return_value=rockets_mock,
+        ),
+        patch(
+            "src.spacextracker.services.spacex_data.get_launchpads_from_api",
+            return_value=launchpads_mock,
+        ),
+        patch(
+            "src.spacextracker.services.spacex_data.stream_json_from_api",
+            return_value=iter(launches_mock),
+        ),
     ):
 
         launches, rockets_data, launchpads_data = spacex_data.get_data_from_api()
+        launches = list(launches)
 
         assert len(launches) == 1
         assert launches[0]["rocket"]["name"] == "Falcon 9"
@@ -137,3 +148,311 @@ def test_get_data_from_api():
         assert launches[0]["date"] == datetime(2025, 9, 30, 12, 0, tzinfo=timezone.utc)
         assert rockets_data == rockets_mock
         assert launchpads_data == launchpads_mock
+
+
+def test_query_pages_from_api_follows_pages():
+    pages = [
+        {"docs": [{"id": "l1"}], "hasNextPage": True, "nextPage": 2},
+        {"docs": [{"id": "l2"}], "hasNextPage": False, "nextPage": None},
+    ]
+    with patch(
+        "src.spacextracker.services.spacex_data.query_api", side_effect=pages
+    ) as mock_query:
+        docs = spacex_data.query_pages_from_api("launches", {"upcoming": True})
+        assert mock_query.call_count == 1
+        result = list(docs)
+
+    assert result == [{"id": "l1"}, {"id": "l2"}]
+    assert mock_query.call_count == 2
+    assert mock_query.call_args.args[2]["page"] == 2
+    assert mock_query.call_args.args[2]["sort"] == {"date_utc": "asc", "_id": "asc"}
+
+
+def test_stream_json_from_api_decodes_items_incrementally():
+    mock_response = MagicMock()
+    mock_response.raise_for_status.return_value = None
+    mock_response.__enter__.return_value = mock_response
+    mock_response.iter_content.return_value = iter(
+        [b'[{"id": "l1"}', b', {"id"', b': "l2"}]']
+    )
+
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=mock_response,
+    ) as mock_get:
+        items = spacex_data.stream_json_from_api("launches")
+        mock_get.assert_called_once_with(
+            "https://api.spacexdata.com/v4/launches", timeout=10, stream=True
+        )
+        assert next(items) == {"id": "l1"}
+        assert list(items) == [{"id": "l2"}]
+
+
+def test_get_launches_from_api_since_uses_query():
+    since = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    with (
+        patch(
+            "src.spacextracker.services.spacex_data.query_pages_from_api",
+            return_value=[{"id": "l1"}],
+        ) as mock_query,
+        patch("src.spacextracker.services.spacex_data.get_json_from_api") as mock_get,
+    ):
+        result = spacex_data.get_launches_from_api(since)
+
+    assert result == [{"id": "l1"}]
+    mock_get.assert_not_called()
+    mock_query.assert_called_once_with(
+        "launches",
+        {
+            "$or": [
+                {"date_utc": {"$gte": "2025-09-01T00:00:00.000Z"}},
+                {"upcoming": True},
+            ]
+        },
+    )
+
+
+# Local stub server with per-endpoint latency
+# ------------------------
+STUB_LATENCY = {"/v4/rockets": 0.2, "/v4/launchpads": 0.3, "/v4/launches": 0.5}
+STUB_PAYLOADS = {
+    "/v4/rockets": [{"id": "r1", "name": "Falcon 9", "success_rate_pct": 98}],
+    "/v4/launchpads": [{"id": "lp1", "name": "LC-39A"}],
+    "/v4/launches": [
+        {
+            "id": "l1",
+            "name": "Test Launch",
+            "date_utc": "2025-09-30T12:00:00Z",
+            "rocket": "r1",
+            "launchpad": "lp1",
+        }
+    ],
+}
+
+
+class StubSpaceXHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(STUB_LATENCY[self.path])
+        body = json.dumps(STUB_PAYLOADS[self.path]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSpaceXHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v4/"
+    with patch("src.spacextracker.services.spacex_data.API_BASE_URL", base_url):
+        yield
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_data_from_api_fetches_concurrently(stub_api):
+    started = time.perf_counter()
+    launches, rockets_data, launchpads_data = spacex_data.get_data_from_api()
+    launches = list(launches)
+    elapsed = time.perf_counter() - started
+
+    slowest = max(STUB_LATENCY.values())
+    assert slowest <= elapsed < slowest + 0.25
+    assert elapsed < sum(STUB_LATENCY.values())
+    assert launches[0]["rocket"]["name"] == "Falcon 9"
+    assert launches[0]["launchpad"]["name"] == "LC-39A"
+    assert len(rockets_data) == 1
+    assert len(launchpads_data) == 1
+
+
+def test_api_base_url_can_be_overridden(monkeypatch):
+    monkeypatch.setenv("API_BASE_URL", "http://127.0.0.1:8765/v4")
+    try:
+        importlib.reload(spacex_data)
+        assert spacex_data.API_BASE_URL == "http://127.0.0.1:8765/v4/"
+    finally:
+        monkeypatch.delenv("API_BASE_URL")
+        importlib.reload(spacex_data)
+    assert spacex_data.API_BASE_URL == "https://api.spacexdata.com/v4/"
+
+
+def _response(status, body=b"[]", **headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    response.raw = MagicMock()
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+def test_send_with_retry_retries_transient_failures():
+    responses = [_response(503), _response(502, **{"Retry-After": "2"}), _response(200)]
+    send = MagicMock(side_effect=responses)
+    with patch("src.spacextracker.services.spacex_data.time.sleep") as mock_sleep:
+        response = spacex_data.send_with_retry(send, "http://api/v4/rockets")
+
+    assert response is responses[2]
+    assert send.call_count == 3
+    assert 0 <= mock_sleep.call_args_list[0].args[0] <= spacex_data.API_BACKOFF_SECONDS
+    # Retry-After wins over the computed backoff
+    assert mock_sleep.call_args_list[1].args[0] == 2
+    responses[0].raw.release_conn.assert_called_once_with()
+
+
+def test_send_with_retry_does_not_retry_client_errors():
+    send = MagicMock(return_value=_response(404))
+    with patch("src.spacextracker.services.spacex_data.time.sleep") as mock_sleep:
+        response = spacex_data.send_with_retry(send, "http://api/v4/rockets")
+
+    assert response.status_code == 404
+    send.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+def test_send_with_retry_gives_up_after_retries():
+    send = MagicMock(side_effect=requests.ConnectionError("refused"))
+    with (
+        patch("src.spacextracker.services.spacex_data.API_RETRIES", 2),
+        patch("src.spacextracker.services.spacex_data.time.sleep") as mock_sleep,
+    ):
+        with pytest.raises(requests.ConnectionError):
+            spacex_data.send_with_retry(send, "http://api/v4/rockets")
+
+    assert send.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_send_with_retry_respects_deadline():
+    send = MagicMock(return_value=_response(503, **{"Retry-After": "120"}))
+    with patch("src.spacextracker.services.spacex_data.time.sleep") as mock_sleep:
+        response = spacex_data.send_with_retry(send, "http://api/v4/rockets")
+
+    # Waiting 120s would overrun API_DEADLINE_SECONDS, so the 503 is returned
+    assert response.status_code == 503
+    send.assert_called_once()
+    mock_sleep.assert_not_called()
+    assert send.call_args.kwargs["timeout"] <= spacex_data.API_TIMEOUT_SECONDS
+
+
+def test_get_json_from_api_sends_conditional_request():
+    validators = {"etag": '"r1"', "last_modified": "Wed, 01 Oct 2025 00:00:00 GMT"}
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=_response(304),
+    ) as mock_get:
+        assert spacex_data.get_json_from_api("rockets", validators) is None
+
+    assert mock_get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"r1"',
+        "If-Modified-Since": "Wed, 01 Oct 2025 00:00:00 GMT",
+    }
+    assert validators["etag"] == '"r1"'
+
+
+def test_get_json_from_api_updates_validators():
+    validators = {"etag": '"r1"', "last_modified": "Wed, 01 Oct 2025 00:00:00 GMT"}
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=_response(200, b'[{"id": "r1"}]', ETag='"r2"'),
+    ):
+        assert spacex_data.get_json_from_api("rockets", validators) == [{"id": "r1"}]
+
+    assert validators == {"etag": '"r2"'}
+
+
+def test_stream_json_from_api_not_modified():
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=_response(304),
+    ) as mock_get:
+        assert spacex_data.stream_json_from_api("launches", {"etag": '"l1"'}) is None
+
+    assert mock_get.call_args.kwargs["stream"] is True
+
+
+def test_launch_list_changed():
+    validators = {"etag": '"l1"'}
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=_response(304),
+    ) as mock_get:
+        assert not spacex_data.launch_list_changed(validators)
+    assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"l1"'}
+    assert validators == {"etag": '"l1"'}
+
+    response = _response(200, ETag='"l2"')
+    with (
+        patch(
+            "src.spacextracker.services.spacex_data.session.get",
+            return_value=response,
+        ),
+        patch.object(response, "close") as mock_close,
+    ):
+        assert spacex_data.launch_list_changed(validators)
+    # Only the headers were needed
+    mock_close.assert_called_once_with()
+    assert validators == {"etag": '"l2"'}
+
+
+def test_get_data_from_api_not_modified():
+    validators = {
+        "launches": {"etag": '"l1"'},
+        "rockets": {"etag": '"r1"'},
+        "launchpads": {"etag": '"p1"'},
+    }
+    stored = MagicMock()
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get",
+        return_value=_response(304),
+    ) as mock_get:
+        result = spacex_data.get_data_from_api(validators=validators, stored=stored)
+
+    assert result == (None, None, None)
+    assert mock_get.call_count == 3
+    stored.assert_not_called()
+
+
+def test_get_data_from_api_refetches_launches_when_rockets_changed():
+    launch = {
+        "id": "l1",
+        "date_utc": "2025-09-30T12:00:00Z",
+        "rocket": "r1",
+        "launchpad": "lp1",
+    }
+    validators = {
+        "launches": {"etag": '"l1"'},
+        "rockets": {"etag": '"r1"'},
+        "launchpads": {"etag": '"p1"'},
+    }
+
+    def get(url, **kwargs):
+        if url.endswith("/rockets"):
+            body = b'[{"id": "r1", "name": "Falcon 9"}]'
+            return _response(200, body, ETag='"r2"')
+        if url.endswith("/launches") and "headers" not in kwargs:
+            return _response(200, json.dumps([launch]).encode(), ETag='"l1"')
+        return _response(304)
+
+    with patch(
+        "src.spacextracker.services.spacex_data.session.get", side_effect=get
+    ) as mock_get:
+        launches, rockets_data, launchpads_data = spacex_data.get_data_from_api(
+            validators=validators,
+            stored=lambda endpoint: [{"id": "lp1", "name": "LC-39A"}],
+        )
+        launches = list(launches)
+
+    # Launches embed rocket fields, so the unchanged list is fetched again
+    assert mock_get.call_count == 4
+    assert launches[0]["rocket"]["name"] == "Falcon 9"
+    assert launches[0]["launchpad"]["name"] == "LC-39A"
+    assert rockets_data[0]["name"] == "Falcon 9"
+    assert launchpads_data is None
+    assert validators["rockets"] == {"etag": '"r2"'}
@@ -1,52 +1,520 @@
-from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from pymongo import UpdateOne
 from src.spacextracker.services import store_to_db
 
 
+def _bulk_result(upserted: int = 0, matched: int = 0) -> MagicMock:
+    result = MagicMock()
+    result.upserted_count = upserted
+    result.matched_count = matched
+    return result
+
+
 def test_update_launches_in_db():
     # Mock data
     launches = [{"id": "l1", "name": "Test Launch"}]
     rockets = [{"id": "r1", "name": "Falcon 9"}]
     launchpads = [{"id": "lp1", "name": "LC-39A"}]
 
-    with patch(
-        "src.spacextracker.services.store_to_db.get_data_from_api",
-        return_value=(launches, rockets, launchpads),
-    ), patch(
-        "src.spacextracker.services.store_to_db.launches_collection"
-    ) as mock_launches_col, patch(
-        "src.spacextracker.services.store_to_db.rockets_collection"
-    ) as mock_rockets_col, patch(
-        "src.spacextracker.services.store_to_db.launchpads_collection"
-    ) as mock_lps_col:
-
-        # Mock update_one to do nothing
-        mock_launches_col.update_one.return_value = None
-        mock_rockets_col.update_one.return_value = None
-        mock_lps_col.update_one.return_value = None
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            return_value=(launches, rockets, launchpads),
+        ),
+        patch("src.spacextracker.services.store_to_db.get_sync_state", return_value={}),
+        patch("src.spacextracker.services.store_to_db.set_sync_state"),
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+        patch(
+            "src.spacextracker.services.store_to_db.launches_collection"
+        ) as mock_launches_col,
+        patch(
+            "src.spacextracker.services.store_to_db.rockets_collection"
+        ) as mock_rockets_col,
+        patch(
+            "src.spacextracker.services.store_to_db.launchpads_collection"
+        ) as mock_lps_col,
+    ):
+
+        # Nothing stored yet, every document is a new insert
+        for mock_col in (mock_launches_col, mock_rockets_col, mock_lps_col):
+            mock_col.find.return_value = []
+            mock_col.bulk_write.return_value = _bulk_result(upserted=1)
 
         result = store_to_db.update_launches_in_db()
 
-        assert result == len(launches)
-        mock_launches_col.update_one.assert_called_once_with(
-            {"_id": "l1"}, {"$set": launches[0]}, upsert=True
-        )
-        mock_rockets_col.update_one.assert_called_once_with(
-            {"_id": "r1"}, {"$set": rockets[0]}, upsert=True
-        )
-        mock_lps_col.update_one.assert_called_once_with(
-            {"_id": "lp1"}, {"$set": launchpads[0]}, upsert=True
-        )
+        assert result == {"processed": 1, "inserted": 3, "updated": 0, "unchanged": 0}
+        mock_bump.assert_called_once_with()
+        for mock_col, doc in (
+            (mock_launches_col, launches[0]),
+            (mock_rockets_col, rockets[0]),
+            (mock_lps_col, launchpads[0]),
+        ):
+            content_hash = store_to_db.compute_content_hash(doc)
+            mock_col.bulk_write.assert_called_once_with(
+                [
+                    UpdateOne(
+                        {"_id": doc["id"]},
+                        {"$set": {**doc, "content_hash": content_hash}},
+                        upsert=True,
+                    )
+                ],
+                ordered=False,
+            )
 
 
 # Optional: test empty lists
 def test_update_launches_in_db_empty():
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            return_value=([], [], []),
+        ),
+        patch("src.spacextracker.services.store_to_db.get_sync_state", return_value={}),
+        patch("src.spacextracker.services.store_to_db.set_sync_state"),
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+        patch("src.spacextracker.services.store_to_db.launches_collection"),
+        patch("src.spacextracker.services.store_to_db.rockets_collection"),
+        patch("src.spacextracker.services.store_to_db.launchpads_collection"),
+    ):
+        result = store_to_db.update_launches_in_db()
+        assert result["processed"] == 0
+        mock_bump.assert_not_called()
+
+
+def test_bulk_upsert_skips_unchanged_documents():
+    unchanged = {"id": "l1", "name": "Same"}
+    changed = {"id": "l2", "name": "New name"}
+    mock_col = MagicMock()
+    mock_col.find.return_value = [
+        {"_id": "l1", "content_hash": store_to_db.compute_content_hash(unchanged)},
+        {"_id": "l2", "content_hash": "stale"},
+    ]
+    mock_col.bulk_write.return_value = _bulk_result(upserted=1, matched=1)
+
+    stats = store_to_db.bulk_upsert(
+        mock_col, [unchanged, changed, {"id": "l3", "name": "Brand new"}]
+    )
+
+    assert stats == {"inserted": 1, "updated": 1, "unchanged": 1}
+    operations = mock_col.bulk_write.call_args.args[0]
+    assert [op._filter for op in operations] == [{"_id": "l2"}, {"_id": "l3"}]
+
+
+def test_bulk_upsert_all_unchanged_skips_write():
+    doc = {"id": "r1", "name": "Falcon 9"}
+    mock_col = MagicMock()
+    mock_col.find.return_value = [
+        {"_id": "r1", "content_hash": store_to_db.compute_content_hash(doc)}
+    ]
+
+    stats = store_to_db.bulk_upsert(mock_col, [doc])
+
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 1}
+    mock_col.bulk_write.assert_not_called()
+
+
+def test_bulk_upsert_batches():
+    mock_col = MagicMock()
+    mock_col.find.return_value = []
+    mock_col.bulk_write.return_value = _bulk_result(upserted=2)
+    docs = [{"id": f"l{i}"} for i in range(5)]
+
+    store_to_db.bulk_upsert(mock_col, docs, batch_size=2)
+
+    assert mock_col.bulk_write.call_count == 3
+    assert mock_col.find.call_count == 3
+
+
+def test_get_sync_since_without_state_is_full():
+    with patch(
+        "src.spacextracker.services.store_to_db.get_sync_state", return_value={}
+    ):
+        assert store_to_db.get_sync_since() is None
+
+
+def test_get_sync_since_uses_watermark_with_lookback():
+    watermark = datetime(2025, 9, 30)
+    state = {
+        "watermark": watermark,
+        "last_full_sync": datetime.now(timezone.utc),
+        "schema_version": store_to_db.SCHEMA_VERSION,
+    }
     with patch(
-        "src.spacextracker.services.store_to_db.get_data_from_api",
-        return_value=([], [], []),
-    ), patch("src.spacextracker.services.store_to_db.launches_collection"), patch(
-        "src.spacextracker.services.store_to_db.rockets_collection"
-    ), patch(
-        "src.spacextracker.services.store_to_db.launchpads_collection"
+        "src.spacextracker.services.store_to_db.get_sync_state", return_value=state
+    ):
+        since = store_to_db.get_sync_since()
+    assert since == watermark.replace(tzinfo=timezone.utc) - timedelta(
+        days=store_to_db.SYNC_LOOKBACK_DAYS
+    )
+
+
+def test_get_sync_since_full_reconcile_due():
+    state = {
+        "watermark": datetime(2025, 9, 30),
+        "last_full_sync": datetime.now(timezone.utc)
+        - timedelta(hours=store_to_db.FULL_SYNC_HOURS + 1),
+        "schema_version": store_to_db.SCHEMA_VERSION,
+    }
+    with patch(
+        "src.spacextracker.services.store_to_db.get_sync_state", return_value=state
+    ):
+        assert store_to_db.get_sync_since() is None
+        assert store_to_db.get_sync_since(full=True) is None
+
+
+def test_get_sync_since_schema_change_forces_full():
+    state = {
+        "watermark": datetime(2025, 9, 30),
+        "last_full_sync": datetime.now(timezone.utc),
+        "schema_version": store_to_db.SCHEMA_VERSION - 1,
+    }
+    with patch(
+        "src.spacextracker.services.store_to_db.get_sync_state", return_value=state
+    ):
+        assert store_to_db.get_sync_since() is None
+
+
+def test_update_launches_in_db_incremental_advances_watermark():
+    since = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    launches = [
+        {"id": "l1", "date": datetime(2025, 9, 10, tzinfo=timezone.utc)},
+        {"id": "l2", "date": datetime(2025, 9, 20, tzinfo=timezone.utc)},
+        {
+            "id": "l3",
+            "date": datetime(2025, 12, 1, tzinfo=timezone.utc),
+            "upcoming": True,
+        },
+    ]
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_sync_since", return_value=since
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            return_value=(launches, [], []),
+        ) as mock_api,
+        patch(
+            "src.spacextracker.services.store_to_db.get_upstream_validators",
+            return_value={},
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.set_sync_state"
+        ) as mock_set_state,
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            side_effect=lambda collection, docs, batch_size: {
+                "inserted": 0,
+                "updated": 0,
+                "unchanged": len(list(docs)),
+            },
+        ),
     ):
         result = store_to_db.update_launches_in_db()
-        assert result == 0
+
+    assert result["processed"] == 3
+    # Nothing changed, so cached responses stay valid
+    mock_bump.assert_not_called()
+
+    mock_api.assert_called_once()
+    assert mock_api.call_args.kwargs["since"] == since
+    mock_set_state.assert_called_once_with(
+        "launches", watermark=datetime(2025, 9, 20, tzinfo=timezone.utc)
+    )
+
+
+def test_update_launches_in_db_not_modified_skips_ingest():
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_sync_since", return_value=None
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_upstream_validators",
+            return_value={"launches": {"etag": '"l"'}},
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            return_value=(None, None, None),
+        ) as mock_api,
+        patch(
+            "src.spacextracker.services.store_to_db.set_sync_state"
+        ) as mock_set_state,
+        patch("src.spacextracker.services.store_to_db.bulk_upsert") as mock_upsert,
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+    ):
+        result = store_to_db.update_launches_in_db()
+
+    assert result == {"processed": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    assert mock_api.call_args.kwargs["validators"] == {"launches": {"etag": '"l"'}}
+    mock_upsert.assert_not_called()
+    mock_bump.assert_not_called()
+    # A full reconcile confirmed by 304s still counts as one
+    assert mock_set_state.call_args.args == ("launches",)
+    assert set(mock_set_state.call_args.kwargs) == {"last_full_sync"}
+
+
+def _fetch_with_validators(new_validators, rockets=None):
+    def fetch(since, validators, stored):
+        for endpoint, values in new_validators.items():
+            validators[endpoint] = values
+        return [], rockets, None
+
+    return fetch
+
+
+def test_update_launches_in_db_incremental_keeps_launches_validators():
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_sync_since",
+            return_value=datetime(2025, 9, 1, tzinfo=timezone.utc),
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_upstream_validators",
+            return_value={},
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            side_effect=_fetch_with_validators(
+                {
+                    "launches": {"etag": '"l2"'},
+                    "rockets": {
+                        "etag": '"r2"',
+                        "last_modified": "Wed, 01 Oct 2025 00:00:00 GMT",
+                    },
+                },
+                rockets=[{"id": "r1", "name": "Falcon 9"}],
+            ),
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.set_sync_state"
+        ) as mock_set_state,
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 0, "updated": 0, "unchanged": 0},
+        ) as mock_upsert,
+        patch("src.spacextracker.services.store_to_db.bump_data_version"),
+    ):
+        store_to_db.update_launches_in_db()
+
+    # Unchanged launchpads are not written
+    assert mock_upsert.call_count == 2
+    # Only a full sync stores validators of the whole launch list
+    mock_set_state.assert_called_once_with(
+        "rockets", etag='"r2"', last_modified="Wed, 01 Oct 2025 00:00:00 GMT"
+    )
+
+
+def test_update_launches_in_db_full_sync_stores_launches_validators():
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_sync_since", return_value=None
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_upstream_validators",
+            return_value={},
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.get_data_from_api",
+            side_effect=_fetch_with_validators({"launches": {"etag": '"l2"'}}),
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.set_sync_state"
+        ) as mock_set_state,
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 0, "updated": 0, "unchanged": 0},
+        ),
+        patch("src.spacextracker.services.store_to_db.bump_data_version"),
+    ):
+        store_to_db.update_launches_in_db()
+
+    mock_set_state.assert_called_once()
+    state = mock_set_state.call_args.kwargs
+    assert mock_set_state.call_args.args == ("launches",)
+    assert state["etag"] == '"l2"'
+    assert state["last_modified"] is None
+    assert state["schema_version"] == store_to_db.SCHEMA_VERSION
+
+
+def test_get_upstream_validators():
+    states = {
+        "launches": {
+            "etag": '"l"',
+            "schema_version": store_to_db.SCHEMA_VERSION,
+            "watermark": datetime(2025, 9, 1),
+        },
+        "rockets": {"etag": '"r"', "last_modified": "Wed, 01 Oct 2025 00:00:00 GMT"},
+        "launchpads": {},
+    }
+    with patch(
+        "src.spacextracker.services.store_to_db.get_sync_state",
+        side_effect=lambda name: states[name],
+    ):
+        assert store_to_db.get_upstream_validators(full=True) == {}
+        assert store_to_db.get_upstream_validators() == {
+            "launches": {"etag": '"l"'},
+            "rockets": states["rockets"],
+            "launchpads": {},
+        }
+        assert store_to_db.get_upstream_validators(
+            endpoints=("rockets", "launchpads")
+        ) == {"rockets": states["rockets"], "launchpads": {}}
+        states["launches"]["schema_version"] = store_to_db.SCHEMA_VERSION - 1
+        assert store_to_db.get_upstream_validators() == {}
+
+
+def test_store_dimensions_returns_lookups():
+    rockets = [{"id": "r1", "name": "Falcon 9", "success_rate_pct": 98}]
+    launchpads = [{"id": "lp1", "name": "LC-39A", "full_name": "KSC LC-39A"}]
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_dimensions_from_api",
+            return_value=(rockets, launchpads),
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 1, "updated": 0, "unchanged": 0},
+        ) as mock_upsert,
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+    ):
+        totals, rocket_lookup, launchpad_lookup = store_to_db.store_dimensions()
+
+    assert totals == {"processed": 0, "inserted": 2, "updated": 0, "unchanged": 0}
+    mock_bump.assert_called_once_with()
+    assert mock_upsert.call_count == 2
+    assert rocket_lookup["r1"]["name_lower"] == "falcon 9"
+    assert launchpad_lookup["lp1"]["full_name"] == "KSC LC-39A"
+
+
+def test_store_dimensions_skips_unchanged():
+    launchpads = [{"id": "lp1", "name": "LC-39A", "full_name": "KSC LC-39A"}]
+    validators = {"rockets": {"etag": '"r1"'}, "launchpads": {}}
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.get_dimensions_from_api",
+            return_value=(None, launchpads),
+        ) as mock_api,
+        patch(
+            "src.spacextracker.services.store_to_db.rockets_collection"
+        ) as mock_rockets_col,
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 1, "updated": 0, "unchanged": 0},
+        ) as mock_upsert,
+        patch("src.spacextracker.services.store_to_db.bump_data_version"),
+    ):
+        mock_rockets_col.find.return_value = [{"id": "r1", "name": "Falcon 9"}]
+        totals, rocket_lookup, _ = store_to_db.store_dimensions(validators)
+
+    mock_api.assert_called_once_with(validators)
+    # Rockets answered 304, so they are read back instead of written
+    mock_upsert.assert_called_once()
+    assert totals["inserted"] == 1
+    assert rocket_lookup["r1"]["name"] == "Falcon 9"
+
+
+def test_store_launch_page_fetches_transforms_and_writes():
+    page = {
+        "docs": [
+            {"id": "l1", "date_utc": "2025-09-10T00:00:00Z", "rocket": "r1"},
+            {"id": "l2", "date_utc": "2025-09-20T00:00:00Z", "upcoming": True},
+        ]
+    }
+    written = []
+
+    def upsert(collection, docs, batch_size):
+        written.extend(docs)
+        return {"inserted": len(written), "updated": 0, "unchanged": 0}
+
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.query_api", return_value=page
+        ) as mock_query,
+        patch("src.spacextracker.services.store_to_db.bulk_upsert", side_effect=upsert),
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+    ):
+        result = store_to_db.store_launch_page(
+            {"upcoming": True}, 3, {"r1": {"id": "r1", "name": "Falcon 9"}}, {}, 50
+        )
+        # Before any other page or the chord callback runs
+        mock_bump.assert_called_once_with()
+
+    assert mock_query.call_args.args[:2] == ("launches", {"upcoming": True})
+    assert mock_query.call_args.args[2]["page"] == 3
+    assert mock_query.call_args.args[2]["limit"] == 50
+    assert [doc["id"] for doc in written] == ["l1", "l2"]
+    assert written[0]["rocket"]["name"] == "Falcon 9"
+    assert result["processed"] == 2
+    assert result["inserted"] == 2
+    # Upcoming launches do not move the watermark
+    assert result["watermark"] == "2025-09-10T00:00:00+00:00"
+    assert set(result) >= {"fetch_s", "transform_s", "write_s"}
+
+
+def test_finish_launch_pages_combines_pages():
+    pages = [
+        {
+            "processed": 2,
+            "inserted": 1,
+            "updated": 1,
+            "unchanged": 0,
+            "watermark": "2025-09-20T00:00:00+00:00",
+            "fetch_s": 0.5,
+            "transform_s": 0.1,
+            "write_s": 0.2,
+        },
+        {
+            "processed": 1,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 1,
+            "watermark": None,
+            "fetch_s": 0.25,
+            "transform_s": 0.05,
+            "write_s": 0.1,
+        },
+    ]
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.set_sync_state"
+        ) as mock_set_state,
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+    ):
+        result = store_to_db.finish_launch_pages(
+            pages,
+            {"inserted": 0, "updated": 0, "unchanged": 2},
+            False,
+            {"launches": {"etag": '"l2"'}},
+        )
+
+    assert result == {
+        "processed": 3,
+        "inserted": 1,
+        "updated": 1,
+        "unchanged": 3,
+        "stages_s": {"fetch_s": 0.75, "transform_s": 0.15, "write_s": 0.3},
+    }
+    # The pages bumped it as they were written
+    mock_bump.assert_not_called()
+    # Incremental pages do not cover the whole launch list
+    mock_set_state.assert_called_once_with(
+        "launches", watermark=datetime(2025, 9, 20, tzinfo=timezone.utc)
+    )
+
+
+def test_store_launch_page_without_changes_keeps_data_version():
+    with (
+        patch(
+            "src.spacextracker.services.store_to_db.query_api",
+            return_value={"docs": [{"id": "l1", "date_utc": "2025-09-10T00:00:00Z"}]},
+        ),
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 0, "updated": 0, "unchanged": 1},
+        ),
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+    ):
+        store_to_db.store_launch_page({}, 1, {}, {})
+
+    mock_bump.assert_not_called()
@@ -0,0 +1,254 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.spacextracker import tasks
+
+VALIDATORS = {"rockets": {"etag": '"r1"'}, "launchpads": {"etag": '"p1"'}}
+DIMENSIONS = {"processed": 0, "inserted": 0, "updated": 0, "unchanged": 2}
+FULL_VALIDATORS = {**VALIDATORS, "launches": {"etag": '"l1"'}}
+
+
+def _page(processed: int = 1, inserted: int = 1) -> dict:
+    return {
+        "processed": processed,
+        "inserted": inserted,
+        "updated": 0,
+        "unchanged": processed - inserted,
+        "fetch_s": 0.1,
+        "transform_s": 0.1,
+        "write_s": 0.1,
+        "watermark": "2025-09-30T12:00:00+00:00",
+    }
+
+
+@pytest.fixture
+def ingest():
+    with (
+        patch("src.spacextracker.tasks.ensure_indexes"),
+        patch("src.spacextracker.tasks.get_sync_since", return_value=None),
+        patch(
+            "src.spacextracker.tasks.get_upstream_validators", return_value=VALIDATORS
+        ),
+        patch(
+            "src.spacextracker.tasks.store_dimensions",
+            return_value=(DIMENSIONS, {"r1": {}}, {"p1": {}}),
+        ) as mock_dimensions,
+        patch(
+            "src.spacextracker.tasks.launches_query", return_value={"upcoming": True}
+        ),
+        patch("src.spacextracker.tasks.count_query_pages") as mock_pages,
+        patch("src.spacextracker.tasks.chord") as mock_chord,
+        patch("src.spacextracker.tasks.finalize_ingest") as mock_finalize,
+    ):
+        yield mock_dimensions, mock_pages, mock_chord, mock_finalize
+
+
+def test_fetch_and_store_launches_dispatches_a_chord_of_pages(ingest):
+    mock_dimensions, mock_pages, mock_chord, mock_finalize = ingest
+    mock_pages.return_value = 3
+
+    result = tasks.fetch_and_store_launches()
+
+    mock_dimensions.assert_called_once_with(VALIDATORS)
+    (header,) = mock_chord.call_args.args
+    assert [signature.args[1] for signature in header] == [1, 2, 3]
+    assert header[0].args[0] == {"upcoming": True}
+    mock_chord.return_value.assert_called_once_with(mock_finalize.s.return_value)
+    assert mock_finalize.s.call_args.args[:3] == (DIMENSIONS, True, VALIDATORS)
+    mock_finalize.s.return_value.delay.assert_not_called()
+    assert result["pages"] == 3
+    assert set(result["stages_s"]) == {"prepare_s", "dimensions_s", "dispatch_s"}
+
+
+def test_fetch_and_store_launches_without_pages_finalizes_directly(ingest):
+    _, mock_pages, mock_chord, mock_finalize = ingest
+    mock_pages.return_value = 0
+
+    result = tasks.fetch_and_store_launches()
+
+    # An empty chord would never call its callback
+    mock_chord.assert_not_called()
+    mock_finalize.s.return_value.delay.assert_called_once_with([])
+    assert result["pages"] == 0
+
+
+def test_full_reconcile_of_unchanged_launches_dispatches_no_pages(ingest):
+    _, mock_pages, mock_chord, mock_finalize = ingest
+    with (
+        patch(
+            "src.spacextracker.tasks.get_upstream_validators",
+            return_value=FULL_VALIDATORS,
+        ),
+        patch(
+            "src.spacextracker.tasks.launch_list_changed", return_value=False
+        ) as mock_changed,
+    ):
+        result = tasks.fetch_and_store_launches()
+
+    mock_changed.assert_called_once_with({"etag": '"l1"'})
+    mock_pages.assert_not_called()
+    mock_chord.assert_not_called()
+    # The callback records the full sync and keeps the launch validators
+    assert mock_finalize.s.call_args.args[1:3] == (True, FULL_VALIDATORS)
+    mock_finalize.s.return_value.delay.assert_called_once_with([])
+    assert result["pages"] == 0
+
+
+def test_full_reconcile_of_changed_launches_dispatches_pages(ingest):
+    _, mock_pages, mock_chord, _ = ingest
+    mock_pages.return_value = 2
+    with (
+        patch(
+            "src.spacextracker.tasks.get_upstream_validators",
+            return_value=FULL_VALIDATORS,
+        ),
+        patch("src.spacextracker.tasks.launch_list_changed", return_value=True),
+    ):
+        assert tasks.fetch_and_store_launches()["pages"] == 2
+
+    mock_chord.assert_called_once()
+
+
+def test_changed_dimensions_rewrite_launches_without_asking(ingest):
+    mock_dimensions, mock_pages, mock_chord, _ = ingest
+    mock_dimensions.return_value = ({**DIMENSIONS, "updated": 1}, {}, {})
+    mock_pages.return_value = 1
+    with (
+        patch(
+            "src.spacextracker.tasks.get_upstream_validators",
+            return_value=FULL_VALIDATORS,
+        ),
+        patch("src.spacextracker.tasks.launch_list_changed") as mock_changed,
+    ):
+        tasks.fetch_and_store_launches()
+
+    mock_changed.assert_not_called()
+    mock_chord.assert_called_once()
+
+
+def test_incremental_sync_does_not_ask_about_the_launch_list(ingest):
+    _, mock_pages, _, _ = ingest
+    mock_pages.return_value = 1
+    with (
+        patch(
+            "src.spacextracker.tasks.get_sync_since",
+            return_value=datetime(2025, 9, 1, tzinfo=timezone.utc),
+        ),
+        patch(
+            "src.spacextracker.tasks.get_upstream_validators",
+            return_value=FULL_VALIDATORS,
+        ),
+        patch("src.spacextracker.tasks.launch_list_changed") as mock_changed,
+    ):
+        tasks.fetch_and_store_launches()
+
+    mock_changed.assert_not_called()
+
+
+def test_fetch_and_store_launches_records_failures(ingest):
+    mock_dimensions = ingest[0]
+    mock_dimensions.side_effect = ConnectionError("API down")
+
+    with (
+        patch("src.spacextracker.tasks._record_run") as mock_record,
+        pytest.raises(ConnectionError),
+    ):
+        tasks.fetch_and_store_launches()
+
+    assert mock_record.call_args.args[0] == "fetch_and_store_launches"
+    assert mock_record.call_args.kwargs == {"failed": True}
+
+
+def test_failing_page_leaves_written_pages_visible():
+    # The chord callback never runs when a page fails, so the data version is
+    # bumped by the pages that were written
+    pages = [
+        {"docs": [{"id": "l1", "date_utc": "2025-09-10T00:00:00Z"}]},
+        ConnectionError("SpaceX API down"),
+    ]
+    with (
+        patch("src.spacextracker.services.store_to_db.query_api", side_effect=pages),
+        patch(
+            "src.spacextracker.services.store_to_db.bulk_upsert",
+            return_value={"inserted": 1, "updated": 0, "unchanged": 0},
+        ),
+        patch("src.spacextracker.services.store_to_db.bump_data_version") as mock_bump,
+        patch("src.spacextracker.tasks._record_run") as mock_record,
+    ):
+        assert tasks.ingest_launch_page({}, 1, {}, {})["inserted"] == 1
+        with pytest.raises(ConnectionError):
+            tasks.ingest_launch_page({}, 2, {}, {})
+
+    mock_bump.assert_called_once_with()
+    assert [call.kwargs["failed"] for call in mock_record.call_args_list] == [
+        False,
+        True,
+    ]
+
+
+def test_finalize_ingest_records_run_and_warms_caches():
+    with (
+        patch(
+            "src.spacextracker.tasks.finish_launch_pages",
+            wraps=tasks.finish_launch_pages,
+        ) as mock_finish,
+        patch("src.spacextracker.services.store_to_db._finish_sync"),
+        patch("src.spacextracker.tasks.warm_caches", MagicMock()) as mock_warm,
+        patch("src.spacextracker.tasks._run_async") as mock_run,
+        patch("src.spacextracker.tasks.record_task") as mock_record,
+    ):
+        stats = tasks.finalize_ingest([_page(), _page(2, 0)], {}, True, VALIDATORS, 0)
+
+    mock_finish.assert_called_once_with([_page(), _page(2, 0)], {}, True, VALIDATORS)
+    mock_run.assert_called_once_with(mock_warm.return_value)
+    assert stats["processed"] == 3
+    assert stats["pages"] == 2
+    assert {"pipeline_s", "finalize_s", "fetch_s"} <= set(stats["stages_s"])
+    _, task, _, processed, failed = mock_record.call_args.args
+    assert (task, processed, failed) == ("fetch_and_store_launches", 3, False)
+
+
+def test_finalize_ingest_without_changes_skips_warmup():
+    with (
+        patch("src.spacextracker.services.store_to_db._finish_sync"),
+        patch("src.spacextracker.tasks._run_async") as mock_run,
+        patch("src.spacextracker.tasks.record_task"),
+    ):
+        stats = tasks.finalize_ingest([_page(1, 0)], {}, False, {}, 0)
+
+    mock_run.assert_not_called()
+    assert stats["unchanged"] == 1
+
+
+def test_finalize_ingest_survives_warmup_and_metrics_errors():
+    with (
+        patch("src.spacextracker.tasks.warm_caches", MagicMock()),
+        patch("src.spacextracker.services.store_to_db._finish_sync"),
+        patch(
+            "src.spacextracker.tasks._run_async",
+            side_effect=ConnectionError("Redis down"),
+        ),
+        patch(
+            "src.spacextracker.tasks.record_task",
+            side_effect=ConnectionError("Redis down"),
+        ),
+    ):
+        stats = tasks.finalize_ingest([_page()], {}, True, {}, 0)
+
+    assert stats["inserted"] == 1
+
+
+def test_finalize_ingest_records_failures():
+    with (
+        patch(
+            "src.spacextracker.tasks.finish_launch_pages",
+            side_effect=ConnectionError("MongoDB down"),
+        ),
+        patch("src.spacextracker.tasks.record_task") as mock_record,
+        pytest.raises(ConnectionError),
+    ):
+        tasks.finalize_ingest([_page()], {}, True, {}, 0)
+
+    assert mock_record.call_args.args[4] is True
@@ -1,3 +1,4 @@
+import pytest
 from datetime import date, datetime, time
 from src.spacextracker.services import utils
 
@@ -13,3 +14,56 @@ def test_to_datetime_end_of_day():
     dt = utils.to_datetime(d, end=True)
     # time.max = 23:59:59.999999
     assert dt == datetime.combine(d, time.max)
+
+
+def test_iter_json_array_across_chunk_boundaries():
+    payload = '[{"id": "l1", "name": "Ñu"}, {"id": "l2", "tags": [1, 2]}, 345]'.encode()
+    # Split every 3 bytes, which also cuts the multi-byte character in half
+    chunks = [payload[i : i + 3] for i in range(0, len(payload), 3)]
+    assert list(utils.iter_json_array(chunks)) == [
+        {"id": "l1", "name": "Ñu"},
+        {"id": "l2", "tags": [1, 2]},
+        345,
+    ]
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([b"[0.", b"5]"], [0.5]),
+        ([b"[1e", b"3]"], [1000.0]),
+        ([b"[-", b"12, tr", b"ue, nu", b"ll]"], [-12, True, None]),
+        ([b'["l', b'1", 2', b"0 ]"], ["l1", 20]),
+    ],
+)
+def test_iter_json_array_scalar_across_chunk_boundaries(chunks, expected):
+    assert list(utils.iter_json_array(chunks)) == expected
+
+
+def test_iter_json_array_empty():
+    assert list(utils.iter_json_array([b" [ ]"])) == []
+
+
+def test_iter_json_array_rejects_non_array():
+    with pytest.raises(ValueError):
+        list(utils.iter_json_array([b'{"id": "l1"}']))
+
+
+def test_iter_json_array_truncated():
+    with pytest.raises(ValueError):
+        list(utils.iter_json_array([b'[{"id": "l1"}, {"id"']))
+
+
+def test_cursor_round_trip():
+    token = utils.encode_cursor(datetime(2025, 9, 30, 12, 0), "l1")
+    assert utils.decode_cursor(token) == (datetime(2025, 9, 30, 12, 0), "l1")
+
+
+def test_cursor_from_cached_date_string():
+    token = utils.encode_cursor("2025-09-30 12:00:00", "l1")
+    assert utils.decode_cursor(token) == (datetime(2025, 9, 30, 12, 0), "l1")
+
+
+def test_decode_cursor_invalid():
+    with pytest.raises(ValueError):
+        utils.decode_cursor("not-a-cursor")